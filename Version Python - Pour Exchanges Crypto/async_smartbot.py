@@ -0,0 +1,580 @@
+"""
+BTCUSD SmartBot - asyncio runtime
+Same strategy as BTCSmartBot with concurrent exchange calls (ccxt.async_support)
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import ccxt
+import pandas as pd
+
+from btc_smartbot import BTCSmartBot, PAPER_POSITION_PREFIX, create_exchange
+from candle_store import ohlcv_to_frame
+from market_feed import MarketFeed, ccxt_trade_stream
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBTCSmartBot(BTCSmartBot):
+    """
+    Async variant of BTCSmartBot
+
+    On a new bar, balance, ticker, primary and confirmation candles are
+    requested at the same time, so the signal is ready after one round
+    trip. The analysis and risk logic is inherited unchanged; the exchange
+    access methods are coroutines here.
+    """
+
+    def _initialize_exchange(self):
+        """Initialize async exchange connection"""
+        return create_exchange(self.exchange_config, asynchronous=True)
+
+    async def fetch_ohlcv(self, timeframe: str, limit: int = 100) -> pd.DataFrame:
+        """
+        Fetch OHLCV data from exchange (through the candle store if enabled)
+
+        Args:
+            timeframe: Candle timeframe (e.g., '1h', '4h')
+            limit: Number of candles to fetch
+
+        Returns:
+            DataFrame with OHLCV data
+        """
+        try:
+            with self._stage(f'fetch_{timeframe}'):
+                if self.candle_store:
+                    return await self.candle_store.fetch_async(
+                        self.exchange,
+                        self.config.SYMBOL,
+                        timeframe,
+                        limit
+                    )
+
+                ohlcv = await self.exchange.fetch_ohlcv(
+                    self.config.SYMBOL,
+                    timeframe=timeframe,
+                    limit=limit
+                )
+
+                return ohlcv_to_frame(ohlcv)
+
+        except Exception as e:
+            logger.error(f"Error fetching OHLCV data: {e}")
+            return pd.DataFrame()
+
+    async def get_current_price(self) -> Tuple[float, float]:
+        """
+        Get current bid/ask prices
+
+        Returns:
+            Tuple (bid, ask)
+        """
+        try:
+            with self._stage('ticker'):
+                ticker = await self.market_cache.get_async(
+                    'ticker', self.exchange.fetch_ticker, self.config.SYMBOL
+                )
+            return self._parse_ticker(ticker)
+        except Exception as e:
+            logger.error(f"Error fetching ticker: {e}")
+            return 0.0, 0.0
+
+    async def monitor_price(self) -> Tuple[float, float]:
+        """
+        Mid price for the position monitor
+
+        The ticker is always requested (a cached one could be up to
+        TICKER_CACHE_TTL old) and its response refreshes the cache. Not
+        timed as a stage of the bar analysis.
+
+        Returns:
+            Tuple (mid price or 0 when unavailable, age of the ticker in seconds)
+        """
+        try:
+            ticker = await self.market_cache.get_async(
+                'ticker', self.exchange.fetch_ticker, self.config.SYMBOL, refresh=True
+            )
+        except Exception as e:
+            logger.error(f"Error fetching ticker: {e}")
+            return 0.0, 0.0
+
+        bid, ask = self._parse_ticker(ticker)
+        if not bid or not ask:
+            return 0.0, 0.0
+        return (bid + ask) / 2, self._ticker_age(ticker)
+
+    async def update_balance(self):
+        """Update account balance"""
+        try:
+            with self._stage('balance'):
+                balance = await self.market_cache.get_async('balance', self.exchange.fetch_balance)
+            self._apply_balance(balance)
+        except Exception as e:
+            logger.error(f"Error fetching balance: {e}")
+
+    async def _place_market_order(self, side: str, amount: float) -> dict:
+        """Place market order on exchange"""
+        return await self.exchange.create_market_order(
+            self.config.SYMBOL,
+            side,
+            amount
+        )
+
+    async def _send_stop_update(self, position_id: str, stop: float) -> bool:
+        """
+        Move the stop of a position on the exchange (dispatcher sender)
+
+        The stop order is created on the first move and edited afterwards.
+
+        Returns:
+            True if the exchange accepted the stop
+        """
+        if self.config.DRY_RUN:
+            logger.debug("📝 PAPER TRADE - Stop %.2f of %s not sent to exchange", stop, position_id)
+            return True
+
+        request = self._stop_order_request(position_id, stop)
+        if request is None:
+            return True
+
+        order_id = self.stop_orders.get(position_id)
+        if order_id is None:
+            order = await self.exchange.create_order(
+                request['symbol'], request['type'], request['side'],
+                request['amount'], request['price'], request['params']
+            )
+            self._set_stop_order(position_id, str(order['id']))
+        else:
+            try:
+                await self.exchange.edit_order(
+                    order_id, request['symbol'], request['type'], request['side'],
+                    request['amount'], request['price'], request['params']
+                )
+            except (ccxt.OrderNotFound, ccxt.InvalidOrder):
+                order = await self.exchange.fetch_order(order_id, request['symbol'])
+                if self._stop_order_gone(position_id, order):
+                    return True
+                raise
+
+        logger.info("Stop loss updated on exchange: %s %.2f", position_id, stop)
+        return True
+
+    async def _send_stop_updates(self, updates: List[Tuple[str, float]]) -> Dict[str, bool]:
+        """
+        Move the stops of several positions, edits in one exchange call
+
+        A position whose stop fails does not fail the others.
+
+        Returns:
+            Dict position_id -> True if the exchange accepted its stop
+        """
+        results = {}
+        edits = []
+        edited = []
+        for position_id, stop in updates:
+            if self.config.DRY_RUN or position_id not in self.stop_orders:
+                results[position_id] = await self._try_send_stop_update(position_id, stop)
+                continue
+
+            request = self._stop_order_request(position_id, stop)
+            if request is None:
+                results[position_id] = True
+                continue
+            request['id'] = self.stop_orders[position_id]
+            edits.append(request)
+            edited.append((position_id, stop))
+
+        if edits:
+            try:
+                await self.exchange.edit_orders(edits)
+            except (ccxt.OrderNotFound, ccxt.InvalidOrder):
+                # Some stop can no longer be edited: sort them out one by one
+                for position_id, stop in edited:
+                    results[position_id] = await self._try_send_stop_update(position_id, stop)
+                return results
+            except Exception as e:
+                logger.error("Error updating %d stops on exchange: %s", len(edits), e)
+                results.update((position_id, False) for position_id, _ in edited)
+                return results
+
+            results.update((position_id, True) for position_id, _ in edited)
+            logger.info(f"{len(edits)} stop losses updated on exchange in one call")
+
+        return results
+
+    async def _try_send_stop_update(self, position_id: str, stop: float) -> bool:
+        """_send_stop_update reporting an error as a failure of this position only"""
+        try:
+            return bool(await self._send_stop_update(position_id, stop))
+        except Exception as e:
+            logger.error("Error updating stop of %s on exchange: %s", position_id, e)
+            return False
+
+    async def reconcile_positions(self):
+        """
+        Check restored positions against their stop orders on the exchange
+
+        Positions stopped out while the bot was down are closed, canceled
+        stops are recreated and stops moved but never sent are sent.
+        """
+        if self.config.DRY_RUN or not self.stop_orders:
+            return
+
+        position_ids = list(self.stop_orders)
+        orders = await asyncio.gather(
+            *(self.exchange.fetch_order(self.stop_orders[position_id], self.config.SYMBOL)
+              for position_id in position_ids),
+            return_exceptions=True
+        )
+
+        for position_id, order in zip(position_ids, orders):
+            if isinstance(order, Exception):
+                logger.error(f"Error reconciling {position_id}: {order}")
+            else:
+                self._reconcile_stop_order(position_id, order)
+
+    async def execute_trade(self, signal: str, current_price: float, atr: float):
+        """
+        Execute trade based on signal
+
+        Args:
+            signal: 'buy' or 'sell'
+            current_price: Current market price
+            atr: Current ATR value
+        """
+        trade = self._prepare_trade(signal, current_price, atr)
+        if trade is None:
+            return
+
+        # Execute order
+        if self.config.DRY_RUN:
+            logger.info("📝 PAPER TRADE - Order not sent to exchange")
+            position_id = f"{PAPER_POSITION_PREFIX}{int(self.clock.time())}"
+        else:
+            try:
+                with self._stage('order'):
+                    order = await self._place_market_order(signal, trade['size'])
+                self._order_acknowledged()
+                position_id = str(order['id'])
+                logger.info(f"✅ Order executed: {position_id}")
+            except Exception as e:
+                logger.error(f"❌ Order execution failed: {e}")
+                return
+
+        self._record_trade(position_id, trade)
+
+    async def fetch_confirmation_ohlcv(self) -> Optional[pd.DataFrame]:
+        """
+        Fetch confirmation timeframe candles
+
+        Returns:
+            DataFrame with OHLCV data, or None when they are resampled locally
+        """
+        if self.timeframe_aggregator is not None:
+            return None
+
+        return await self.fetch_ohlcv(self.config.CONFIRMATION_TIMEFRAME, limit=50)
+
+    # The inherited strategy steps fetch missing market data with the sync
+    # API, which returns un-awaited coroutines here: the data is required
+
+    def check_trading_filters(self, prices: Tuple[float, float]) -> bool:
+        """
+        Check all trading filters (time, spread, volatility)
+
+        Args:
+            prices: (bid, ask) from get_current_price
+
+        Returns:
+            True if all filters pass
+        """
+        if prices is None:
+            raise TypeError("AsyncBTCSmartBot.check_trading_filters needs the (bid, ask) prices")
+        return super().check_trading_filters(prices)
+
+    def check_higher_timeframe_confirmation(self, df_h4: Optional[pd.DataFrame]) -> bool:
+        """
+        Check trend confirmation on higher timeframe (H4)
+
+        Args:
+            df_h4: Candles from fetch_confirmation_ohlcv (None only when
+                they are resampled from the primary candles)
+
+        Returns:
+            True if higher timeframe confirms trend
+        """
+        if df_h4 is None and self.timeframe_aggregator is None:
+            raise TypeError("AsyncBTCSmartBot.check_higher_timeframe_confirmation needs the H4 candles")
+        return super().check_higher_timeframe_confirmation(df_h4)
+
+    def manage_open_positions(self, current_price: float):
+        """
+        Manage open positions (trailing stops, monitoring)
+
+        Args:
+            current_price: Mid price already fetched this iteration
+        """
+        if current_price is None:
+            raise TypeError("AsyncBTCSmartBot.manage_open_positions needs the current price")
+        super().manage_open_positions(current_price)
+
+    async def analyze_new_bar(self) -> Optional[str]:
+        """
+        Fetch everything needed for a new bar concurrently and act on it
+
+        Returns:
+            Signal acted on ('buy', 'sell') or None
+        """
+        self._start_bar()
+
+        _, (bid, ask), df, df_h4 = await asyncio.gather(
+            self.update_balance(),
+            self.get_current_price(),
+            self.fetch_ohlcv(self.config.PRIMARY_TIMEFRAME, limit=self.primary_history_limit()),
+            self.fetch_confirmation_ohlcv()
+        )
+
+        # Check trading filters
+        if not self.check_trading_filters((bid, ask)):
+            return None
+
+        if df.empty:
+            logger.warning("No data available")
+            return None
+
+        # Update indicators with the new candles
+        self.update_primary_candles(df)
+
+        # Check higher timeframe confirmation
+        if not self.check_higher_timeframe_confirmation(df_h4):
+            logger.debug("No H4 confirmation")
+            return None
+
+        # Manage existing positions
+        self.manage_open_positions((bid + ask) / 2)
+
+        # Check for entry signals
+        signal = self.analyze_entry_signal(self.primary_indicators)
+
+        if signal:
+            entry_price = ask if signal == 'buy' else bid
+            await self.execute_trade(signal, entry_price, self.primary_indicators.atr)
+
+        return signal
+
+    async def on_bar_closed(self, bar: dict) -> Optional[str]:
+        """
+        Evaluate the strategy on a closed primary timeframe bar
+
+        Indicators are updated from the bar itself; exchange calls are only
+        made when the bar produces a signal.
+
+        Args:
+            bar: Closed bar from MarketFeed
+
+        Returns:
+            Signal acted on ('buy', 'sell') or None
+        """
+        # Each bar event is one traced iteration
+        with self._iteration():
+            if not bar['complete']:
+                # Feed joined mid-bar: take this bar from the exchange instead
+                df = await self.fetch_ohlcv(self.config.PRIMARY_TIMEFRAME, limit=self.primary_history_limit())
+                self.update_primary_candles(df)
+                return None
+
+            with self._stage('bar'):
+                signal = await self._analyze_closed_bar(bar)
+        self.publish_metrics()
+        return signal
+
+    async def _analyze_closed_bar(self, bar: dict) -> Optional[str]:
+        """Strategy steps of on_bar_closed for a complete bar"""
+        self._start_bar()
+
+        with self._stage('indicators'):
+            self.primary_indicators.update(
+                pd.Timestamp(bar['timestamp'], unit='ms'),
+                bar['high'],
+                bar['low'],
+                bar['close']
+            )
+            if self.timeframe_aggregator is not None:
+                self.timeframe_aggregator.update(
+                    bar['timestamp'], bar['open'], bar['high'], bar['low'], bar['close'], bar['volume']
+                )
+
+        # Manage existing positions
+        self.manage_open_positions(bar['close'])
+
+        # Check for entry signals
+        signal = self.analyze_entry_signal(self.primary_indicators)
+        if not signal:
+            return None
+
+        logger.info(f"📊 Signal on bar close - Checking filters...")
+
+        _, (bid, ask), df_h4 = await asyncio.gather(
+            self.update_balance(),
+            self.get_current_price(),
+            self.fetch_confirmation_ohlcv()
+        )
+
+        if not self.check_trading_filters((bid, ask)):
+            return None
+
+        if not self.check_higher_timeframe_confirmation(df_h4):
+            logger.debug("No H4 confirmation")
+            return None
+
+        entry_price = ask if signal == 'buy' else bid
+        await self.execute_trade(signal, entry_price, self.primary_indicators.atr)
+
+        return signal
+
+    async def run_event_driven(self, feed: Optional[MarketFeed] = None):
+        """
+        Run the strategy on bar-close events instead of polling
+
+        Args:
+            feed: Market feed of the primary timeframe (default: ccxt.pro
+                trade stream of the configured exchange)
+        """
+        stream_exchange = None
+        if feed is None:
+            stream_exchange = create_exchange(self.exchange_config, streaming=True)
+            feed = MarketFeed(
+                ccxt_trade_stream(stream_exchange, self.config.SYMBOL),
+                self.config.PRIMARY_TIMEFRAME
+            )
+
+        self.is_running = True
+        logger.info("🚀 Bot started (event driven)!")
+
+        await self.reconcile_positions()
+        self.start_metrics()
+        if self.tracer is not None:
+            self.tracer.start()
+
+        # Manage stops on every trade price, not only on bar close
+        dispatcher_task = asyncio.create_task(self.stop_dispatcher.run_async())
+        monitor_task = None
+        if self.config.USE_POSITION_MONITOR:
+            feed.on_price(self.position_monitor.on_price)
+            monitor_task = asyncio.create_task(self.position_monitor.run_async())
+
+        try:
+            # Seed indicators from history; the forming candle is revised by the feed
+            df = await self.fetch_ohlcv(self.config.PRIMARY_TIMEFRAME, limit=self.primary_history_limit())
+            self.update_primary_candles(df)
+
+            feed.on_bar_closed(self.on_bar_closed)
+            await feed.run()
+
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            logger.info("🛑 Bot stopped by user")
+        except Exception as e:
+            logger.error(f"❌ Bot error: {e}", exc_info=True)
+        finally:
+            self.is_running = False
+            if monitor_task is not None:
+                self.position_monitor.stop()
+                await asyncio.gather(monitor_task, return_exceptions=True)
+            self.stop_dispatcher.stop()
+            await asyncio.gather(dispatcher_task, return_exceptions=True)
+            if stream_exchange is not None:
+                await stream_exchange.close()
+            await self.close()
+            logger.info("Bot shutdown complete")
+
+    async def run(self, iterations: Optional[int] = None):
+        """
+        Main bot loop
+
+        Args:
+            iterations: Number of iterations (None for infinite)
+        """
+        self.is_running = True
+        iteration = 0
+
+        logger.info("🚀 Bot started (asyncio)!")
+
+        await self.reconcile_positions()
+        self.start_metrics()
+        if self.tracer is not None:
+            self.tracer.start()
+
+        # Manage stops on every price poll, not only on new bars
+        dispatcher_task = asyncio.create_task(self.stop_dispatcher.run_async())
+        monitor_task = None
+        if self.config.USE_POSITION_MONITOR:
+            monitor_task = asyncio.create_task(
+                self.position_monitor.run_async(self.monitor_price, self.config.MONITOR_POLL_SECONDS)
+            )
+
+        try:
+            while self.is_running:
+                iteration += 1
+
+                if iterations and iteration > iterations:
+                    logger.info("Maximum iterations reached")
+                    break
+
+                with self._iteration():
+                    new_bar = self.is_new_bar(self.clock.now())
+                    if new_bar:
+                        logger.info(f"📊 New bar detected - Analyzing...")
+                        with self._stage('bar'):
+                            await self.analyze_new_bar()
+
+                if new_bar:
+                    self.publish_metrics()
+
+                # Sleep before next iteration
+                await self.clock.sleep_async(10)
+
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            logger.info("🛑 Bot stopped by user")
+        except Exception as e:
+            logger.error(f"❌ Bot error: {e}", exc_info=True)
+        finally:
+            self.is_running = False
+            if monitor_task is not None:
+                self.position_monitor.stop()
+                await asyncio.gather(monitor_task, return_exceptions=True)
+            self.stop_dispatcher.stop()
+            await asyncio.gather(dispatcher_task, return_exceptions=True)
+            await self.close()
+            logger.info("Bot shutdown complete")
+
+    async def close(self):
+        """Close the exchange connection, the state journal, the tracer and the metrics endpoint"""
+        if self.journal is not None:
+            self.journal.close()
+        if self.tracer is not None:
+            self.tracer.close()
+        self.publish_metrics()
+        self.metrics.close()
+        await self.exchange.close()
+
+
+def main():
+    """Main entry point"""
+    # Load environment variables
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    # Initialize bot
+    bot = AsyncBTCSmartBot()
+
+    # Run bot
+    try:
+        asyncio.run(bot.run())
+    except Exception as e:
+        logger.error(f"Fatal error: {e}", exc_info=True)
+
+
+if __name__ == "__main__":
+    main()
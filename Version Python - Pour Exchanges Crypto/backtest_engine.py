@@ -0,0 +1,312 @@
+"""
+Backtest Engine for BTCUSD SmartBot
+Vectorized EMA crossover backtest with a single sequential position walk
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Optional, Tuple
+
+from indicators import TechnicalIndicators
+from config import TradingConfig
+
+# Keys of the BacktestEngine.calculate_metrics summary
+METRICS = ('trades', 'win_rate', 'total_pnl', 'roi', 'max_drawdown', 'profit_factor', 'final_balance')
+
+
+class BacktestEngine:
+    """
+    Backtests the EMA crossover strategy over a whole series at once
+
+    Indicators, crossover signals, stop levels and sizing inputs are
+    computed with array operations. Only the position walk, which depends on
+    the running balance, is sequential and it only visits crossover bars.
+
+    Trading rules are the ones of example_backtest.simple_backtest: enter on
+    a crossover, exit on the opposite crossover at the close price, size with
+    RiskManager.calculate_position_size. Stop Loss/Take Profit are recorded
+    but not simulated.
+    """
+
+    def __init__(
+        self,
+        config: TradingConfig = TradingConfig,
+        initial_balance: float = 10000.0,
+        use_volatility_filter: bool = False
+    ):
+        """
+        Args:
+            config: Trading configuration
+            initial_balance: Starting capital in USD
+            use_volatility_filter: Ignore signals with ATR below MIN_ATR_USD
+                (the live bot does this, simple_backtest does not)
+        """
+        self.config = config
+        self.initial_balance = initial_balance
+        self.use_volatility_filter = use_volatility_filter
+
+    def run(self, data: pd.DataFrame) -> dict:
+        """
+        Run the backtest on OHLCV data
+
+        Args:
+            data: DataFrame with OHLCV data indexed by timestamp
+
+        Returns:
+            Result dict (see run_arrays)
+        """
+        df = TechnicalIndicators.add_all_indicators(
+            data,
+            self.config.FAST_EMA,
+            self.config.SLOW_EMA,
+            self.config.ATR_PERIOD
+        )
+        df = df.dropna()
+
+        result = self.run_arrays(
+            df['close'].to_numpy(dtype=np.float64),
+            df['ema_fast'].to_numpy(dtype=np.float64),
+            df['ema_slow'].to_numpy(dtype=np.float64),
+            df['atr'].to_numpy(dtype=np.float64)
+        )
+
+        # Attach timestamps to trades
+        trades = result['trades']
+        if not trades.empty:
+            trades['entry_time'] = df.index[trades['entry_index'].to_numpy()]
+            trades['exit_time'] = df.index[trades['exit_index'].to_numpy()]
+        if result['open_position'] is not None:
+            position = result['open_position']
+            position['entry_time'] = df.index[position['entry_index']]
+
+        result['start'] = df.index[0] if len(df) else None
+        result['end'] = df.index[-1] if len(df) else None
+
+        return result
+
+    def run_arrays(
+        self,
+        close: np.ndarray,
+        ema_fast: np.ndarray,
+        ema_slow: np.ndarray,
+        atr: np.ndarray
+    ) -> dict:
+        """
+        Run the backtest on precomputed indicator arrays
+
+        Bars where any input is NaN are dropped first, like
+        DataFrame.dropna() in simple_backtest.
+
+        Args:
+            close: Close prices
+            ema_fast: Fast EMA values
+            ema_slow: Slow EMA values
+            atr: ATR values
+
+        Returns:
+            Dict with:
+            - trades: DataFrame of closed trades (type, entry, exit, pnl, balance,
+              size, stop_loss, take_profit, entry_index, exit_index)
+            - open_position: Position still open at the end, or None
+            - initial_balance / final_balance: Balance in USD
+            - bars: Number of bars simulated
+        """
+        valid = ~(np.isnan(close) | np.isnan(ema_fast) | np.isnan(ema_slow) | np.isnan(atr))
+        if not valid.all():
+            close, ema_fast, ema_slow, atr = close[valid], ema_fast[valid], ema_slow[valid], atr[valid]
+
+        bullish, bearish = self.crossover_signals(ema_fast, ema_slow)
+
+        # simple_backtest starts evaluating at the third bar
+        bullish[:2] = False
+        bearish[:2] = False
+
+        entry_allowed = None
+        if self.use_volatility_filter:
+            entry_allowed = atr >= self.config.MIN_ATR_USD
+
+        events = np.flatnonzero(bullish | bearish)
+
+        # Stops for every event bar, in one pass
+        sl_distance = atr[events] * self.config.ATR_MULTIPLIER_SL
+        tp_distance = atr[events] * self.config.ATR_MULTIPLIER_TP
+        event_price = close[events]
+        event_bullish = bullish[events]
+        stop_loss = np.where(event_bullish, event_price - sl_distance, event_price + sl_distance)
+        take_profit = np.where(event_bullish, event_price + tp_distance, event_price - tp_distance)
+        price_distance = np.abs(event_price - stop_loss)
+
+        trades, open_position, balance = self._walk_positions(
+            events,
+            event_bullish,
+            event_price,
+            stop_loss,
+            take_profit,
+            price_distance,
+            entry_allowed[events] if entry_allowed is not None else None
+        )
+
+        columns = [
+            'type', 'entry', 'exit', 'pnl', 'balance', 'size',
+            'stop_loss', 'take_profit', 'entry_index', 'exit_index'
+        ]
+
+        return {
+            'trades': pd.DataFrame(trades, columns=columns),
+            'open_position': open_position,
+            'initial_balance': self.initial_balance,
+            'final_balance': balance,
+            'bars': len(close)
+        }
+
+    @staticmethod
+    def calculate_metrics(result: dict) -> dict:
+        """
+        Summarize a backtest result
+
+        Args:
+            result: Result dict from run or run_arrays
+
+        Returns:
+            Dict with trades, win_rate, total_pnl, roi, max_drawdown (% of
+            peak realized balance), profit_factor and final_balance
+        """
+        pnl = result['trades']['pnl'].to_numpy(dtype=np.float64)
+        initial_balance = result['initial_balance']
+        final_balance = result['final_balance']
+
+        total_pnl = final_balance - initial_balance
+        gross_profit = pnl[pnl > 0].sum()
+        gross_loss = -pnl[pnl < 0].sum()
+
+        if gross_loss > 0:
+            profit_factor = gross_profit / gross_loss
+        else:
+            profit_factor = np.inf if gross_profit > 0 else 0.0
+
+        equity = np.concatenate(([initial_balance], result['trades']['balance'].to_numpy(dtype=np.float64)))
+        peak = np.maximum.accumulate(equity)
+        drawdown = np.where(peak > 0, (peak - equity) / peak * 100, 0.0)
+
+        return {
+            'trades': len(pnl),
+            'win_rate': (pnl > 0).sum() / len(pnl) * 100 if len(pnl) else 0.0,
+            'total_pnl': total_pnl,
+            'roi': total_pnl / initial_balance * 100,
+            'max_drawdown': drawdown.max(),
+            'profit_factor': profit_factor,
+            'final_balance': final_balance
+        }
+
+    @staticmethod
+    def crossover_signals(
+        ema_fast: np.ndarray,
+        ema_slow: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Detect EMA crossovers on every bar
+
+        Same rule as TechnicalIndicators.detect_ema_crossover applied to each
+        bar and its predecessor (the first bar never signals).
+
+        Args:
+            ema_fast: Fast EMA values
+            ema_slow: Slow EMA values
+
+        Returns:
+            Tuple (bullish, bearish) boolean arrays
+        """
+        bullish = np.zeros(len(ema_fast), dtype=bool)
+        bearish = np.zeros(len(ema_fast), dtype=bool)
+
+        if len(ema_fast) < 2:
+            return bullish, bearish
+
+        fast_prev, fast_curr = ema_fast[:-1], ema_fast[1:]
+        slow_prev, slow_curr = ema_slow[:-1], ema_slow[1:]
+
+        bullish[1:] = (fast_prev <= slow_prev) & (fast_curr > slow_curr)
+        bearish[1:] = (fast_prev >= slow_prev) & (fast_curr < slow_curr)
+
+        return bullish, bearish
+
+    def _walk_positions(
+        self,
+        events: np.ndarray,
+        event_bullish: np.ndarray,
+        event_price: np.ndarray,
+        stop_loss: np.ndarray,
+        take_profit: np.ndarray,
+        price_distance: np.ndarray,
+        entry_allowed: Optional[np.ndarray]
+    ) -> Tuple[list, Optional[dict], float]:
+        """
+        Sequential position walk over crossover bars only
+
+        Returns:
+            Tuple (trades, open_position, final_balance)
+        """
+        risk_fraction = self.config.RISK_PERCENT / 100.0
+        min_size = self.config.MIN_ORDER_SIZE
+        balance = float(self.initial_balance)
+
+        # Plain Python scalars are much faster than NumPy scalars in this loop
+        events = events.tolist()
+        event_bullish = event_bullish.tolist()
+        event_price = event_price.tolist()
+        stop_loss = stop_loss.tolist()
+        take_profit = take_profit.tolist()
+        price_distance = price_distance.tolist()
+        entry_allowed = entry_allowed.tolist() if entry_allowed is not None else None
+
+        trades = []
+        position = None  # (is_buy, entry, size, stop_loss, take_profit, entry_index)
+
+        for k in range(len(events)):
+            is_bullish = event_bullish[k]
+            price = event_price[k]
+
+            # Close position if signal reverses
+            if position is not None and position[0] != is_bullish:
+                is_buy, entry, size, pos_sl, pos_tp, entry_index = position
+                if is_buy:
+                    pnl = (price - entry) * size
+                else:
+                    pnl = (entry - price) * size
+
+                balance += pnl
+                trades.append((
+                    'buy' if is_buy else 'sell', entry, price, pnl, balance,
+                    size, pos_sl, pos_tp, entry_index, events[k]
+                ))
+                position = None
+
+            # Open new position
+            if position is None and balance > 0:
+                if entry_allowed is not None and not entry_allowed[k]:
+                    continue
+
+                # Same rule as RiskManager.calculate_position_size
+                distance = price_distance[k]
+                if distance == 0:
+                    size = min_size
+                else:
+                    size = round((balance * risk_fraction) / distance, 6)
+                    if size < min_size:
+                        size = min_size
+
+                position = (is_bullish, price, size, stop_loss[k], take_profit[k], events[k])
+
+        open_position = None
+        if position is not None:
+            is_buy, entry, size, pos_sl, pos_tp, entry_index = position
+            open_position = {
+                'type': 'buy' if is_buy else 'sell',
+                'entry': entry,
+                'size': size,
+                'stop_loss': pos_sl,
+                'take_profit': pos_tp,
+                'entry_index': entry_index
+            }
+
+        return trades, open_position, balance
@@ -0,0 +1,387 @@
+"""
+Benchmarks for BTCUSD SmartBot
+Timings of the indicator, backtest, risk and trailing stop hot paths with regression tracking
+"""
+
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import timeit
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import BacktestEngine
+from config import TradingConfig
+from indicators import TechnicalIndicators
+from risk_manager import RiskManager
+from trailing_stop import TrailingStopManager
+
+logger = logging.getLogger(__name__)
+
+# Candle counts benchmarked by default
+SIZES = (100, 10_000, 1_000_000, 10_000_000)
+
+RESULTS_DIR = 'data/benchmarks'
+BASELINE_FILE = os.path.join(RESULTS_DIR, 'baseline.json')
+
+# Slowdown (median time ratio - 1) reported as a regression
+REGRESSION_THRESHOLD = 0.10
+
+
+def sample_candles(count: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Random walk hourly candles for benchmarks (vectorized, reproducible)
+
+    Args:
+        count: Number of candles
+        seed: Random seed
+
+    Returns:
+        DataFrame with OHLCV data indexed by timestamp
+    """
+    rng = np.random.default_rng(seed)
+    close = np.maximum(45000.0 + np.cumsum(rng.normal(0, 200, count)), 20000.0)
+    open_ = np.concatenate(([close[0]], close[:-1]))
+
+    return pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) + rng.uniform(0, 100, count),
+        'low': np.minimum(open_, close) - rng.uniform(0, 100, count),
+        'close': close,
+        'volume': rng.uniform(100, 1000, count)
+    }, index=pd.date_range('2020-01-01', periods=count, freq='1h', name='timestamp'))
+
+
+# Each setup receives (candles, size) and returns the function to time
+
+def _setup_ema(data: pd.DataFrame, size: int) -> Callable:
+    return lambda: TechnicalIndicators.calculate_ema(data, TradingConfig.FAST_EMA)
+
+
+def _setup_atr(data: pd.DataFrame, size: int) -> Callable:
+    return lambda: TechnicalIndicators.calculate_atr(data, TradingConfig.ATR_PERIOD)
+
+
+def _setup_all_indicators(data: pd.DataFrame, size: int) -> Callable:
+    return lambda: TechnicalIndicators.add_all_indicators(
+        data, TradingConfig.FAST_EMA, TradingConfig.SLOW_EMA, TradingConfig.ATR_PERIOD
+    )
+
+
+def _setup_crossover(data: pd.DataFrame, size: int) -> Callable:
+    fast = TechnicalIndicators.calculate_ema(data, TradingConfig.FAST_EMA)
+    slow = TechnicalIndicators.calculate_ema(data, TradingConfig.SLOW_EMA)
+    return lambda: TechnicalIndicators.detect_ema_crossover(fast, slow)
+
+
+def _setup_backtest(data: pd.DataFrame, size: int) -> Callable:
+    # simple_backtest runs this engine and prints the trades
+    engine = BacktestEngine(TradingConfig, 10000.0)
+    return lambda: engine.run(data)
+
+
+def _setup_position_size(data: pd.DataFrame, size: int) -> Callable:
+    risk_manager = RiskManager(TradingConfig)
+    entries = data['close'].to_numpy().tolist()
+    stops = (data['low'].to_numpy() - 300.0).tolist()
+
+    def run():
+        calculate = risk_manager.calculate_position_size
+        for entry, stop in zip(entries, stops):
+            calculate(10000.0, entry, stop)
+    return run
+
+
+def _trailing_book(data: pd.DataFrame) -> tuple:
+    """Positions entered at each close, one third short, stops 2% away"""
+    entries = data['close'].to_numpy()
+    directions = np.where(np.arange(len(entries)) % 3 == 2, -1, 1)
+    stops = entries * (1 - directions * 0.02)
+    price = float(entries[-1])
+    return entries, directions, stops, price
+
+
+def _setup_trailing_batch(data: pd.DataFrame, size: int) -> Callable:
+    manager = TrailingStopManager(TradingConfig, RiskManager(TradingConfig))
+    entries, directions, stops, price = _trailing_book(data)
+    ids = [f"p{i}" for i in range(size)]
+
+    def run():
+        active = np.zeros(size, dtype=bool)
+        manager.update_stops_batch(ids, entries, price, stops, directions, active)
+    return run
+
+
+def _setup_trailing_loop(data: pd.DataFrame, size: int) -> Callable:
+    manager = TrailingStopManager(TradingConfig, RiskManager(TradingConfig))
+    entries, directions, stops, price = _trailing_book(data)
+    rows = list(zip(
+        [f"p{i}" for i in range(size)],
+        entries.tolist(),
+        stops.tolist(),
+        ['buy' if direction == 1 else 'sell' for direction in directions]
+    ))
+
+    def run():
+        manager.trailing_active.clear()
+        for position_id, entry, stop, position_type in rows:
+            manager.update_position_stop(position_id, entry, price, stop, position_type)
+    return run
+
+
+# name -> (setup, largest size run; per-call Python loops are capped)
+BENCHMARKS: Dict[str, tuple] = {
+    'calculate_ema': (_setup_ema, None),
+    'calculate_atr': (_setup_atr, None),
+    'add_all_indicators': (_setup_all_indicators, None),
+    'detect_ema_crossover': (_setup_crossover, None),
+    'simple_backtest': (_setup_backtest, None),
+    'calculate_position_size': (_setup_position_size, 1_000_000),
+    'trailing_stop_batch': (_setup_trailing_batch, None),
+    'trailing_stop_loop': (_setup_trailing_loop, 100_000)
+}
+
+
+def environment() -> dict:
+    """Versions and machine description stored with results"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def measure(function: Callable, repeat: int = 5) -> dict:
+    """
+    Time a function like timeit (garbage collection off)
+
+    The number of calls per measurement is calibrated so that one
+    measurement takes at least 0.2 s; the calibration doubles as warm-up.
+
+    Args:
+        function: Function to time
+        repeat: Number of measurements
+
+    Returns:
+        Dict with number (calls per measurement), repeat, and min, median,
+        mean and stdev of the seconds per call
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    times = np.array(timer.repeat(repeat, number)) / number
+
+    return {
+        'number': number,
+        'repeat': repeat,
+        'min': float(times.min()),
+        'median': float(np.median(times)),
+        'mean': float(times.mean()),
+        'stdev': float(times.std())
+    }
+
+
+def run_benchmarks(
+    names: Optional[List[str]] = None,
+    sizes: tuple = SIZES,
+    repeat: int = 5,
+    seed: int = 0
+) -> dict:
+    """
+    Run benchmarks at several sizes
+
+    Logging is disabled during the runs, so timings do not depend on the
+    logging configuration.
+
+    Args:
+        names: Benchmarks to run (default: all of BENCHMARKS)
+        sizes: Candle counts (also positions or calls, depending on the benchmark)
+        repeat: Measurements per benchmark and size
+        seed: Seed of the generated candles
+
+    Returns:
+        Dict with environment and results ('name/size' -> measure() dict
+        plus benchmark, size and per_item_ns)
+    """
+    names = names or list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    results = {}
+    previous_disable = logging.root.manager.disable
+    logging.disable(logging.CRITICAL)
+    try:
+        for size in sorted(sizes):
+            data = sample_candles(size, seed)
+            for name in names:
+                setup, max_size = BENCHMARKS[name]
+                if max_size is not None and size > max_size:
+                    continue
+
+                result = measure(setup(data, size), repeat)
+                result.update(benchmark=name, size=size, per_item_ns=result['median'] / size * 1e9)
+                results[f"{name}/{size}"] = result
+                print(f"{name:>24} {size:>10}: {_format_seconds(result['median'])}", file=sys.stderr)
+            del data
+    finally:
+        logging.disable(previous_disable)
+
+    return {'environment': environment(), 'results': results}
+
+
+def save_results(results: dict, path: Optional[str] = None) -> str:
+    """
+    Write results as JSON
+
+    Args:
+        results: run_benchmarks() output
+        path: Output file (default: RESULTS_DIR/<timestamp>.json)
+
+    Returns:
+        Path written
+    """
+    if path is None:
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        path = os.path.join(RESULTS_DIR, f"{stamp}.json")
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+def load_results(path: str) -> dict:
+    """Read results written by save_results"""
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = REGRESSION_THRESHOLD) -> List[dict]:
+    """
+    Compare two result sets
+
+    A benchmark is a regression when its median time grew by more than
+    threshold and the slowdown is larger than the spread of both runs
+    (3 standard deviations), an improvement in the opposite case.
+
+    Args:
+        baseline: Reference results
+        current: New results
+        threshold: Relative slowdown tolerated (0.10: 10%)
+
+    Returns:
+        List of dicts (key, baseline, current, ratio, status) for the
+        benchmarks present in both, status being 'regression',
+        'improvement' or 'ok'
+    """
+    rows = []
+    for key, new in current['results'].items():
+        old = baseline['results'].get(key)
+        if old is None:
+            continue
+
+        ratio = new['median'] / old['median'] if old['median'] > 0 else float('inf')
+        noise = 3 * (old['stdev'] + new['stdev'])
+        difference = new['median'] - old['median']
+
+        status = 'ok'
+        if ratio > 1 + threshold and difference > noise:
+            status = 'regression'
+        elif ratio < 1 / (1 + threshold) and -difference > noise:
+            status = 'improvement'
+
+        rows.append({
+            'key': key,
+            'baseline': old['median'],
+            'current': new['median'],
+            'ratio': ratio,
+            'status': status
+        })
+
+    return rows
+
+
+def _format_seconds(seconds: float) -> str:
+    for unit, scale in (('s', 1.0), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.2f} ns"
+
+
+def print_comparison(rows: List[dict]):
+    """Print a comparison table"""
+    print(f"{'benchmark':<36} {'baseline':>11} {'current':>11} {'ratio':>7}")
+    for row in rows:
+        flag = {'regression': '  ⚠️ REGRESSION', 'improvement': '  ✅ faster'}.get(row['status'], '')
+        print(f"{row['key']:<36} {_format_seconds(row['baseline']):>11} "
+              f"{_format_seconds(row['current']):>11} {row['ratio']:>6.2f}x{flag}")
+
+
+def main() -> int:
+    """Command line entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the strategy hot paths")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="Run benchmarks and store the results")
+    run_parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help="Benchmarks to run")
+    run_parser.add_argument('--sizes', nargs='+', type=int, default=list(SIZES))
+    run_parser.add_argument('--max-size', type=int, help="Skip sizes above this")
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--output', help="Results file (default: data/benchmarks/<timestamp>.json)")
+    run_parser.add_argument('--save-baseline', action='store_true', help="Also store as the baseline")
+    run_parser.add_argument('--compare', nargs='?', const=BASELINE_FILE, help="Compare with a baseline")
+    run_parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+
+    compare_parser = subparsers.add_parser('compare', help="Compare two results files")
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--baseline', default=BASELINE_FILE)
+    compare_parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        sizes = tuple(size for size in args.sizes if args.max_size is None or size <= args.max_size)
+        current = run_benchmarks(args.only, sizes, args.repeat)
+        print(f"Results written to {save_results(current, args.output)}")
+        if args.save_baseline:
+            print(f"Baseline written to {save_results(current, BASELINE_FILE)}")
+        if not args.compare:
+            return 0
+        baseline_path = args.compare
+    else:
+        current = load_results(args.current)
+        baseline_path = args.baseline
+
+    rows = compare_results(load_results(baseline_path), current, args.threshold)
+    print_comparison(rows)
+
+    # Non-zero exit status for CI
+    return 1 if any(row['status'] == 'regression' for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,25 +8,101 @@ Version: 1.0.0
 """
 
 import ccxt
+import ccxt.async_support
+import ccxt.pro
+import numpy as np
 import pandas as pd
 import logging
-import time
-from datetime import datetime, timezone
+from contextlib import nullcontext
+from datetime import datetime
 from typing import Optional, Dict, List, Tuple
 
 from config import TradingConfig, ExchangeConfig
-from indicators import TechnicalIndicators, MarketAnalyzer
+from indicators import TechnicalIndicators, MarketAnalyzer, StreamingIndicators
 from risk_manager import RiskManager, PositionTracker
-from trailing_stop import TrailingStopManager
+from trailing_stop import TrailingStopManager, BreakevenManager
+from position_monitor import PositionMonitor
+from stop_dispatcher import StopUpdateDispatcher
+from state_journal import StateJournal, journal_directory
+from metrics import MetricsRegistry, InstrumentedExchange
+from tracing import Tracer
+from candle_store import CandleStore, ohlcv_to_frame
+from timeframe_aggregator import TimeframeAggregator
+from market_cache import MarketStateCache
+from request_scheduler import RequestScheduler, ScheduledExchange, serialize_requests
+from clock import SystemClock
+from logging_setup import setup_logging
 
 
 # Setup logging
-logging.basicConfig(
-    level=getattr(logging, TradingConfig.LOG_LEVEL),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+setup_logging(
+    TradingConfig.LOG_LEVEL,
+    json_format=TradingConfig.LOG_FORMAT == 'json',
+    asynchronous=TradingConfig.LOG_ASYNC,
+    sampling=TradingConfig.LOG_SAMPLING
 )
 logger = logging.getLogger(__name__)
 
+# Position id prefix of paper trades (never sent to the exchange)
+PAPER_POSITION_PREFIX = 'paper_'
+
+
+def create_exchange(
+    exchange_config: ExchangeConfig = ExchangeConfig,
+    asynchronous: bool = False,
+    streaming: bool = False
+) -> ccxt.Exchange:
+    """
+    Create the ccxt exchange instance described by the configuration
+
+    Args:
+        exchange_config: Exchange configuration
+        asynchronous: Use the ccxt.async_support class (coroutine methods)
+        streaming: Use the ccxt.pro class (async, with websocket watch_* methods)
+
+    Returns:
+        ccxt exchange instance (behind a ScheduledExchange proxy when
+        USE_REQUEST_SCHEDULER is set, except for streaming)
+    """
+    if streaming:
+        module = ccxt.pro
+    elif asynchronous:
+        module = ccxt.async_support
+    else:
+        module = ccxt
+    exchange_class = getattr(module, exchange_config.EXCHANGE_NAME)
+    scheduled = exchange_config.ENABLE_RATE_LIMIT and exchange_config.USE_REQUEST_SCHEDULER and not streaming
+
+    exchange_params = {
+        'apiKey': exchange_config.API_KEY,
+        'secret': exchange_config.API_SECRET,
+        # With the scheduler, ccxt still computes each request's cost but
+        # the scheduler (installed as its throttle) decides when it is sent
+        'enableRateLimit': exchange_config.ENABLE_RATE_LIMIT,
+    }
+
+    if exchange_config.USE_TESTNET:
+        exchange_params['options'] = {'defaultType': 'future'}
+        if hasattr(exchange_class, 'set_sandbox_mode'):
+            exchange_params['sandbox'] = True
+
+    exchange = exchange_class(exchange_params)
+
+    logger.info(
+        f"Connected to {exchange_config.EXCHANGE_NAME} "
+        f"({'testnet' if exchange_config.USE_TESTNET else 'live'})"
+    )
+
+    # The monitor and dispatcher threads share the sync instance with the bot loop
+    if not asynchronous and not streaming:
+        serialize_requests(exchange)
+
+    if scheduled:
+        scheduler = RequestScheduler.for_exchange(exchange, burst=exchange_config.SCHEDULER_BURST)
+        exchange = ScheduledExchange(exchange, scheduler)
+
+    return exchange
+
 
 class BTCSmartBot:
     """Main trading bot class"""
@@ -34,22 +110,112 @@ class BTCSmartBot:
     def __init__(
         self,
         config: TradingConfig = TradingConfig,
-        exchange_config: ExchangeConfig = ExchangeConfig
+        exchange_config: ExchangeConfig = ExchangeConfig,
+        exchange=None,
+        clock=None
     ):
+        """
+        Args:
+            config: Trading configuration
+            exchange_config: Exchange configuration
+            exchange: ccxt-compatible exchange to use instead of connecting
+                (e.g. sim_exchange.SimulatedExchange)
+            clock: Time source (default: SystemClock; a VirtualClock for replays)
+        """
         self.config = config
         self.exchange_config = exchange_config
+        self.clock = clock or SystemClock()
+
+        # Stage timers and API call counters (see metrics.py)
+        self.metrics = MetricsRegistry()
+        self.metrics.describe('stage_seconds', 'Duration of each stage of the bar analysis')
+        self.metrics.describe('bar_to_order_seconds', 'Delay from the start of a bar analysis to the order acknowledgment')
+        self.metrics.add_collector(self._gauges)
+        self.bar_started = None
 
         # Initialize components
-        self.exchange = self._initialize_exchange()
+        self.exchange = InstrumentedExchange(
+            exchange if exchange is not None else self._initialize_exchange(),
+            self.metrics
+        )
         self.risk_manager = RiskManager(config)
         self.position_tracker = PositionTracker()
         self.trailing_manager = TrailingStopManager(config, self.risk_manager)
+        self.breakeven_manager = None
+        if config.USE_BREAKEVEN:
+            self.breakeven_manager = BreakevenManager(config.BREAKEVEN_TRIGGER_PERCENT)
+
+        # Stop moves reach the exchange through the dispatcher (coalesced, debounced)
+        self.stop_orders: Dict[str, str] = {}
+        self.stop_dispatcher = StopUpdateDispatcher(
+            self._send_stop_update,
+            self._send_stop_updates if self._supports_batch_edit() else None,
+            config.STOP_UPDATE_MIN_DELTA_PERCENT,
+            config.STOP_UPDATE_MIN_INTERVAL,
+            clock=self.clock.monotonic
+        )
+        self.position_monitor = PositionMonitor(
+            self.position_tracker,
+            self.trailing_manager,
+            self.breakeven_manager,
+            on_stop_update=self.stop_dispatcher.submit,
+            clock=self.clock.monotonic
+        )
+        self.market_cache = MarketStateCache({
+            'ticker': config.TICKER_CACHE_TTL,
+            'balance': config.BALANCE_CACHE_TTL
+        }, clock=self.clock.monotonic)
+        self.candle_store = None
+        if config.USE_CANDLE_STORE:
+            self.candle_store = CandleStore(config.CANDLE_STORE_DIR, config.CANDLE_STORE_PRICE_DTYPE)
+
+        # Indicator state, seeded once and updated with new candles only
+        self.primary_indicators = StreamingIndicators(
+            config.FAST_EMA, config.SLOW_EMA, config.ATR_PERIOD
+        )
+        self.confirmation_indicators = StreamingIndicators(
+            config.FAST_EMA, config.SLOW_EMA, config.ATR_PERIOD
+        )
+
+        # Confirmation candles built from the primary ones, if enabled
+        self.timeframe_aggregator = None
+        if config.RESAMPLE_CONFIRMATION:
+            self.timeframe_aggregator = TimeframeAggregator(
+                config.PRIMARY_TIMEFRAME, [config.CONFIRMATION_TIMEFRAME]
+            )
+
+        # Opt-in spans of each loop iteration (see tracing.py)
+        self.tracer = None
+        if config.TRACE_MODE:
+            self.tracer = Tracer(
+                config.TRACE_FILE,
+                config.TRACE_MODE,
+                config.TRACE_SLOW_SECONDS,
+                config.TRACE_SAMPLE_RATE
+            )
+            self._instrument(self.tracer)
 
         # State
         self.is_running = False
         self.last_bar_time = None
         self.balance = 0.0
 
+        # Positions and stop state survive restarts through the journal
+        self.journal = None
+        if config.USE_STATE_JOURNAL:
+            directory = journal_directory(
+                config.STATE_JOURNAL_DIR,
+                getattr(self.exchange, 'id', None) or exchange_config.EXCHANGE_NAME,
+                config.SYMBOL,
+                config.DRY_RUN
+            )
+            self.journal = StateJournal(directory, config.JOURNAL_SNAPSHOT_EVERY, clock=self.clock.time)
+            self.restore_state(self.journal.load())
+            self.journal.start()
+            for component in (self.position_tracker, self.trailing_manager, self.breakeven_manager):
+                if component is not None:
+                    component.journal = self.journal
+
         logger.info("=== BTCUSD SmartBot v1.0 Initialized ===")
         logger.info(f"Mode: {'PAPER TRADING' if config.DRY_RUN else 'LIVE TRADING'}")
         logger.info(f"Symbol: {config.SYMBOL}")
@@ -58,27 +224,7 @@ class BTCSmartBot:
 
     def _initialize_exchange(self) -> ccxt.Exchange:
         """Initialize exchange connection"""
-        exchange_class = getattr(ccxt, self.exchange_config.EXCHANGE_NAME)
-
-        exchange_params = {
-            'apiKey': self.exchange_config.API_KEY,
-            'secret': self.exchange_config.API_SECRET,
-            'enableRateLimit': self.exchange_config.ENABLE_RATE_LIMIT,
-        }
-
-        if self.exchange_config.USE_TESTNET:
-            exchange_params['options'] = {'defaultType': 'future'}
-            if hasattr(exchange_class, 'set_sandbox_mode'):
-                exchange_params['sandbox'] = True
-
-        exchange = exchange_class(exchange_params)
-
-        logger.info(
-            f"Connected to {self.exchange_config.EXCHANGE_NAME} "
-            f"({'testnet' if self.exchange_config.USE_TESTNET else 'live'})"
-        )
-
-        return exchange
+        return create_exchange(self.exchange_config)
 
     def fetch_ohlcv(
         self,
@@ -86,7 +232,7 @@ class BTCSmartBot:
         limit: int = 100
     ) -> pd.DataFrame:
         """
-        Fetch OHLCV data from exchange
+        Fetch OHLCV data from exchange (through the candle store if enabled)
 
         Args:
             timeframe: Candle timeframe (e.g., '1h', '4h')
@@ -96,20 +242,22 @@ class BTCSmartBot:
             DataFrame with OHLCV data
         """
         try:
-            ohlcv = self.exchange.fetch_ohlcv(
-                self.config.SYMBOL,
-                timeframe=timeframe,
-                limit=limit
-            )
+            with self._stage(f'fetch_{timeframe}'):
+                if self.candle_store:
+                    return self.candle_store.fetch(
+                        self.exchange,
+                        self.config.SYMBOL,
+                        timeframe,
+                        limit
+                    )
 
-            df = pd.DataFrame(
-                ohlcv,
-                columns=['timestamp', 'open', 'high', 'low', 'close', 'volume']
-            )
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
+                ohlcv = self.exchange.fetch_ohlcv(
+                    self.config.SYMBOL,
+                    timeframe=timeframe,
+                    limit=limit
+                )
 
-            return df
+                return ohlcv_to_frame(ohlcv)
 
         except Exception as e:
             logger.error(f"Error fetching OHLCV data: {e}")
@@ -123,29 +271,74 @@ class BTCSmartBot:
             Tuple (bid, ask)
         """
         try:
-            ticker = self.exchange.fetch_ticker(self.config.SYMBOL)
-            bid = ticker.get('bid', 0)
-            ask = ticker.get('ask', 0)
-            return bid, ask
+            with self._stage('ticker'):
+                ticker = self.market_cache.get('ticker', self.exchange.fetch_ticker, self.config.SYMBOL)
+            return self._parse_ticker(ticker)
         except Exception as e:
             logger.error(f"Error fetching ticker: {e}")
             return 0.0, 0.0
 
+    def _ticker_age(self, ticker: dict) -> float:
+        """Seconds since the quote time of a ccxt ticker (0 if unknown)"""
+        timestamp = ticker.get('timestamp')
+        if not timestamp:
+            return 0.0
+        return max(self.clock.milliseconds() - timestamp, 0) / 1000.0
+
+    @staticmethod
+    def _parse_ticker(ticker: dict) -> Tuple[float, float]:
+        """Extract (bid, ask) from a ccxt ticker"""
+        bid = ticker.get('bid', 0)
+        ask = ticker.get('ask', 0)
+        return bid, ask
+
     def update_balance(self):
         """Update account balance"""
         try:
-            balance = self.exchange.fetch_balance()
-            # Get USD or USDT balance
-            for currency in ['USD', 'USDT', 'BUSD']:
-                if currency in balance['free']:
-                    self.balance = balance['free'][currency]
-                    logger.debug(f"Balance updated: ${self.balance:.2f}")
-                    return
-
-            logger.warning("Could not find USD balance")
+            with self._stage('balance'):
+                balance = self.market_cache.get('balance', self.exchange.fetch_balance)
+            self._apply_balance(balance)
         except Exception as e:
             logger.error(f"Error fetching balance: {e}")
 
+    def _apply_balance(self, balance: dict):
+        """Set self.balance from a ccxt balance structure"""
+        # Get USD or USDT balance
+        for currency in ['USD', 'USDT', 'BUSD']:
+            if currency in balance['free']:
+                self.balance = balance['free'][currency]
+                logger.debug(f"Balance updated: ${self.balance:.2f}")
+                return
+
+        logger.warning("Could not find USD balance")
+
+    def primary_history_limit(self) -> int:
+        """
+        Primary candles to fetch per analysis
+
+        Returns:
+            Candle count (enough to also build the confirmation candles when
+            they are resampled locally)
+        """
+        if self.timeframe_aggregator is None:
+            return 100
+
+        return max(100, self.timeframe_aggregator.source_candles_needed(
+            self.config.CONFIRMATION_TIMEFRAME, 50
+        ))
+
+    def update_primary_candles(self, df: pd.DataFrame):
+        """
+        Update indicators (and resampled confirmation candles) with new candles
+
+        Args:
+            df: Primary timeframe candles
+        """
+        with self._stage('indicators'):
+            self.primary_indicators.sync(df)
+            if self.timeframe_aggregator is not None:
+                self.timeframe_aggregator.sync(df)
+
     def is_new_bar(self, current_time: datetime) -> bool:
         """
         Check if a new candle has formed
@@ -173,15 +366,18 @@ class BTCSmartBot:
 
         return False
 
-    def check_trading_filters(self) -> bool:
+    def check_trading_filters(self, prices: Optional[Tuple[float, float]] = None) -> bool:
         """
         Check all trading filters (time, spread, volatility)
 
+        Args:
+            prices: (bid, ask) already fetched this iteration (fetched if None)
+
         Returns:
             True if all filters pass
         """
         # Check trading hours
-        current_hour = datetime.now(timezone.utc).hour
+        current_hour = self.clock.now().hour
         if not MarketAnalyzer.is_trading_hours(
             current_hour,
             self.config.START_HOUR,
@@ -191,7 +387,7 @@ class BTCSmartBot:
             return False
 
         # Check spread
-        bid, ask = self.get_current_price()
+        bid, ask = prices if prices is not None else self.get_current_price()
         if not MarketAnalyzer.check_spread(bid, ask, self.config.MAX_SPREAD_USD):
             spread = abs(ask - bid)
             logger.warning(f"Spread too high: ${spread:.2f}")
@@ -199,59 +395,57 @@ class BTCSmartBot:
 
         return True
 
-    def check_higher_timeframe_confirmation(self) -> bool:
+    def check_higher_timeframe_confirmation(self, df_h4: Optional[pd.DataFrame] = None) -> bool:
         """
         Check trend confirmation on higher timeframe (H4)
 
+        Args:
+            df_h4: H4 candles already fetched this iteration (if None, resampled
+                from the primary candles or fetched)
+
         Returns:
             True if higher timeframe confirms trend
         """
-        df_h4 = self.fetch_ohlcv(self.config.CONFIRMATION_TIMEFRAME, limit=50)
+        with self._stage('confirmation'):
+            if df_h4 is None:
+                if self.timeframe_aggregator is not None:
+                    df_h4 = self.timeframe_aggregator.frame(self.config.CONFIRMATION_TIMEFRAME, limit=50)
+                else:
+                    df_h4 = self.fetch_ohlcv(self.config.CONFIRMATION_TIMEFRAME, limit=50)
 
-        if df_h4.empty:
-            logger.warning("Could not fetch H4 data for confirmation")
-            return False
+            if df_h4.empty:
+                logger.warning("Could not fetch H4 data for confirmation")
+                return False
 
-        # Calculate EMAs on H4
-        df_h4 = TechnicalIndicators.add_all_indicators(
-            df_h4,
-            self.config.FAST_EMA,
-            self.config.SLOW_EMA,
-            self.config.ATR_PERIOD
-        )
+            # Update EMAs on H4 with the new candles
+            self.confirmation_indicators.sync(df_h4)
 
-        # Check trend alignment
-        trend = TechnicalIndicators.check_trend_alignment(
-            df_h4['ema_fast'],
-            df_h4['ema_slow']
-        )
+            # Check trend alignment
+            trend = self.confirmation_indicators.check_trend_alignment()
 
         logger.debug(f"H4 trend: {trend}")
 
         # Only trade in bullish H4 trend (can be modified for both directions)
         return trend == 'bullish'
 
-    def analyze_entry_signal(self, df: pd.DataFrame) -> Optional[str]:
+    def analyze_entry_signal(self, indicators: StreamingIndicators) -> Optional[str]:
         """
         Analyze entry signals based on EMA crossover
 
         Args:
-            df: DataFrame with indicators
+            indicators: Indicator state of the primary timeframe
 
         Returns:
             'buy', 'sell', or None
         """
-        if len(df) < 2:
+        if indicators.bar_count < 2:
             return None
 
         # Detect EMA crossover
-        bullish_cross, bearish_cross = TechnicalIndicators.detect_ema_crossover(
-            df['ema_fast'],
-            df['ema_slow']
-        )
+        bullish_cross, bearish_cross = indicators.detect_crossover()
 
         # Check ATR volatility
-        current_atr = df['atr'].iloc[-1]
+        current_atr = indicators.atr
         if not MarketAnalyzer.check_volatility(current_atr, self.config.MIN_ATR_USD):
             logger.debug(f"Volatility too low: ATR={current_atr:.2f}")
             return None
@@ -275,10 +469,43 @@ class BTCSmartBot:
             current_price: Current market price
             atr: Current ATR value
         """
+        trade = self._prepare_trade(signal, current_price, atr)
+        if trade is None:
+            return
+
+        # Execute order
+        if self.config.DRY_RUN:
+            logger.info("📝 PAPER TRADE - Order not sent to exchange")
+            position_id = f"{PAPER_POSITION_PREFIX}{int(self.clock.time())}"
+        else:
+            try:
+                with self._stage('order'):
+                    order = self._place_market_order(signal, trade['size'])
+                self._order_acknowledged()
+                position_id = str(order['id'])
+                logger.info(f"✅ Order executed: {position_id}")
+            except Exception as e:
+                logger.error(f"❌ Order execution failed: {e}")
+                return
+
+        self._record_trade(position_id, trade)
+
+    def _prepare_trade(self, signal: str, current_price: float, atr: float) -> Optional[dict]:
+        """
+        Size and validate a trade before sending it
+
+        Args:
+            signal: 'buy' or 'sell'
+            current_price: Current market price
+            atr: Current ATR value
+
+        Returns:
+            Trade dict (signal, entry, size, stop_loss, take_profit) or None if rejected
+        """
         # Check max positions
         if self.position_tracker.is_max_positions_reached(self.config.MAX_POSITIONS):
             logger.warning("Maximum positions reached, skipping trade")
-            return
+            return None
 
         # Calculate stops
         stop_loss, take_profit = TechnicalIndicators.calculate_dynamic_stops(
@@ -305,7 +532,7 @@ class BTCSmartBot:
 
         if not is_valid:
             logger.error(f"Trade validation failed: {message}")
-            return
+            return None
 
         # Calculate risk/reward
         rr_ratio = self.risk_manager.calculate_risk_reward_ratio(
@@ -322,29 +549,29 @@ class BTCSmartBot:
         logger.info(f"   Take Profit: ${take_profit:.2f}")
         logger.info(f"   Risk/Reward: {rr_ratio:.2f}:1")
 
-        # Execute order
-        if self.config.DRY_RUN:
-            logger.info("📝 PAPER TRADE - Order not sent to exchange")
-            position_id = f"paper_{int(time.time())}"
-        else:
-            try:
-                order = self._place_market_order(signal, position_size)
-                position_id = str(order['id'])
-                logger.info(f"✅ Order executed: {position_id}")
-            except Exception as e:
-                logger.error(f"❌ Order execution failed: {e}")
-                return
+        return {
+            'signal': signal,
+            'entry': current_price,
+            'size': position_size,
+            'stop_loss': stop_loss,
+            'take_profit': take_profit
+        }
+
+    def _record_trade(self, position_id: str, trade: dict):
+        """Track an executed trade"""
+        # Our own fill changed the balance
+        self.market_cache.invalidate('balance')
 
-        # Track position
         self.position_tracker.add_position(
             position_id,
             self.config.SYMBOL,
-            signal,
-            current_price,
-            position_size,
-            stop_loss,
-            take_profit
+            trade['signal'],
+            trade['entry'],
+            trade['size'],
+            trade['stop_loss'],
+            trade['take_profit']
         )
+        self.stop_dispatcher.track(position_id, trade['stop_loss'])
 
     def _place_market_order(self, side: str, amount: float) -> dict:
         """Place market order on exchange"""
@@ -354,36 +581,422 @@ class BTCSmartBot:
             amount
         )
 
-    def manage_open_positions(self):
-        """Manage open positions (trailing stops, monitoring)"""
-        positions = self.position_tracker.get_all_positions()
+    def _supports_batch_edit(self) -> bool:
+        """True if the exchange edits several orders in one call"""
+        return getattr(self.exchange, 'has', {}).get('editOrders') is True
 
-        if not positions:
-            return
+    def _stop_order_request(self, position_id: str, stop: float) -> Optional[dict]:
+        """
+        Stop market order protecting a position, as a ccxt order request
 
-        bid, ask = self.get_current_price()
-        current_price = (bid + ask) / 2
+        Args:
+            position_id: Position identifier
+            stop: Stop loss price
 
-        for pos_id, position in list(positions.items()):
-            # Calculate current P&L
-            pnl = self.position_tracker.calculate_position_pnl(pos_id, current_price)
+        Returns:
+            Dict (symbol, type, side, amount, price, params) or None if the
+            position is closed
+        """
+        position = self.position_tracker.get_position(position_id)
+        if position is None:
+            return None
+
+        return {
+            'symbol': position['symbol'],
+            'type': 'stop_market',
+            'side': 'sell' if position['type'] == 'buy' else 'buy',
+            'amount': position['size'],
+            'price': None,
+            'params': {'stopPrice': stop}
+        }
 
-            if pnl is not None:
-                pnl_pct = (pnl / (position['entry_price'] * position['size'])) * 100
-                logger.debug(
-                    f"Position {pos_id}: P&L ${pnl:.2f} ({pnl_pct:+.2f}%)"
+    def _send_stop_update(self, position_id: str, stop: float) -> bool:
+        """
+        Move the stop of a position on the exchange (dispatcher sender)
+
+        The stop order is created on the first move and edited afterwards.
+
+        Returns:
+            True if the exchange accepted the stop
+        """
+        if self.config.DRY_RUN:
+            logger.debug("📝 PAPER TRADE - Stop %.2f of %s not sent to exchange", stop, position_id)
+            return True
+
+        request = self._stop_order_request(position_id, stop)
+        if request is None:
+            return True
+
+        order_id = self.stop_orders.get(position_id)
+        if order_id is None:
+            order = self.exchange.create_order(
+                request['symbol'], request['type'], request['side'],
+                request['amount'], request['price'], request['params']
+            )
+            self._set_stop_order(position_id, str(order['id']))
+        else:
+            try:
+                self.exchange.edit_order(
+                    order_id, request['symbol'], request['type'], request['side'],
+                    request['amount'], request['price'], request['params']
                 )
+            except (ccxt.OrderNotFound, ccxt.InvalidOrder):
+                order = self.exchange.fetch_order(order_id, request['symbol'])
+                if self._stop_order_gone(position_id, order):
+                    return True
+                raise
+
+        logger.info("Stop loss updated on exchange: %s %.2f", position_id, stop)
+        return True
+
+    def _stop_order_gone(self, position_id: str, order: dict) -> bool:
+        """
+        Handle a stop order that can no longer be edited
+
+        Args:
+            position_id: Position identifier
+            order: Stop order as fetched from the exchange
+
+        Returns:
+            True if the stop triggered and the position is closed; a canceled
+            stop is forgotten so that the next update creates a new one
+        """
+        status = order.get('status')
+        if status in ('canceled', 'cancelled', 'expired', 'rejected'):
+            logger.warning(f"Stop order {order['id']} of {position_id} is {status}, recreating it")
+            self._set_stop_order(position_id, None)
+            return False
+
+        if status != 'closed':
+            return False
+
+        logger.info(f"🛑 Position {position_id} closed by its stop order {order['id']}")
+        self.stop_orders.pop(position_id, None)
+        self.stop_dispatcher.forget(position_id)
+        self.trailing_manager.reset_trailing(position_id)
+        if self.breakeven_manager is not None:
+            self.breakeven_manager.reset_breakeven(position_id)
+        self.position_tracker.remove_position(position_id)
+
+        # The fill changed the balance
+        self.market_cache.invalidate('balance')
+        return True
+
+    def _set_stop_order(self, position_id: str, order_id: Optional[str]):
+        """Remember (or forget, with None) the exchange stop order of a position"""
+        if order_id is None:
+            self.stop_orders.pop(position_id, None)
+        else:
+            self.stop_orders[position_id] = order_id
+
+        if self.journal is not None:
+            self.journal.record('stop_order', position_id, order_id=order_id)
+
+    def _reconcile_stop_order(self, position_id: str, order: dict):
+        """
+        Align a restored position with its stop order on the exchange
+
+        Args:
+            position_id: Position identifier
+            order: Stop order as fetched from the exchange
+        """
+        if self._stop_order_gone(position_id, order):
+            return
+
+        position = self.position_tracker.get_position(position_id)
+        if position is None:
+            return
+
+        if position_id not in self.stop_orders:
+            # Canceled: send the current stop again
+            self.stop_dispatcher.forget(position_id)
+            self.stop_dispatcher.submit(position_id, position['stop_loss'])
+        elif order.get('stopPrice') != position['stop_loss']:
+            # A stop move was not sent before the restart
+            self.stop_dispatcher.track(position_id, order.get('stopPrice') or 0.0)
+            self.stop_dispatcher.submit(position_id, position['stop_loss'])
+
+    def restore_state(self, state: dict):
+        """
+        Rebuild positions and stop state from the journal
+
+        Positions the current mode cannot have (paper positions in live
+        trading, exchange positions in paper trading) are skipped, so no
+        stop order is ever sent for a position that is not on the exchange.
+
+        Args:
+            state: State from StateJournal.load()
+        """
+        restored = {}
+        for position_id, position in state['positions'].items():
+            if position_id.startswith(PAPER_POSITION_PREFIX) != bool(self.config.DRY_RUN):
+                logger.warning(f"Journal position {position_id} does not belong to this trading mode, skipped")
+                continue
+            restored[position_id] = position
+
+        for position_id, position in restored.items():
+            self.position_tracker.add_position(
+                position_id,
+                position['symbol'],
+                position['type'],
+                position['entry_price'],
+                position['size'],
+                position['stop_loss'],
+                position['take_profit']
+            )
+            self.stop_dispatcher.track(position_id, position['stop_loss'])
+
+        for position_id in state['trailing'] & restored.keys():
+            self.trailing_manager.trailing_active[position_id] = True
+        if self.breakeven_manager is not None:
+            for position_id in state['breakeven'] & restored.keys():
+                self.breakeven_manager.breakeven_set[position_id] = True
+        self.stop_orders.update({
+            position_id: order_id
+            for position_id, order_id in state['stop_orders'].items()
+            if position_id in restored
+        })
+
+        if restored:
+            logger.info(f"♻️ Restored {len(restored)} open positions from the state journal")
+
+    def reconcile_positions(self):
+        """
+        Check restored positions against their stop orders on the exchange
+
+        Positions stopped out while the bot was down are closed, canceled
+        stops are recreated and stops moved but never sent are sent.
+        """
+        if self.config.DRY_RUN:
+            return
+
+        for position_id, order_id in list(self.stop_orders.items()):
+            try:
+                order = self.exchange.fetch_order(order_id, self.config.SYMBOL)
+                self._reconcile_stop_order(position_id, order)
+            except Exception as e:
+                logger.error(f"Error reconciling {position_id}: {e}")
+
+    def _send_stop_updates(self, updates: List[Tuple[str, float]]) -> Dict[str, bool]:
+        """
+        Move the stops of several positions, edits in one exchange call
+
+        A position whose stop fails does not fail the others.
+
+        Returns:
+            Dict position_id -> True if the exchange accepted its stop
+        """
+        results = {}
+        edits = []
+        edited = []
+        for position_id, stop in updates:
+            if self.config.DRY_RUN or position_id not in self.stop_orders:
+                results[position_id] = self._try_send_stop_update(position_id, stop)
+                continue
+
+            request = self._stop_order_request(position_id, stop)
+            if request is None:
+                results[position_id] = True
+                continue
+            request['id'] = self.stop_orders[position_id]
+            edits.append(request)
+            edited.append((position_id, stop))
+
+        if edits:
+            try:
+                self.exchange.edit_orders(edits)
+            except (ccxt.OrderNotFound, ccxt.InvalidOrder):
+                # Some stop can no longer be edited: sort them out one by one
+                for position_id, stop in edited:
+                    results[position_id] = self._try_send_stop_update(position_id, stop)
+                return results
+            except Exception as e:
+                logger.error("Error updating %d stops on exchange: %s", len(edits), e)
+                results.update((position_id, False) for position_id, _ in edited)
+                return results
+
+            results.update((position_id, True) for position_id, _ in edited)
+            logger.info(f"{len(edits)} stop losses updated on exchange in one call")
+
+        return results
+
+    def _try_send_stop_update(self, position_id: str, stop: float) -> bool:
+        """_send_stop_update reporting an error as a failure of this position only"""
+        try:
+            return bool(self._send_stop_update(position_id, stop))
+        except Exception as e:
+            logger.error("Error updating stop of %s on exchange: %s", position_id, e)
+            return False
+
+    def manage_open_positions(self, current_price: Optional[float] = None):
+        """
+        Manage open positions (trailing stops, monitoring)
+
+        Args:
+            current_price: Mid price already fetched this iteration (fetched if None)
+        """
+        tracker = self.position_tracker
+
+        if tracker.get_position_count() == 0:
+            return
 
-                # Update trailing stop
-                if self.config.USE_TRAILING:
-                    self.trailing_manager.update_position_stop(
-                        pos_id,
-                        position['entry_price'],
-                        current_price,
-                        position['stop_loss'],
-                        position['type']
+        if current_price is None:
+            bid, ask = self.get_current_price()
+            current_price = (bid + ask) / 2
+
+        with self._stage('positions'), tracker.lock:
+            # Calculate current P&L of all positions at once
+            book = tracker.calculate_all_pnl(current_price)
+            ids = book['ids']
+            rows = np.flatnonzero(~np.isnan(book['pnl']))
+
+            if logger.isEnabledFor(logging.DEBUG):
+                for row in rows:
+                    logger.debug(
+                        f"Position {ids[row]}: P&L ${book['pnl'][row]:.2f} ({book['pnl_pct'][row]:+.2f}%)"
                     )
 
+            # Update breakeven and trailing stops of all positions in one pass
+            updates = self.position_monitor.evaluate(current_price)
+
+        for position_id, new_stop in updates:
+            self.stop_dispatcher.submit(position_id, new_stop)
+
+    def analyze_new_bar(self) -> Optional[str]:
+        """
+        Analyze a new bar and act on it
+
+        Returns:
+            Signal acted on ('buy', 'sell') or None
+        """
+        self._start_bar()
+
+        # Check trading filters
+        if not self.check_trading_filters():
+            return None
+
+        # Fetch primary timeframe data
+        df = self.fetch_ohlcv(self.config.PRIMARY_TIMEFRAME, limit=self.primary_history_limit())
+
+        if df.empty:
+            logger.warning("No data available")
+            return None
+
+        # Update indicators with the new candles
+        self.update_primary_candles(df)
+
+        # Check higher timeframe confirmation
+        if not self.check_higher_timeframe_confirmation():
+            logger.debug("No H4 confirmation")
+            return None
+
+        # Manage existing positions
+        self.manage_open_positions()
+
+        # Check for entry signals
+        signal = self.analyze_entry_signal(self.primary_indicators)
+
+        if signal:
+            bid, ask = self.get_current_price()
+            entry_price = ask if signal == 'buy' else bid
+            current_atr = self.primary_indicators.atr
+
+            self.execute_trade(signal, entry_price, current_atr)
+
+        return signal
+
+    def monitor_price(self) -> Tuple[float, float]:
+        """
+        Mid price for the position monitor
+
+        The ticker is always requested (a cached one could be up to
+        TICKER_CACHE_TTL old) and its response refreshes the cache. Not
+        timed as a stage of the bar analysis.
+
+        Returns:
+            Tuple (mid price or 0 when unavailable, age of the ticker in seconds)
+        """
+        try:
+            ticker = self.market_cache.get(
+                'ticker', self.exchange.fetch_ticker, self.config.SYMBOL, refresh=True
+            )
+        except Exception as e:
+            logger.error(f"Error fetching ticker: {e}")
+            return 0.0, 0.0
+
+        bid, ask = self._parse_ticker(ticker)
+        if not bid or not ask:
+            return 0.0, 0.0
+        return (bid + ask) / 2, self._ticker_age(ticker)
+
+    def _instrument(self, tracer: Tracer):
+        """Trace the indicator, risk and stop management calls"""
+        for indicators in (self.primary_indicators, self.confirmation_indicators):
+            tracer.instrument(indicators, 'sync', 'update', 'detect_crossover', 'check_trend_alignment')
+        tracer.instrument(
+            self.risk_manager,
+            'calculate_position_size', 'validate_trade', 'calculate_risk_reward_ratio'
+        )
+        tracer.instrument(self.position_tracker, 'calculate_all_pnl')
+        tracer.instrument(self.trailing_manager, 'update_stops_batch')
+        if self.breakeven_manager is not None:
+            tracer.instrument(self.breakeven_manager, 'check_batch')
+        tracer.instrument(self.position_monitor, 'evaluate')
+        tracer.instrument(self, 'check_trading_filters', 'analyze_entry_signal', '_prepare_trade')
+
+    def _iteration(self):
+        """Root span of a loop iteration (does nothing without tracing)"""
+        if self.tracer is None:
+            return nullcontext()
+        return self.tracer.iteration()
+
+    def _stage(self, name: str):
+        """Timer (stage_seconds summary) and span of a bar analysis stage"""
+        timer = self.metrics.timer('stage_seconds', stage=name)
+        if self.tracer is None:
+            return timer
+        return self.tracer.span(name, timer=timer)
+
+    def _start_bar(self):
+        """Count a bar analysis and start its signal-to-order clock"""
+        self.metrics.inc('bars_total')
+        self.bar_started = self.metrics.clock()
+
+    def _order_acknowledged(self):
+        """Record the delay from the start of the bar analysis to an order fill"""
+        self.metrics.inc('orders_total')
+        if self.bar_started is not None:
+            self.metrics.observe('bar_to_order_seconds', self.metrics.clock() - self.bar_started)
+
+    def _gauges(self) -> Dict[str, float]:
+        """Current state for the metrics (collector)"""
+        monitor = self.position_monitor.stats()
+        return {
+            'open_positions': self.position_tracker.get_position_count(),
+            'balance': self.balance,
+            'monitor_max_latency_seconds': monitor['max_latency'],
+            'monitor_skipped': monitor['skipped'],
+            'stop_updates_pending': self.stop_dispatcher.stats()['pending']
+        }
+
+    def start_metrics(self):
+        """Serve the metrics on the configured local port, if any"""
+        if self.config.METRICS_PORT is None:
+            return
+        try:
+            self.metrics.serve(self.config.METRICS_PORT)
+        except OSError as e:
+            logger.error(f"Could not start metrics endpoint: {e}")
+
+    def publish_metrics(self):
+        """Write the metrics to the configured file, if any"""
+        if self.config.METRICS_FILE is None:
+            return
+        try:
+            self.metrics.dump(self.config.METRICS_FILE)
+        except OSError as e:
+            logger.error(f"Could not write metrics file: {e}")
+
     def run(self, iterations: Optional[int] = None):
         """
         Main bot loop
@@ -396,6 +1009,16 @@ class BTCSmartBot:
 
         logger.info("🚀 Bot started!")
 
+        self.reconcile_positions()
+        self.start_metrics()
+        if self.tracer is not None:
+            self.tracer.start()
+
+        # Manage stops on every price update, not only on new bars
+        self.stop_dispatcher.start()
+        if self.config.USE_POSITION_MONITOR:
+            self.position_monitor.start(self.monitor_price, self.config.MONITOR_POLL_SECONDS)
+
         try:
             while self.is_running:
                 iteration += 1
@@ -404,58 +1027,23 @@ class BTCSmartBot:
                     logger.info("Maximum iterations reached")
                     break
 
-                # Update balance
-                self.update_balance()
-
-                # Check if new bar
-                if not self.is_new_bar(datetime.now(timezone.utc)):
-                    time.sleep(10)
-                    continue
-
-                logger.info(f"📊 New bar detected - Analyzing...")
-
-                # Check trading filters
-                if not self.check_trading_filters():
-                    time.sleep(10)
-                    continue
-
-                # Fetch primary timeframe data
-                df = self.fetch_ohlcv(self.config.PRIMARY_TIMEFRAME, limit=100)
-
-                if df.empty:
-                    logger.warning("No data available")
-                    time.sleep(10)
-                    continue
-
-                # Add indicators
-                df = TechnicalIndicators.add_all_indicators(
-                    df,
-                    self.config.FAST_EMA,
-                    self.config.SLOW_EMA,
-                    self.config.ATR_PERIOD
-                )
-
-                # Check higher timeframe confirmation
-                if not self.check_higher_timeframe_confirmation():
-                    logger.debug("No H4 confirmation")
-                    time.sleep(10)
-                    continue
-
-                # Manage existing positions
-                self.manage_open_positions()
+                with self._iteration():
+                    # Update balance
+                    self.update_balance()
 
-                # Check for entry signals
-                signal = self.analyze_entry_signal(df)
+                    # Check if new bar
+                    new_bar = self.is_new_bar(self.clock.now())
+                    if new_bar:
+                        logger.info(f"📊 New bar detected - Analyzing...")
 
-                if signal:
-                    bid, ask = self.get_current_price()
-                    entry_price = ask if signal == 'buy' else bid
-                    current_atr = df['atr'].iloc[-1]
+                        with self._stage('bar'):
+                            self.analyze_new_bar()
 
-                    self.execute_trade(signal, entry_price, current_atr)
+                if new_bar:
+                    self.publish_metrics()
 
                 # Sleep before next iteration
-                time.sleep(10)
+                self.clock.sleep(10)
 
         except KeyboardInterrupt:
             logger.info("🛑 Bot stopped by user")
@@ -463,6 +1051,14 @@ class BTCSmartBot:
             logger.error(f"❌ Bot error: {e}", exc_info=True)
         finally:
             self.is_running = False
+            self.position_monitor.stop()
+            self.stop_dispatcher.stop()
+            if self.journal is not None:
+                self.journal.close()
+            if self.tracer is not None:
+                self.tracer.close()
+            self.publish_metrics()
+            self.metrics.close()
             logger.info("Bot shutdown complete")
 
     def stop(self):
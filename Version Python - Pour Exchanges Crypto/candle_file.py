@@ -0,0 +1,258 @@
+"""
+Columnar Candle File for BTCUSD SmartBot
+Compact binary OHLCV storage opened as memory-mapped NumPy arrays
+
+Layout of a candle file (a directory):
+    meta.json       {"version": 1, "price_dtype": "float64" | "float32"}
+    timestamp.bin   int64 open times in milliseconds, little endian
+    open.bin ... volume.bin   prices/volume in price_dtype, little endian
+
+Columns are raw arrays with no header, so opening is a plain mmap with no
+parsing or copying. The candle count is derived from the file sizes, which
+makes appends safe: an interrupted append only leaves a partial tail that
+is ignored (and trimmed by the next append).
+"""
+
+import json
+import os
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+_TIMESTAMP_DTYPE = np.dtype('<i8')
+_PRICE_DTYPES = {
+    'float64': np.dtype('<f8'),
+    'float32': np.dtype('<f4'),
+}
+
+
+class CandleArrays:
+    """OHLCV columns as NumPy arrays (memory-mapped when read from a file)"""
+
+    __slots__ = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(
+        self,
+        timestamp: np.ndarray,
+        open: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray
+    ):
+        self.timestamp = timestamp
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def __getitem__(self, item: slice) -> 'CandleArrays':
+        """Slice all columns (views, no copy)"""
+        return CandleArrays(*(getattr(self, name)[item] for name in self.__slots__))
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[float]], price_dtype: str = 'float64') -> 'CandleArrays':
+        """
+        Build arrays from raw ccxt OHLCV rows
+
+        Args:
+            rows: Lists of [timestamp_ms, open, high, low, close, volume]
+            price_dtype: 'float64' or 'float32'
+
+        Returns:
+            CandleArrays
+        """
+        data = np.asarray(rows, dtype=np.float64).reshape(-1, 6)
+        dtype = _PRICE_DTYPES[price_dtype]
+        return cls(
+            np.asarray([row[0] for row in rows], dtype=_TIMESTAMP_DTYPE),
+            *(data[:, i].astype(dtype) for i in range(1, 6))
+        )
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, price_dtype: str = 'float64') -> 'CandleArrays':
+        """
+        Build arrays from a DataFrame indexed by timestamp
+
+        Args:
+            df: DataFrame with OHLCV data
+            price_dtype: 'float64' or 'float32'
+
+        Returns:
+            CandleArrays
+        """
+        dtype = _PRICE_DTYPES[price_dtype]
+        timestamp = df.index.values.astype('datetime64[ms]').astype(_TIMESTAMP_DTYPE)
+        return cls(timestamp, *(df[name].to_numpy(dtype=dtype) for name in PRICE_COLUMNS))
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        View the arrays as a DataFrame in the bot format
+
+        Price columns are wrapped without copying, so indicators and the
+        backtest engine read straight from the mapped pages.
+
+        Returns:
+            DataFrame indexed by timestamp
+        """
+        index = pd.DatetimeIndex(self.timestamp.view('datetime64[ms]'), name='timestamp')
+        return pd.DataFrame(
+            {name: getattr(self, name) for name in PRICE_COLUMNS},
+            index=index,
+            copy=False
+        )
+
+
+class CandleFile:
+    """Reads and writes one columnar candle file"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Candle file directory
+        """
+        self.path = path
+
+    def exists(self) -> bool:
+        """Check if the file has been created"""
+        return os.path.exists(os.path.join(self.path, 'meta.json'))
+
+    @property
+    def price_dtype(self) -> str:
+        """Price column dtype name"""
+        with open(os.path.join(self.path, 'meta.json')) as f:
+            return json.load(f)['price_dtype']
+
+    def _column_path(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.bin")
+
+    def _dtypes(self) -> dict:
+        price = _PRICE_DTYPES[self.price_dtype]
+        return {'timestamp': _TIMESTAMP_DTYPE, **{name: price for name in PRICE_COLUMNS}}
+
+    def __len__(self) -> int:
+        if not self.exists():
+            return 0
+
+        return min(
+            os.path.getsize(self._column_path(name)) // dtype.itemsize
+            for name, dtype in self._dtypes().items()
+        )
+
+    def create(self, price_dtype: str = 'float64'):
+        """
+        Create an empty candle file (truncates an existing one)
+
+        Args:
+            price_dtype: 'float64' or 'float32'
+        """
+        if price_dtype not in _PRICE_DTYPES:
+            raise ValueError(f"Unsupported price dtype: {price_dtype}")
+
+        os.makedirs(self.path, exist_ok=True)
+        for name in ['timestamp'] + PRICE_COLUMNS:
+            open(self._column_path(name), 'wb').close()
+
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump({'version': 1, 'price_dtype': price_dtype}, f)
+
+    def write(self, candles: CandleArrays, price_dtype: Optional[str] = None):
+        """
+        Replace the file content
+
+        Args:
+            candles: Candles sorted by timestamp
+            price_dtype: 'float64' or 'float32' (default: keep the file's, else float64)
+        """
+        if price_dtype is None:
+            price_dtype = self.price_dtype if self.exists() else 'float64'
+
+        # Build the new columns aside and rename them over the old ones, so
+        # arrays still mapping the old file stay valid
+        staging = CandleFile(self.path + '.tmp')
+        staging.create(price_dtype)
+        staging.append(candles)
+
+        os.makedirs(self.path, exist_ok=True)
+        for name in ['timestamp'] + PRICE_COLUMNS:
+            os.replace(staging._column_path(name), self._column_path(name))
+        os.replace(os.path.join(staging.path, 'meta.json'), os.path.join(self.path, 'meta.json'))
+        os.rmdir(staging.path)
+
+    def append(self, candles: CandleArrays):
+        """
+        Append candles at the end of the file
+
+        Args:
+            candles: Candles sorted by timestamp, all newer than the stored ones
+        """
+        if not self.exists():
+            self.create()
+
+        dtypes = self._dtypes()
+        count = len(self)
+
+        # Price columns first, timestamps last, so a torn append never
+        # exposes timestamps without prices
+        for name in PRICE_COLUMNS + ['timestamp']:
+            dtype = dtypes[name]
+            with open(self._column_path(name), 'r+b') as f:
+                f.truncate(count * dtype.itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(np.ascontiguousarray(getattr(candles, name), dtype=dtype).tobytes())
+
+    def open(self) -> CandleArrays:
+        """
+        Map the file as read-only NumPy arrays
+
+        Returns:
+            CandleArrays backed by np.memmap (plain empty arrays if the file is empty)
+        """
+        if not self.exists():
+            return CandleArrays.from_rows([])
+
+        count = len(self)
+        columns = []
+
+        for name, dtype in self._dtypes().items():
+            if count == 0:
+                columns.append(np.empty(0, dtype=dtype))
+            else:
+                columns.append(np.memmap(self._column_path(name), dtype=dtype, mode='r', shape=(count,)))
+
+        return CandleArrays(*columns)
+
+    def last_timestamp(self) -> Optional[int]:
+        """
+        Open time of the last candle
+
+        Returns:
+            Timestamp in milliseconds, or None if the file is empty
+        """
+        count = len(self)
+        if count == 0:
+            return None
+
+        with open(self._column_path('timestamp'), 'rb') as f:
+            f.seek((count - 1) * _TIMESTAMP_DTYPE.itemsize)
+            return int(np.frombuffer(f.read(_TIMESTAMP_DTYPE.itemsize), dtype=_TIMESTAMP_DTYPE)[0])
+
+
+def read_candles(path: str) -> pd.DataFrame:
+    """
+    Open a candle file as a DataFrame for the indicator and backtest code
+
+    Args:
+        path: Candle file directory
+
+    Returns:
+        DataFrame with OHLCV data indexed by timestamp
+    """
+    return CandleFile(path).open().to_frame()
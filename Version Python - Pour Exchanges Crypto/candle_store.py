@@ -0,0 +1,285 @@
+"""
+Candle Store for BTCUSD SmartBot
+Persistent local OHLCV history with incremental top-up from the exchange
+"""
+
+import logging
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from candle_file import CandleArrays, CandleFile
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+_TIMEFRAME_UNITS_MS = {
+    's': 1000,
+    'm': 60 * 1000,
+    'h': 60 * 60 * 1000,
+    'd': 24 * 60 * 60 * 1000,
+    'w': 7 * 24 * 60 * 60 * 1000,
+}
+
+
+def timeframe_to_ms(timeframe: str) -> int:
+    """
+    Convert a ccxt timeframe string to milliseconds
+
+    Args:
+        timeframe: Timeframe such as '1m', '15m', '1h', '4h', '1d'
+
+    Returns:
+        Candle duration in milliseconds
+    """
+    match = re.fullmatch(r'(\d+)([smhdw])', timeframe)
+    if not match:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+
+    return int(match.group(1)) * _TIMEFRAME_UNITS_MS[match.group(2)]
+
+
+def ohlcv_to_frame(rows: List[list]) -> pd.DataFrame:
+    """
+    Convert raw ccxt OHLCV rows to the bot DataFrame format
+
+    Args:
+        rows: Lists of [timestamp_ms, open, high, low, close, volume]
+
+    Returns:
+        DataFrame indexed by timestamp
+    """
+    df = pd.DataFrame(rows, columns=OHLCV_COLUMNS)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    df.set_index('timestamp', inplace=True)
+    return df
+
+
+class CandleStore:
+    """
+    Local candle history keyed by exchange, symbol and timeframe
+
+    Only closed candles are persisted. The still-forming candle returned by
+    the exchange is served to the caller but fetched again on the next call.
+    Series are columnar candle files (see candle_file.py) mapped in memory.
+    """
+
+    def __init__(self, base_dir: str = 'data/candles', price_dtype: str = 'float64'):
+        """
+        Args:
+            base_dir: Directory holding the candle files
+            price_dtype: Price storage type for new series ('float64' or 'float32')
+        """
+        self.base_dir = base_dir
+        self.price_dtype = price_dtype
+        self._cache: Dict[Tuple[str, str, str], pd.DataFrame] = {}
+
+    def _path(self, exchange_id: str, symbol: str, timeframe: str) -> str:
+        """Candle file path for a series"""
+        safe_symbol = re.sub(r'[^A-Za-z0-9]+', '-', symbol).strip('-')
+        return os.path.join(self.base_dir, exchange_id, safe_symbol, f"{timeframe}.candles")
+
+    def _file(self, exchange_id: str, symbol: str, timeframe: str) -> CandleFile:
+        """Candle file of a series"""
+        return CandleFile(self._path(exchange_id, symbol, timeframe))
+
+    def open(self, exchange_id: str, symbol: str, timeframe: str) -> CandleArrays:
+        """
+        Map the stored candles of a series as NumPy arrays
+
+        Args:
+            exchange_id: ccxt exchange id (e.g. 'binance')
+            symbol: Trading pair
+            timeframe: Candle timeframe
+
+        Returns:
+            Memory-mapped CandleArrays (empty if none stored)
+        """
+        return self._file(exchange_id, symbol, timeframe).open()
+
+    def load(self, exchange_id: str, symbol: str, timeframe: str) -> pd.DataFrame:
+        """
+        Load the stored candles of a series
+
+        Args:
+            exchange_id: ccxt exchange id (e.g. 'binance')
+            symbol: Trading pair
+            timeframe: Candle timeframe
+
+        Returns:
+            DataFrame with OHLCV data indexed by timestamp (empty if none stored)
+        """
+        key = (exchange_id, symbol, timeframe)
+        if key not in self._cache:
+            self._cache[key] = self.open(*key).to_frame()
+
+        return self._cache[key]
+
+    def last_timestamp(self, exchange_id: str, symbol: str, timeframe: str) -> Optional[int]:
+        """
+        Open time of the last stored candle
+
+        Returns:
+            Timestamp in milliseconds, or None if nothing is stored
+        """
+        df = self.load(exchange_id, symbol, timeframe)
+        if df.empty:
+            return None
+
+        return int(df.index[-1].value // 1_000_000)
+
+    def append(self, exchange_id: str, symbol: str, timeframe: str, rows: List[list]) -> int:
+        """
+        Persist closed candles newer than the last stored one
+
+        Args:
+            exchange_id: ccxt exchange id
+            symbol: Trading pair
+            timeframe: Candle timeframe
+            rows: Raw OHLCV rows sorted by timestamp
+
+        Returns:
+            Number of candles written
+        """
+        last = self.last_timestamp(exchange_id, symbol, timeframe)
+        if last is not None:
+            rows = [row for row in rows if row[0] > last]
+
+        if not rows:
+            return 0
+
+        candle_file = self._file(exchange_id, symbol, timeframe)
+        if not candle_file.exists():
+            candle_file.create(self.price_dtype)
+        candle_file.append(CandleArrays.from_rows(rows, candle_file.price_dtype))
+
+        self._cache.pop((exchange_id, symbol, timeframe), None)
+
+        return len(rows)
+
+    def merge(self, exchange_id: str, symbol: str, timeframe: str, rows: List[list]) -> int:
+        """
+        Persist closed candles anywhere in the series (rewrites the file)
+
+        Use append for the common case of newer candles only.
+
+        Args:
+            exchange_id: ccxt exchange id
+            symbol: Trading pair
+            timeframe: Candle timeframe
+            rows: Raw OHLCV rows
+
+        Returns:
+            Number of candles added
+        """
+        key = (exchange_id, symbol, timeframe)
+        stored = self.load(*key)
+        new = ohlcv_to_frame(rows)
+        new = new[~new.index.isin(stored.index)]
+
+        if new.empty:
+            return 0
+
+        df = pd.concat([stored, new]).sort_index()
+        df = df[~df.index.duplicated(keep='first')]
+
+        candle_file = self._file(*key)
+        price_dtype = candle_file.price_dtype if candle_file.exists() else self.price_dtype
+        candles = CandleArrays.from_frame(df, price_dtype)
+
+        # Drop the mapping of the old file before rewriting it
+        self._cache.pop(key, None)
+        del stored, df
+        candle_file.write(candles, price_dtype)
+
+        return len(new)
+
+    def fetch(self, exchange, symbol: str, timeframe: str, limit: int = 100) -> pd.DataFrame:
+        """
+        Get the latest candles, downloading only what is not stored yet
+
+        Args:
+            exchange: ccxt exchange instance
+            symbol: Trading pair
+            timeframe: Candle timeframe
+            limit: Number of candles to return
+
+        Returns:
+            DataFrame with the last `limit` candles (the last one may still be forming)
+        """
+        steps = self._fetch_steps(exchange.id, exchange.milliseconds(), symbol, timeframe, limit)
+        try:
+            request = next(steps)
+            while True:
+                request = steps.send(exchange.fetch_ohlcv(symbol, timeframe=timeframe, **request))
+        except StopIteration as done:
+            return done.value
+
+    async def fetch_async(self, exchange, symbol: str, timeframe: str, limit: int = 100) -> pd.DataFrame:
+        """
+        Same as fetch for a ccxt.async_support exchange
+
+        Args:
+            exchange: ccxt async exchange instance
+            symbol: Trading pair
+            timeframe: Candle timeframe
+            limit: Number of candles to return
+
+        Returns:
+            DataFrame with the last `limit` candles (the last one may still be forming)
+        """
+        steps = self._fetch_steps(exchange.id, exchange.milliseconds(), symbol, timeframe, limit)
+        try:
+            request = next(steps)
+            while True:
+                request = steps.send(await exchange.fetch_ohlcv(symbol, timeframe=timeframe, **request))
+        except StopIteration as done:
+            return done.value
+
+    def _fetch_steps(self, exchange_id: str, now: int, symbol: str, timeframe: str, limit: int):
+        """
+        Top-up logic shared by fetch and fetch_async
+
+        Generator yielding fetch_ohlcv keyword arguments and receiving the
+        rows; its return value is the resulting DataFrame.
+        """
+        tf_ms = timeframe_to_ms(timeframe)
+        last = self.last_timestamp(exchange_id, symbol, timeframe)
+
+        stored_count = len(self.load(exchange_id, symbol, timeframe))
+
+        if last is None or stored_count < limit:
+            # Not enough history yet: fetch the latest `limit` candles once
+            rows = yield {'limit': limit}
+            if last is not None:
+                self.merge(exchange_id, symbol, timeframe, [row for row in rows if row[0] + tf_ms <= now])
+        else:
+            rows = []
+            since = last + tf_ms
+            while since + tf_ms <= now:
+                page = yield {'since': since}
+                if not page or page[-1][0] < since:
+                    break
+                rows.extend(page)
+                since = page[-1][0] + tf_ms
+
+            # Forming candle
+            if since <= now and (not rows or rows[-1][0] + tf_ms <= now):
+                rows.extend((yield {'since': since, 'limit': 1}))
+
+        closed = [row for row in rows if row[0] + tf_ms <= now]
+        forming = [row for row in rows if row[0] + tf_ms > now]
+
+        written = self.append(exchange_id, symbol, timeframe, closed)
+        logger.debug(
+            f"{symbol} {timeframe}: {len(rows)} candles fetched, {written} stored"
+        )
+
+        df = self.load(exchange_id, symbol, timeframe)
+        if forming:
+            df = pd.concat([df, ohlcv_to_frame(forming[-1:])])
+
+        return df.iloc[-limit:]
@@ -0,0 +1,91 @@
+"""
+Clocks for BTCUSD SmartBot
+Wall clock for live trading, virtual clock for simulation and replays
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+
+
+class SystemClock:
+    """Wall clock time"""
+
+    def time(self) -> float:
+        """Current time in seconds since the epoch"""
+        return time.time()
+
+    def milliseconds(self) -> int:
+        """Current time in milliseconds since the epoch"""
+        return int(time.time() * 1000)
+
+    def monotonic(self) -> float:
+        """Monotonic seconds, for measuring intervals"""
+        return time.monotonic()
+
+    def now(self) -> datetime:
+        """Current UTC datetime"""
+        return datetime.now(timezone.utc)
+
+    def sleep(self, seconds: float):
+        """Block for a number of seconds"""
+        time.sleep(seconds)
+
+    async def sleep_async(self, seconds: float):
+        """Wait for a number of seconds without blocking the event loop"""
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    Simulated time that only moves forward when advanced
+
+    Sleeping advances the clock and returns at once, so a bot loop sleeping
+    10 s per iteration runs as fast as the CPU allows. Concurrent sleeps of
+    several asyncio tasks add up rather than overlap.
+    """
+
+    def __init__(self, start_ms: int):
+        """
+        Args:
+            start_ms: Start time in milliseconds since the epoch
+        """
+        self._now_ms = float(start_ms)
+        self._lock = threading.Lock()
+
+    def time(self) -> float:
+        """Current time in seconds since the epoch"""
+        return self._now_ms / 1000.0
+
+    def milliseconds(self) -> int:
+        """Current time in milliseconds since the epoch"""
+        return int(self._now_ms)
+
+    def monotonic(self) -> float:
+        """Monotonic seconds, for measuring intervals"""
+        return self._now_ms / 1000.0
+
+    def now(self) -> datetime:
+        """Current UTC datetime"""
+        return datetime.fromtimestamp(self._now_ms / 1000.0, tz=timezone.utc)
+
+    def advance(self, seconds: float):
+        """Move the clock forward"""
+        if seconds > 0:
+            with self._lock:
+                self._now_ms += seconds * 1000.0
+
+    def advance_to(self, timestamp_ms: float):
+        """Move the clock forward to a time (never backwards)"""
+        with self._lock:
+            self._now_ms = max(self._now_ms, float(timestamp_ms))
+
+    def sleep(self, seconds: float):
+        """Advance the clock by a number of seconds"""
+        self.advance(seconds)
+
+    async def sleep_async(self, seconds: float):
+        """Advance the clock and let other tasks run"""
+        self.advance(seconds)
+        await asyncio.sleep(0)
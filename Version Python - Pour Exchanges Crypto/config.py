@@ -30,9 +30,46 @@ class TradingConfig:
     TRAIL_START_PERCENT = 1.0        # % profit to activate trailing
     TRAIL_STEP_PERCENT = 0.5         # % trailing step
 
+    # Breakeven
+    USE_BREAKEVEN = False            # Move stop to entry + commissions once in profit (not backtested)
+    BREAKEVEN_TRIGGER_PERCENT = 0.5  # % profit to move stop to breakeven
+
+    # Position Monitor
+    USE_POSITION_MONITOR = True      # Manage stops on every price update (own thread/task)
+    MONITOR_POLL_SECONDS = 1.0       # Price poll interval when no stream pushes prices
+
+    # Stop Updates
+    STOP_UPDATE_MIN_DELTA_PERCENT = 0.05  # Smallest stop move sent to the exchange (% of the stop)
+    STOP_UPDATE_MIN_INTERVAL = 5.0   # Seconds between two stop updates of a position
+
+    # State Journal
+    USE_STATE_JOURNAL = True         # Keep positions and stop state across restarts
+    STATE_JOURNAL_DIR = 'data/journal'  # Base directory (one journal per exchange, symbol and mode)
+    JOURNAL_SNAPSHOT_EVERY = 1000    # Journal records between two snapshots
+
+    # Metrics
+    METRICS_PORT = None              # Local port of the Prometheus endpoint /metrics, e.g. 9108 (None disables)
+    METRICS_FILE = None              # File rewritten with the metrics after each bar (None disables)
+
+    # Tracing
+    TRACE_MODE = None                # None (off), 'sample' (slow iterations only) or 'full' (all, with allocations)
+    TRACE_FILE = 'data/trace.json'   # Chrome trace-event file (chrome://tracing, ui.perfetto.dev)
+    TRACE_SLOW_SECONDS = 1.0         # Iterations at least this long are always traced ('sample')
+    TRACE_SAMPLE_RATE = 0.001        # Share of the other iterations traced ('sample')
+
     # Timeframes
     PRIMARY_TIMEFRAME = '1h'         # Primary trading timeframe
     CONFIRMATION_TIMEFRAME = '4h'    # Higher timeframe for confirmation
+    RESAMPLE_CONFIRMATION = True     # Build confirmation candles from primary ones (no extra fetch)
+
+    # Candle Storage
+    USE_CANDLE_STORE = True          # Keep candles on disk, fetch only new ones
+    CANDLE_STORE_DIR = 'data/candles'  # Candle store directory
+    CANDLE_STORE_PRICE_DTYPE = 'float64'  # 'float32' halves file size
+
+    # Market Data Cache
+    TICKER_CACHE_TTL = 2.0           # Seconds a ticker is reused in a bar (monitor polls refresh it)
+    BALANCE_CACHE_TTL = 300.0        # Seconds a balance is reused (refreshed after our fills)
 
     # Exchange Settings
     SYMBOL = 'BTC/USD'               # Trading pair
@@ -43,6 +80,13 @@ class TradingConfig:
     MAGIC_NUMBER = 202511            # Unique identifier for bot trades
     DRY_RUN = True                   # Paper trading mode (set False for live)
     LOG_LEVEL = 'INFO'               # Logging level: DEBUG, INFO, WARNING, ERROR
+    LOG_FORMAT = 'text'              # 'text' or 'json' (one JSON object per line)
+    LOG_ASYNC = True                 # Format and write logs in a background thread
+    LOG_SAMPLING = {                 # Max records/s per message of high-frequency modules
+        'trailing_stop': 5,
+        'risk_manager': 5,
+        'position_monitor': 5
+    }
 
 
 class ExchangeConfig:
@@ -60,6 +104,8 @@ class ExchangeConfig:
 
     # Rate limiting
     ENABLE_RATE_LIMIT = True
+    USE_REQUEST_SCHEDULER = True     # Priority lanes (orders first) as ccxt's throttle
+    SCHEDULER_BURST = 3              # Cost units that can be sent back to back
 
     @classmethod
     def from_env(cls):
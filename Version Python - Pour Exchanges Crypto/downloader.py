@@ -0,0 +1,265 @@
+"""
+Historical Data Downloader for BTCUSD SmartBot
+Resumable, concurrent OHLCV download into the local candle store
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from candle_store import CandleStore, timeframe_to_ms
+from request_scheduler import ScheduledExchange
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryDownloader:
+    """
+    Pages through date ranges of several symbol/timeframe jobs at once
+
+    Progress is checkpointed after each write to the store, so an
+    interrupted download resumes from the last persisted candle. Windows
+    without any candle (before a listing, exchange outages) are skipped.
+    """
+
+    def __init__(
+        self,
+        exchange,
+        store: CandleStore,
+        checkpoint_path: Optional[str] = None,
+        max_concurrent: int = 3,
+        page_limit: int = 1000,
+        flush_rows: int = 50000,
+        rate_limit_ms: Optional[float] = None
+    ):
+        """
+        Args:
+            exchange: ccxt exchange instance (see btc_smartbot.create_exchange)
+            store: Candle store to write into
+            checkpoint_path: Progress file (default: <store dir>/download_checkpoint.json)
+            max_concurrent: Number of jobs downloaded at the same time
+            page_limit: Candles requested per call
+            flush_rows: Candles buffered before writing to the store
+            rate_limit_ms: Minimum delay between calls shared by all jobs
+                (default: the exchange rateLimit, or none on a ScheduledExchange,
+                whose bulk lane paces the calls)
+        """
+        if isinstance(exchange, ScheduledExchange):
+            # Yield to the bot's latency critical calls
+            exchange = exchange.with_lane('bulk')
+            if rate_limit_ms is None:
+                rate_limit_ms = 0
+
+        self.exchange = exchange
+        self.store = store
+        self.checkpoint_path = checkpoint_path or os.path.join(
+            store.base_dir, 'download_checkpoint.json'
+        )
+        self.max_concurrent = max_concurrent
+        self.page_limit = page_limit
+        self.flush_rows = flush_rows
+
+        if rate_limit_ms is None:
+            rate_limit_ms = getattr(exchange, 'rateLimit', 0) or 0
+        self.min_interval = rate_limit_ms / 1000.0
+
+        self._throttle_lock = threading.Lock()
+        self._next_call = 0.0
+        self._checkpoint_lock = threading.Lock()
+        self._checkpoints = self._load_checkpoints()
+
+    @staticmethod
+    def _job_key(symbol: str, timeframe: str, start: int, end: Optional[int]) -> str:
+        return f"{symbol}|{timeframe}|{start}|{end if end is not None else 'now'}"
+
+    def _load_checkpoints(self) -> Dict[str, int]:
+        """Read saved progress"""
+        if not os.path.exists(self.checkpoint_path):
+            return {}
+
+        with open(self.checkpoint_path) as f:
+            return json.load(f)
+
+    def _save_checkpoint(self, key: str, cursor: Optional[int]):
+        """Record job progress (None removes a finished job)"""
+        with self._checkpoint_lock:
+            if cursor is None:
+                self._checkpoints.pop(key, None)
+            else:
+                self._checkpoints[key] = cursor
+
+            os.makedirs(os.path.dirname(self.checkpoint_path) or '.', exist_ok=True)
+            tmp_path = self.checkpoint_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self._checkpoints, f, indent=2)
+            os.replace(tmp_path, self.checkpoint_path)
+
+    def _throttle(self):
+        """Wait for the next call slot shared by all jobs"""
+        with self._throttle_lock:
+            now = time.monotonic()
+            wait = self._next_call - now
+            self._next_call = max(now, self._next_call) + self.min_interval
+
+        if wait > 0:
+            time.sleep(wait)
+
+    def download(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: int,
+        end: Optional[int] = None
+    ) -> int:
+        """
+        Download one symbol/timeframe range into the store
+
+        Args:
+            symbol: Trading pair
+            timeframe: Candle timeframe
+            start: Range start in milliseconds
+            end: Range end in milliseconds (default: last closed candle)
+
+        Returns:
+            Number of candles written
+        """
+        key = self._job_key(symbol, timeframe, start, end)
+
+        tf_ms = timeframe_to_ms(timeframe)
+        now = self.exchange.milliseconds()
+        end = min(end if end is not None else now, (now // tf_ms) * tf_ms)
+        cursor = max(start, self._checkpoints.get(key, start))
+
+        # Skip what the store already holds from the start of the range
+        stored = self.store.load(self.exchange.id, symbol, timeframe)
+        if not stored.empty and int(stored.index[0].value // 1_000_000) <= cursor:
+            cursor = max(cursor, self.store.last_timestamp(self.exchange.id, symbol, timeframe) + tf_ms)
+        if cursor > start:
+            logger.info(f"Resuming {symbol} {timeframe} from {cursor}")
+
+        written = 0
+        buffer = []
+        complete = True
+
+        while cursor < end:
+            self._throttle()
+            rows = self.exchange.fetch_ohlcv(
+                symbol, timeframe=timeframe, since=cursor, limit=self.page_limit
+            )
+
+            # Closed candles of the range only
+            page = [row for row in rows if cursor <= row[0] < end and row[0] + tf_ms <= now]
+            if not page:
+                if not rows:
+                    # Nothing traded in this window (before the listing or an
+                    # exchange outage): the range goes on after it
+                    logger.warning(
+                        f"{symbol} {timeframe}: no candles from {cursor}, "
+                        f"skipping {self.page_limit} candles"
+                    )
+                    cursor += self.page_limit * tf_ms
+                    continue
+                if rows[-1][0] < cursor:
+                    # The exchange ignored since: resume from the checkpoint later
+                    logger.warning(
+                        f"{symbol} {timeframe}: exchange returned candles before {cursor}, "
+                        f"stopping with the checkpoint kept"
+                    )
+                    complete = False
+                # Otherwise only candles past the end (or not closed yet) are left
+                break
+
+            buffer.extend(page)
+            cursor = page[-1][0] + tf_ms
+
+            if len(buffer) >= self.flush_rows:
+                written += self._flush(symbol, timeframe, buffer)
+                buffer = []
+                self._save_checkpoint(key, cursor)
+
+        written += self._flush(symbol, timeframe, buffer)
+        self._save_checkpoint(key, None if complete else cursor)
+
+        logger.info(f"{symbol} {timeframe}: {written} candles downloaded")
+        return written
+
+    def _flush(self, symbol: str, timeframe: str, rows: List[list]) -> int:
+        """Write buffered candles to the store"""
+        if not rows:
+            return 0
+
+        exchange_id = self.exchange.id
+        last = self.store.last_timestamp(exchange_id, symbol, timeframe)
+
+        if last is None or rows[0][0] > last:
+            return self.store.append(exchange_id, symbol, timeframe, rows)
+
+        return self.store.merge(exchange_id, symbol, timeframe, rows)
+
+    def download_all(self, jobs: List[dict]) -> Dict[str, int]:
+        """
+        Download several ranges concurrently
+
+        Args:
+            jobs: Dicts with symbol, timeframe, start and optional end (ms);
+                each symbol/timeframe may appear only once
+
+        Returns:
+            Candles written per 'symbol timeframe'
+        """
+        series = [(job['symbol'], job['timeframe']) for job in jobs]
+        if len(set(series)) != len(series):
+            raise ValueError("Each symbol/timeframe can only be downloaded by one job")
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrent) as executor:
+            futures = {
+                f"{job['symbol']} {job['timeframe']}": executor.submit(
+                    self.download,
+                    job['symbol'],
+                    job['timeframe'],
+                    job['start'],
+                    job.get('end')
+                )
+                for job in jobs
+            }
+
+            return {name: future.result() for name, future in futures.items()}
+
+
+def main():
+    """Command line entry point"""
+    import argparse
+    import pandas as pd
+
+    from btc_smartbot import create_exchange
+    from config import TradingConfig
+
+    parser = argparse.ArgumentParser(description="Download OHLCV history into the candle store")
+    parser.add_argument('start', help="Start date, e.g. 2024-01-01")
+    parser.add_argument('--end', help="End date (default: now)")
+    parser.add_argument('--symbols', nargs='+', default=[TradingConfig.SYMBOL])
+    parser.add_argument('--timeframes', nargs='+', default=[TradingConfig.PRIMARY_TIMEFRAME])
+    parser.add_argument('--concurrent', type=int, default=3)
+    args = parser.parse_args()
+
+    start = int(pd.Timestamp(args.start, tz='UTC').value // 1_000_000)
+    end = int(pd.Timestamp(args.end, tz='UTC').value // 1_000_000) if args.end else None
+
+    store = CandleStore(TradingConfig.CANDLE_STORE_DIR, TradingConfig.CANDLE_STORE_PRICE_DTYPE)
+    downloader = HistoryDownloader(create_exchange(), store, max_concurrent=args.concurrent)
+
+    jobs = [
+        {'symbol': symbol, 'timeframe': timeframe, 'start': start, 'end': end}
+        for symbol in args.symbols
+        for timeframe in args.timeframes
+    ]
+    for name, count in downloader.download_all(jobs).items():
+        print(f"{name}: {count} candles")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,9 @@ Implements EMA and ATR calculations
 
 import pandas as pd
 import numpy as np
-from typing import Tuple, Optional
+from collections import deque
+from math import copysign
+from typing import List, Tuple, Optional
 
 
 class TechnicalIndicators:
@@ -38,6 +40,24 @@ class TechnicalIndicators:
         Returns:
             Series with ATR values
         """
+        tr = TechnicalIndicators.calculate_true_range(data)
+
+        # ATR is the moving average of True Range
+        atr = tr.rolling(window=period).mean()
+
+        return atr
+
+    @staticmethod
+    def calculate_true_range(data: pd.DataFrame) -> pd.Series:
+        """
+        Calculate True Range
+
+        Args:
+            data: DataFrame with OHLCV data (high, low, close)
+
+        Returns:
+            Series with True Range values
+        """
         high = data['high']
         low = data['low']
         close = data['close']
@@ -47,12 +67,67 @@ class TechnicalIndicators:
         tr2 = abs(high - close.shift())
         tr3 = abs(low - close.shift())
 
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+        return pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
 
-        # ATR is the moving average of True Range
-        atr = tr.rolling(window=period).mean()
+    @staticmethod
+    def calculate_ema_matrix(
+        data: pd.DataFrame,
+        periods: List[int],
+        column: str = 'close'
+    ) -> np.ndarray:
+        """
+        Calculate EMAs for many periods at once
 
-        return atr
+        Each distinct period is computed once, duplicates share a row.
+        Rows are identical to calculate_ema for the same period.
+
+        Args:
+            data: DataFrame with OHLCV data
+            periods: EMA periods
+            column: Column to calculate EMA on (default: 'close')
+
+        Returns:
+            Array of shape (len(periods), len(data))
+        """
+        values = data[column]
+        matrix = np.empty((len(periods), len(values)), dtype=np.float64)
+
+        computed = {}
+        for row, period in enumerate(periods):
+            if period not in computed:
+                computed[period] = values.ewm(span=period, adjust=False).mean().to_numpy()
+            matrix[row] = computed[period]
+
+        return matrix
+
+    @staticmethod
+    def calculate_atr_matrix(
+        data: pd.DataFrame,
+        periods: List[int]
+    ) -> np.ndarray:
+        """
+        Calculate ATRs for many periods at once
+
+        True Range is computed once and shared by every period.
+        Rows are identical to calculate_atr for the same period.
+
+        Args:
+            data: DataFrame with OHLCV data (high, low, close)
+            periods: ATR periods
+
+        Returns:
+            Array of shape (len(periods), len(data))
+        """
+        tr = TechnicalIndicators.calculate_true_range(data)
+        matrix = np.empty((len(periods), len(tr)), dtype=np.float64)
+
+        computed = {}
+        for row, period in enumerate(periods):
+            if period not in computed:
+                computed[period] = tr.rolling(window=period).mean().to_numpy()
+            matrix[row] = computed[period]
+
+        return matrix
 
     @staticmethod
     def detect_ema_crossover(fast_ema: pd.Series, slow_ema: pd.Series) -> Tuple[bool, bool]:
@@ -176,6 +251,263 @@ class TechnicalIndicators:
         return df
 
 
+class StreamingIndicators:
+    """
+    Incremental EMA/ATR/crossover state updated in O(1) per candle
+
+    Produces the same values as TechnicalIndicators.calculate_ema and
+    calculate_atr on the same candle series: the EMA follows the pandas
+    ewm(adjust=False) recurrence and the ATR keeps the compensated running
+    sum used by pandas rolling().mean().
+
+    Feeding a candle with the same timestamp as the last one revises that
+    candle (the still-forming bar returned by exchanges) instead of
+    appending a new one.
+    """
+
+    def __init__(
+        self,
+        fast_ema_period: int = 9,
+        slow_ema_period: int = 21,
+        atr_period: int = 14
+    ):
+        self.fast_ema_period = fast_ema_period
+        self.slow_ema_period = slow_ema_period
+        self.atr_period = atr_period
+
+        self._fast_alpha = self._span_to_alpha(fast_ema_period)
+        self._slow_alpha = self._span_to_alpha(slow_ema_period)
+
+        self.reset()
+
+    @staticmethod
+    def _span_to_alpha(span: int) -> float:
+        """Smoothing factor used by pandas ewm(span=...)"""
+        com = (span - 1) / 2.0
+        return 1.0 / (1.0 + com)
+
+    def reset(self):
+        """Clear all state"""
+        self.bar_count = 0
+        self.last_timestamp = None
+
+        self.ema_fast = np.nan
+        self.ema_slow = np.nan
+        self.prev_ema_fast = np.nan
+        self.prev_ema_slow = np.nan
+        self.atr = np.nan
+
+        self._prev_close = np.nan
+        self._tr_window = deque()
+        self._sum_tr = 0.0
+        self._comp_add = 0.0
+        self._comp_remove = 0.0
+        self._neg_ct = 0
+        self._same_count = 0
+        self._prev_tr = np.nan
+
+        self._undo = None
+
+    def seed(self, data: pd.DataFrame):
+        """
+        Rebuild state from historical candles
+
+        Args:
+            data: DataFrame with high, low, close columns indexed by timestamp
+        """
+        self.reset()
+
+        for timestamp, high, low, close in zip(
+            data.index, data['high'].to_numpy(), data['low'].to_numpy(), data['close'].to_numpy()
+        ):
+            self.update(timestamp, high, low, close)
+
+    def sync(self, data: pd.DataFrame):
+        """
+        Feed only the candles not seen yet (plus a revision of the last one)
+
+        Falls back to a full seed when the data does not overlap the state.
+
+        Args:
+            data: DataFrame with high, low, close columns indexed by timestamp
+        """
+        if data.empty:
+            return
+
+        if self.last_timestamp is None or data.index[0] > self.last_timestamp:
+            self.seed(data)
+            return
+
+        new_rows = data[data.index >= self.last_timestamp]
+        for timestamp, high, low, close in zip(
+            new_rows.index,
+            new_rows['high'].to_numpy(),
+            new_rows['low'].to_numpy(),
+            new_rows['close'].to_numpy()
+        ):
+            self.update(timestamp, high, low, close)
+
+    def update(self, timestamp, high: float, low: float, close: float):
+        """
+        Apply one candle
+
+        Args:
+            timestamp: Candle open time (a repeated timestamp revises the last candle)
+            high: Candle high
+            low: Candle low
+            close: Candle close
+        """
+        if self.bar_count > 0 and timestamp == self.last_timestamp:
+            self._rollback()
+        elif self.last_timestamp is not None and timestamp < self.last_timestamp:
+            raise ValueError(f"Out of order candle: {timestamp} < {self.last_timestamp}")
+
+        self._undo = (
+            self.ema_fast, self.ema_slow, self.prev_ema_fast, self.prev_ema_slow,
+            self.atr, self._prev_close, self._sum_tr, self._comp_add,
+            self._comp_remove, self._neg_ct, self._same_count, self._prev_tr,
+            self.last_timestamp
+        )
+
+        # EMAs
+        self.prev_ema_fast = self.ema_fast
+        self.prev_ema_slow = self.ema_slow
+        self.ema_fast = self._ema_step(self.ema_fast, close, self._fast_alpha)
+        self.ema_slow = self._ema_step(self.ema_slow, close, self._slow_alpha)
+
+        # True Range (first candle has no previous close)
+        tr = high - low
+        if self._prev_close == self._prev_close:
+            tr = max(tr, abs(high - self._prev_close), abs(low - self._prev_close))
+        self._prev_close = close
+
+        # Rolling mean of True Range (a one-bar window restarts every candle)
+        evicted = None
+        if self.atr_period == 1 and self._tr_window:
+            evicted = self._tr_window.popleft()
+            self._sum_tr = self._comp_add = self._comp_remove = 0.0
+            self._neg_ct = 0
+            self._prev_tr = np.nan
+            self._add_tr(tr)
+        else:
+            self._add_tr(tr)
+            if len(self._tr_window) > self.atr_period:
+                evicted = self._tr_window.popleft()
+                self._remove_tr(evicted)
+        self._undo += (evicted,)
+
+        self.atr = self._mean_tr()
+
+        self.last_timestamp = timestamp
+        self.bar_count += 1
+
+    def _rollback(self):
+        """Undo the last update so the candle can be revised"""
+        (
+            self.ema_fast, self.ema_slow, self.prev_ema_fast, self.prev_ema_slow,
+            self.atr, self._prev_close, self._sum_tr, self._comp_add,
+            self._comp_remove, self._neg_ct, self._same_count, self._prev_tr,
+            self.last_timestamp, evicted
+        ) = self._undo
+
+        self._tr_window.pop()
+        if evicted is not None:
+            self._tr_window.appendleft(evicted)
+
+        self.bar_count -= 1
+        self._undo = None
+
+    @staticmethod
+    def _ema_step(weighted: float, value: float, alpha: float) -> float:
+        """One step of the pandas ewm(adjust=False) recurrence"""
+        if weighted != weighted:
+            return value
+
+        old_wt = 1.0 - alpha
+        if weighted != value:
+            weighted = (old_wt * weighted + alpha * value) / (old_wt + alpha)
+
+        return weighted
+
+    def _add_tr(self, value: float):
+        """Add a True Range value to the window (Kahan summation)"""
+        self._tr_window.append(value)
+
+        y = value - self._comp_add
+        t = self._sum_tr + y
+        self._comp_add = t - self._sum_tr - y
+        self._sum_tr = t
+
+        if copysign(1.0, value) < 0:
+            self._neg_ct += 1
+
+        if value == self._prev_tr:
+            self._same_count += 1
+        else:
+            self._same_count = 1
+        self._prev_tr = value
+
+    def _remove_tr(self, value: float):
+        """Remove a True Range value from the window (Kahan summation)"""
+        y = -value - self._comp_remove
+        t = self._sum_tr + y
+        self._comp_remove = t - self._sum_tr - y
+        self._sum_tr = t
+
+        if copysign(1.0, value) < 0:
+            self._neg_ct -= 1
+
+    def _mean_tr(self) -> float:
+        """Mean of the True Range window, NaN until the window is full"""
+        nobs = len(self._tr_window)
+        if nobs < self.atr_period or nobs == 0:
+            return np.nan
+
+        if self._same_count >= nobs:
+            return self._prev_tr
+
+        result = self._sum_tr / nobs
+        if self._neg_ct == 0 and result < 0:
+            result = 0.0
+        elif self._neg_ct == nobs and result > 0:
+            result = 0.0
+
+        return result
+
+    def detect_crossover(self) -> Tuple[bool, bool]:
+        """
+        Detect EMA crossover on the last two candles
+
+        Returns:
+            Tuple (bullish_cross, bearish_cross), same as
+            TechnicalIndicators.detect_ema_crossover
+        """
+        if self.bar_count < 2:
+            return False, False
+
+        bullish_cross = (self.prev_ema_fast <= self.prev_ema_slow) and (self.ema_fast > self.ema_slow)
+        bearish_cross = (self.prev_ema_fast >= self.prev_ema_slow) and (self.ema_fast < self.ema_slow)
+
+        return bullish_cross, bearish_cross
+
+    def check_trend_alignment(self) -> str:
+        """
+        Check current trend alignment based on EMA positions
+
+        Returns:
+            'bullish', 'bearish', or 'neutral'
+        """
+        if self.bar_count == 0:
+            return 'neutral'
+
+        if self.ema_fast > self.ema_slow:
+            return 'bullish'
+        elif self.ema_fast < self.ema_slow:
+            return 'bearish'
+        else:
+            return 'neutral'
+
+
 class MarketAnalyzer:
     """Analyzes market conditions for trading decisions"""
 
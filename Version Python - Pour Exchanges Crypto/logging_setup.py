@@ -0,0 +1,181 @@
+"""
+Logging Setup for BTCUSD SmartBot
+Non-blocking logging: queued records, JSON lines output and per-module sampling
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Union
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed with extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+# Message templates tracked per SamplingFilter before starting over
+_MAX_SAMPLED_TEMPLATES = 10000
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName
+        }
+
+        # Fields passed with extra= (and suppressed, see SamplingFilter)
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Limits high-frequency messages of chosen modules
+
+    Each message template of a sampled logger passes at most `rate` records
+    per second (bursts up to `rate`); the others are dropped and counted,
+    and the next record let through carries the count as its `suppressed`
+    attribute. Messages are told apart by template, so %-style calls
+    (logger.info("Stop %s moved", position_id)) are sampled together while
+    each f-string is a template of its own. Warnings and errors always pass.
+    """
+
+    def __init__(self, rates: Dict[str, float], clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            rates: Records per second per logger name (children included),
+                e.g. {'trailing_stop': 5}
+            clock: Monotonic time source in seconds
+        """
+        super().__init__()
+        self.rates = dict(rates)
+        self.clock = clock
+
+        self._rate_cache: Dict[str, Optional[float]] = {}
+        self._buckets: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def _rate_for(self, name: str) -> Optional[float]:
+        """Rate of a logger (from its own name or its closest parent)"""
+        if name not in self._rate_cache:
+            rate = None
+            candidate = name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition('.')[0]
+            self._rate_cache[name] = rate
+        return self._rate_cache[name]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        rate = self._rate_for(record.name)
+        if rate is None:
+            return True
+
+        key = (record.name, record.msg)
+        now = self.clock()
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= _MAX_SAMPLED_TEMPLATES:
+                    self._buckets.clear()
+                bucket = self._buckets[key] = [rate, now, 0]
+
+            # bucket: tokens, last refill, records dropped since the last one passed
+            bucket[0] = min(rate, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                return False
+
+            bucket[0] -= 1.0
+            dropped, bucket[2] = bucket[2], 0
+
+        if dropped:
+            record.suppressed = dropped
+        return True
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread
+
+    The standard QueueHandler formats each record in the logging thread
+    before queueing it. Here the record is queued as is, so the logging call
+    only costs a record creation and a queue put; arguments must therefore
+    not be mutated after the call.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(
+    level: Union[str, int] = 'INFO',
+    json_format: bool = False,
+    asynchronous: bool = True,
+    sampling: Optional[Dict[str, float]] = None,
+    handler: Optional[logging.Handler] = None
+) -> Optional[logging.handlers.QueueListener]:
+    """
+    Configure the root logger
+
+    Does nothing if the root logger already has handlers, like
+    logging.basicConfig, so an application's own configuration wins.
+
+    Args:
+        level: Root logging level
+        json_format: One JSON object per line instead of plain text
+        asynchronous: Queue records to a background writer thread
+        sampling: Records per second per logger name (see SamplingFilter)
+        handler: Output handler (default: stderr)
+
+    Returns:
+        QueueListener of the writer thread (stopped at exit), or None
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return None
+
+    root.setLevel(level)
+
+    output = handler or logging.StreamHandler()
+    output.setFormatter(JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT))
+
+    listener = None
+    entry = output
+    if asynchronous:
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        entry = LazyQueueHandler(log_queue)
+
+    # Sampled records are dropped before being queued
+    if sampling:
+        entry.addFilter(SamplingFilter(sampling))
+
+    root.addHandler(entry)
+    return listener
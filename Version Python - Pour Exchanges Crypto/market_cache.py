@@ -0,0 +1,190 @@
+"""
+Market State Cache for BTCUSD SmartBot
+Short-lived cache of exchange responses with request coalescing
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingRequest:
+    """Request in flight, shared by the threads asking for the same key"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.generation = 0
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class MarketStateCache:
+    """
+    Caches exchange endpoint responses for a per-endpoint time to live
+
+    Callers asking for a key while it is being fetched wait for that request
+    instead of sending their own, both across threads (get) and across
+    asyncio tasks (get_async). Errors are passed to every waiting caller and
+    never cached. Entries can be invalidated explicitly, e.g. the balance
+    after one of our own orders is filled.
+    """
+
+    def __init__(self, ttls: Dict[str, float], clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            ttls: Time to live in seconds per endpoint name (0 or missing: no caching,
+                concurrent callers are still coalesced)
+            clock: Monotonic time source in seconds
+        """
+        self.ttls = dict(ttls)
+        self.clock = clock
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+        self._values: Dict[Hashable, tuple] = {}
+        self._pending: Dict[Hashable, _PendingRequest] = {}
+        self._tasks: Dict[Hashable, asyncio.Future] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, key: tuple) -> tuple:
+        """(True, value) if the key holds an unexpired value"""
+        entry = self._values.get(key)
+        if entry is not None and self.clock() < entry[0]:
+            self.hits += 1
+            return True, entry[1]
+        return False, None
+
+    def _store(self, key: tuple, value: Any, generation: int):
+        # A response requested before an invalidation may already be stale
+        if generation != self._generations.get(key[0], 0):
+            return
+
+        ttl = self.ttls.get(key[0], 0)
+        if ttl > 0:
+            self._values[key] = (self.clock() + ttl, value)
+
+    def get(self, endpoint: str, fetch: Callable[..., Any], *args, refresh: bool = False) -> Any:
+        """
+        Cached result of fetch(*args)
+
+        Args:
+            endpoint: Endpoint name (selects the TTL), e.g. 'ticker'
+            fetch: Function performing the request
+            *args: Request arguments (part of the cache key)
+            refresh: Ignore a cached value (the response is still cached,
+                and a request already in flight is still shared)
+
+        Returns:
+            Response
+        """
+        key = (endpoint,) + args
+
+        with self._lock:
+            found, value = self._fresh(key) if not refresh else (False, None)
+            if found:
+                return value
+
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = _PendingRequest()
+                pending.generation = self._generations.get(endpoint, 0)
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            pending.value = fetch(*args)
+            with self._lock:
+                self._store(key, pending.value, pending.generation)
+            return pending.value
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.done.set()
+
+    async def get_async(self, endpoint: str, fetch: Callable[..., Awaitable], *args, refresh: bool = False) -> Any:
+        """
+        Cached result of await fetch(*args)
+
+        Args:
+            endpoint: Endpoint name (selects the TTL), e.g. 'ticker'
+            fetch: Coroutine function performing the request
+            *args: Request arguments (part of the cache key)
+            refresh: Ignore a cached value (the response is still cached,
+                and a request already in flight is still shared)
+
+        Returns:
+            Response
+        """
+        key = (endpoint,) + args
+
+        with self._lock:
+            found, value = self._fresh(key) if not refresh else (False, None)
+            if found:
+                return value
+
+            task = self._tasks.get(key)
+            if task is None:
+                self.misses += 1
+                generation = self._generations.get(endpoint, 0)
+                task = self._tasks[key] = asyncio.ensure_future(fetch(*args))
+                task.add_done_callback(lambda done: self._finish_task(key, done, generation))
+            else:
+                self.coalesced += 1
+
+        # A cancelled caller must not cancel the request the others wait for
+        return await asyncio.shield(task)
+
+    def _finish_task(self, key: tuple, task: asyncio.Future, generation: int):
+        with self._lock:
+            self._tasks.pop(key, None)
+            if not task.cancelled() and task.exception() is None:
+                self._store(key, task.result(), generation)
+
+    def invalidate(self, endpoint: Optional[str] = None):
+        """
+        Drop cached values
+
+        Args:
+            endpoint: Endpoint name (None drops everything)
+        """
+        with self._lock:
+            if endpoint is None:
+                self._values.clear()
+                endpoints = set(self._generations) | set(self.ttls)
+            else:
+                for key in [key for key in self._values if key[0] == endpoint]:
+                    del self._values[key]
+                endpoints = [endpoint]
+
+            for name in endpoints:
+                self._generations[name] = self._generations.get(name, 0) + 1
+
+        logger.debug(f"Cache invalidated: {endpoint or 'all'}")
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Request counters
+
+        Returns:
+            Dict with hits, misses (requests sent) and coalesced (callers
+            that waited for a request already in flight)
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'coalesced': self.coalesced}
@@ -0,0 +1,355 @@
+"""
+Market Data Feed for BTCUSD SmartBot
+Push-based trade stream that emits an event as soon as a candle closes
+"""
+
+import asyncio
+import csv
+import inspect
+import json
+import logging
+import time
+from typing import AsyncIterator, Callable, List, Optional
+
+from candle_store import timeframe_to_ms
+
+logger = logging.getLogger(__name__)
+
+
+def wall_clock_ms() -> float:
+    """Current time in milliseconds"""
+    return time.time() * 1000
+
+
+class BarBuilder:
+    """
+    Builds OHLCV bars from trades
+
+    Bars are dicts with timestamp (open time, ms), open, high, low, close,
+    volume and complete. The first bar is marked incomplete when the stream
+    starts after its open time. Buckets without trades produce no bar.
+    """
+
+    def __init__(self, timeframe: str):
+        """
+        Args:
+            timeframe: Bar timeframe (e.g. '1m', '1h')
+        """
+        self.timeframe = timeframe
+        self.timeframe_ms = timeframe_to_ms(timeframe)
+        self.current: Optional[dict] = None
+        self.last_closed: Optional[int] = None
+        self.late_trades = 0
+        self._first = True
+
+    @property
+    def current_bar_end(self) -> Optional[int]:
+        """Close time of the bar being built (ms)"""
+        if self.current is None:
+            return None
+        return self.current['timestamp'] + self.timeframe_ms
+
+    def add_trade(self, timestamp: float, price: float, amount: float = 0.0) -> Optional[dict]:
+        """
+        Add a trade
+
+        Args:
+            timestamp: Trade time in milliseconds
+            price: Trade price
+            amount: Trade size
+
+        Returns:
+            The bar closed by this trade, if it starts a new bucket
+        """
+        bucket = int(timestamp // self.timeframe_ms) * self.timeframe_ms
+
+        if self.last_closed is not None and bucket <= self.last_closed:
+            self.late_trades += 1
+            return None
+
+        closed = None
+        if self.current is not None and bucket > self.current['timestamp']:
+            closed = self._close()
+
+        if self.current is None:
+            self.current = {
+                'timestamp': bucket,
+                'open': price,
+                'high': price,
+                'low': price,
+                'close': price,
+                'volume': amount,
+                'complete': not self._first or timestamp == bucket
+            }
+            self._first = False
+        else:
+            bar = self.current
+            if price > bar['high']:
+                bar['high'] = price
+            if price < bar['low']:
+                bar['low'] = price
+            bar['close'] = price
+            bar['volume'] += amount
+
+        return closed
+
+    def close_due(self, now_ms: float) -> Optional[dict]:
+        """
+        Close the current bar if its time is over
+
+        Args:
+            now_ms: Current time in milliseconds
+
+        Returns:
+            The closed bar, or None
+        """
+        if self.current is not None and now_ms >= self.current_bar_end:
+            return self._close()
+        return None
+
+    def _close(self) -> dict:
+        bar = self.current
+        self.current = None
+        self.last_closed = bar['timestamp']
+        return bar
+
+
+class MarketFeed:
+    """
+    Drives callbacks from a live trade stream
+
+    - on_price(timestamp, price) is called for every trade
+    - on_bar_closed(bar) is called once per closed bar, either when a trade
+      of the next bucket arrives or when the bar close time passes
+      (plus close_grace_ms for trades still in flight), whichever is first
+
+    Callbacks may be plain functions or coroutine functions. Bar callbacks
+    run in order on a separate task so they never delay trade intake.
+    """
+
+    def __init__(
+        self,
+        source: AsyncIterator,
+        timeframe: str,
+        close_grace_ms: float = 50.0,
+        clock: Callable[[], float] = wall_clock_ms
+    ):
+        """
+        Args:
+            source: Async iterator yielding trades (dict with timestamp,
+                price, amount) or lists of trades
+            timeframe: Bar timeframe
+            close_grace_ms: Delay after the bar close time before closing it
+                on the timer
+            clock: Current time in milliseconds
+        """
+        self.source = source
+        self.builder = BarBuilder(timeframe)
+        self.close_grace_ms = close_grace_ms
+        self.clock = clock
+
+        self.last_price: Optional[float] = None
+        self.bar_callbacks: List[Callable] = []
+        self.price_callbacks: List[Callable] = []
+
+        self._events: Optional[asyncio.Queue] = None
+        self._bar_started: Optional[asyncio.Event] = None
+        self._running = False
+
+    def on_bar_closed(self, callback: Callable):
+        """Register a callback receiving each closed bar"""
+        self.bar_callbacks.append(callback)
+
+    def on_price(self, callback: Callable):
+        """Register a callback receiving (timestamp, price) of each trade"""
+        self.price_callbacks.append(callback)
+
+    async def run(self):
+        """Consume the stream until it ends or stop() is called"""
+        self._running = True
+        self._events = asyncio.Queue()
+        self._bar_started = asyncio.Event()
+
+        dispatcher = asyncio.create_task(self._dispatch())
+        timer = asyncio.create_task(self._close_timer())
+
+        try:
+            await self._consume()
+        finally:
+            self._running = False
+            timer.cancel()
+
+            # The bar still being built when the stream ends is not emitted
+            self._events.put_nowait(None)
+            await dispatcher
+
+    def stop(self):
+        """Stop consuming after the current trade"""
+        self._running = False
+
+    async def _consume(self):
+        async for message in self.source:
+            trades = message if isinstance(message, list) else [message]
+            for trade in trades:
+                self._on_trade(trade['timestamp'], trade['price'], trade.get('amount', 0.0))
+            if not self._running:
+                break
+
+    def _on_trade(self, timestamp: float, price: float, amount: float):
+        closed = self.builder.add_trade(timestamp, price, amount)
+        self.last_price = price
+
+        if closed is not None:
+            self._events.put_nowait((closed, self.clock()))
+        self._bar_started.set()
+
+        for callback in self.price_callbacks:
+            result = callback(timestamp, price)
+            if inspect.isawaitable(result):
+                asyncio.ensure_future(result)
+
+    async def _close_timer(self):
+        """Close bars on time even when no trade of the next bucket arrives"""
+        while self._running:
+            bar_end = self.builder.current_bar_end
+            if bar_end is None:
+                self._bar_started.clear()
+                await self._bar_started.wait()
+                continue
+
+            delay = (bar_end + self.close_grace_ms - self.clock()) / 1000.0
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            if self.builder.current_bar_end == bar_end:
+                now = self.clock()
+                bar = self.builder.close_due(now)
+                if bar is not None:
+                    self._events.put_nowait((bar, now))
+
+    async def _dispatch(self):
+        """Run bar callbacks in order"""
+        while True:
+            event = await self._events.get()
+            if event is None:
+                return
+
+            bar, closed_at = event
+            logger.debug(
+                f"Bar {bar['timestamp']} closed "
+                f"{closed_at - (bar['timestamp'] + self.builder.timeframe_ms):.1f} ms after close time"
+            )
+
+            for callback in self.bar_callbacks:
+                try:
+                    result = callback(bar)
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception as e:
+                    logger.error(f"Bar callback error: {e}", exc_info=True)
+
+
+async def ccxt_trade_stream(exchange, symbol: str) -> AsyncIterator[List[dict]]:
+    """
+    Trades from a ccxt.pro exchange (watch_trades)
+
+    Args:
+        exchange: ccxt.pro exchange instance (see btc_smartbot.create_exchange)
+        symbol: Trading pair
+
+    Yields:
+        Lists of trade dicts (timestamp, price, amount)
+    """
+    while True:
+        trades = await exchange.watch_trades(symbol)
+        yield [
+            {'timestamp': trade['timestamp'], 'price': trade['price'], 'amount': trade['amount']}
+            for trade in trades
+        ]
+
+
+async def websocket_trade_stream(url: str) -> AsyncIterator:
+    """
+    Trades from a websocket sending JSON trade objects or lists of them
+    (e.g. serve_replay)
+
+    Args:
+        url: Websocket URL, e.g. ws://127.0.0.1:8765
+
+    Yields:
+        Trade dicts or lists of trade dicts
+    """
+    import websockets
+
+    async with websockets.connect(url) as ws:
+        async for message in ws:
+            yield json.loads(message)
+
+
+def load_ticks(path: str) -> List[dict]:
+    """
+    Read recorded trades from a CSV file with timestamp,price,amount columns
+
+    Args:
+        path: CSV file path
+
+    Returns:
+        Trade dicts sorted by timestamp
+    """
+    with open(path, newline='') as f:
+        ticks = [
+            {
+                'timestamp': float(row['timestamp']),
+                'price': float(row['price']),
+                'amount': float(row.get('amount') or 0.0)
+            }
+            for row in csv.DictReader(f)
+        ]
+
+    ticks.sort(key=lambda tick: tick['timestamp'])
+    return ticks
+
+
+async def serve_replay(
+    ticks: List[dict],
+    host: str = '127.0.0.1',
+    port: int = 8765,
+    speed: float = 1.0,
+    rebase: bool = True
+):
+    """
+    Local websocket stand-in for an exchange trade stream
+
+    Every client receives the recorded ticks paced by their timestamps.
+    With rebase, timestamps are shifted so the stream looks live (the first
+    tick is stamped with the connection time and intervals are divided by
+    speed), which lets the bar close timer run against the wall clock.
+
+    Args:
+        ticks: Recorded trades (see load_ticks)
+        host: Bind address
+        port: Bind port (0 picks a free port)
+        speed: Replay speed multiplier
+        rebase: Rewrite timestamps relative to the connection time
+
+    Returns:
+        The running websockets server (use as async context manager or close())
+    """
+    import websockets
+
+    async def handler(ws, *args):
+        start = wall_clock_ms()
+        origin = ticks[0]['timestamp'] if ticks else 0.0
+
+        for tick in ticks:
+            offset = (tick['timestamp'] - origin) / speed
+            delay = (start + offset - wall_clock_ms()) / 1000.0
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            message = dict(tick)
+            if rebase:
+                message['timestamp'] = start + offset
+            await ws.send(json.dumps(message))
+
+    return await websockets.serve(handler, host, port)
@@ -0,0 +1,242 @@
+"""
+Market Generator for BTCUSD SmartBot
+Vectorized, seeded synthetic OHLCV series (single series or many paths at once)
+"""
+
+import logging
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from candle_store import timeframe_to_ms
+
+logger = logging.getLogger(__name__)
+
+# Milliseconds per year (crypto markets trade around the clock)
+YEAR_MS = 365 * 24 * 60 * 60 * 1000
+
+DEFAULT_START = '2020-01-01'
+
+# (annual drift, annual volatility) of the default regimes: bull, bear, range
+DEFAULT_REGIMES = ((0.8, 0.5), (-0.6, 0.8), (0.0, 0.3))
+
+
+def _random_walk(
+    rng: np.random.Generator,
+    shape: Tuple[int, int],
+    base_price: float,
+    dt: float,
+    step: float = 200.0,
+    floor: float = 20000.0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Additive random walk floored at a price
+
+    Same process as the loop of example_backtest.generate_sample_data
+    (price = max(price + N(0, step), floor) at each bar). The floored walk
+    is computed with a running minimum: above the floor, the price is the
+    unfloored walk lifted by its deepest excursion below the floor so far.
+    """
+    walk = (base_price - floor) + np.cumsum(rng.normal(0.0, step, shape), axis=1)
+    excursion = np.minimum(np.minimum.accumulate(walk, axis=1), 0.0)
+    return floor + walk - excursion, np.full(shape, step)
+
+
+def _log_path(rng: np.random.Generator, base_price: float, drift: np.ndarray, volatility: np.ndarray) -> np.ndarray:
+    """Prices from per-bar log-return drift and volatility (GBM steps)"""
+    returns = drift - 0.5 * volatility ** 2 + volatility * rng.standard_normal(volatility.shape)
+    return base_price * np.exp(np.cumsum(returns, axis=1))
+
+
+def _gbm(
+    rng: np.random.Generator,
+    shape: Tuple[int, int],
+    base_price: float,
+    dt: float,
+    mu: float = 0.0,
+    sigma: float = 0.6
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Geometric Brownian motion (annual drift mu, annual volatility sigma)"""
+    volatility = np.full(shape, sigma * np.sqrt(dt))
+    close = _log_path(rng, base_price, np.full(shape, mu * dt), volatility)
+    return close, close * volatility
+
+
+def _regimes(
+    rng: np.random.Generator,
+    shape: Tuple[int, int],
+    base_price: float,
+    dt: float,
+    regimes: tuple = DEFAULT_REGIMES,
+    regime_days: float = 30.0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    GBM whose (annual drift, annual volatility) switches between regimes
+
+    The regime is a Markov chain: at each bar it changes with probability
+    (bar duration / regime_days), to one of the other regimes at random.
+    """
+    parameters = np.asarray(regimes, dtype=np.float64)
+    count = len(parameters)
+
+    regime = rng.integers(0, count, (shape[0], 1)) + np.zeros(shape, dtype=np.int64)
+    if count > 1:
+        switch_probability = min(dt * YEAR_MS / (regime_days * 86_400_000), 1.0)
+        switches = rng.random(shape) < switch_probability
+        regime += np.cumsum(np.where(switches, rng.integers(1, count, shape), 0), axis=1)
+        regime %= count
+
+    volatility = parameters[regime, 1] * np.sqrt(dt)
+    close = _log_path(rng, base_price, parameters[regime, 0] * dt, volatility)
+    return close, close * volatility
+
+
+def _clustered(
+    rng: np.random.Generator,
+    shape: Tuple[int, int],
+    base_price: float,
+    dt: float,
+    mu: float = 0.0,
+    sigma: float = 0.6,
+    vol_of_vol: float = 0.05,
+    persistence: float = 0.99
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    GBM with stochastic volatility (volatility clustering)
+
+    The log volatility follows an AR(1) process h[t] = persistence * h[t-1]
+    + N(0, vol_of_vol) per bar, started from its stationary distribution
+    and scaled so the mean variance matches sigma. The recursion runs as an
+    exponentially weighted mean (pandas ewm), one column per path.
+    """
+    stationary_variance = vol_of_vol ** 2 / (1.0 - persistence ** 2)
+
+    shocks = rng.normal(0.0, vol_of_vol, shape) / (1.0 - persistence)
+    shocks[:, 0] = rng.normal(0.0, np.sqrt(stationary_variance), shape[0])
+    log_volatility = pd.DataFrame(shocks.T).ewm(alpha=1.0 - persistence, adjust=False).mean().to_numpy().T
+
+    volatility = sigma * np.sqrt(dt) * np.exp(log_volatility - stationary_variance)
+    close = _log_path(rng, base_price, np.full(shape, mu * dt), volatility)
+    return close, close * volatility
+
+
+# Price models: name -> function(rng, (paths, bars), base_price, dt, **params) -> (close, price volatility per bar)
+MODELS = {
+    'random_walk': _random_walk,
+    'gbm': _gbm,
+    'regimes': _regimes,
+    'clustered': _clustered
+}
+
+
+class MarketGenerator:
+    """
+    Synthetic OHLCV candles from a seeded NumPy Generator
+
+    Every model is computed with array operations over all bars (and all
+    paths) at once. Models and their parameters:
+        random_walk: step (price change std per bar), floor
+        gbm: mu, sigma (annual drift and volatility)
+        regimes: regimes ((annual drift, annual volatility), ...), regime_days
+        clustered: mu, sigma, vol_of_vol, persistence (per-bar AR(1) of
+            the log volatility)
+
+    Opens are the previous closes; highs and lows extend the body by up
+    to half the bar's price volatility. Series are reproducible: the same
+    seed and the same sequence of calls give the same candles.
+    """
+
+    def __init__(self, seed=None, timeframe: str = '1h', base_price: float = 45000.0):
+        """
+        Args:
+            seed: Seed (int, SeedSequence or Generator; None for fresh entropy)
+            timeframe: Candle timeframe (sets the per-bar scale of annual parameters)
+            base_price: Price the series start from
+        """
+        self.rng = np.random.default_rng(seed)
+        self.timeframe = timeframe
+        self.timeframe_ms = timeframe_to_ms(timeframe)
+        self.base_price = base_price
+
+    def closes(self, bars: int, paths: int = 1, model: str = 'random_walk', **params) -> np.ndarray:
+        """
+        Close prices only
+
+        Args:
+            bars: Bars per path
+            paths: Number of independent paths
+            model: Price model (see MODELS)
+            **params: Model parameters
+
+        Returns:
+            Array of shape (paths, bars)
+        """
+        return self._simulate(bars, paths, model, params)[0]
+
+    def ohlcv(self, bars: int, paths: int = 1, model: str = 'random_walk', **params) -> Dict[str, np.ndarray]:
+        """
+        Candles of many paths, e.g. for Monte Carlo backtests
+
+        Args:
+            bars: Bars per path
+            paths: Number of independent paths
+            model: Price model (see MODELS)
+            **params: Model parameters
+
+        Returns:
+            Dict open, high, low, close, volume of arrays of shape (paths, bars)
+        """
+        close, scale = self._simulate(bars, paths, model, params)
+
+        open_ = np.empty_like(close)
+        open_[:, 0] = close[:, 0]
+        open_[:, 1:] = close[:, :-1]
+
+        wick = 0.5 * scale
+        return {
+            'open': open_,
+            'high': np.maximum(open_, close) + self.rng.uniform(0.0, 1.0, close.shape) * wick,
+            'low': np.minimum(open_, close) - self.rng.uniform(0.0, 1.0, close.shape) * wick,
+            'close': close,
+            'volume': self.rng.uniform(100.0, 1000.0, close.shape)
+        }
+
+    def candles(
+        self,
+        bars: int,
+        model: str = 'random_walk',
+        start=None,
+        end=None,
+        **params
+    ) -> pd.DataFrame:
+        """
+        One series of candles
+
+        Args:
+            bars: Number of candles
+            model: Price model (see MODELS)
+            start: Open time of the first candle (default: DEFAULT_START)
+            end: Open time of the last candle (instead of start)
+            **params: Model parameters
+
+        Returns:
+            DataFrame with OHLCV data indexed by timestamp
+        """
+        columns = self.ohlcv(bars, 1, model, **params)
+        freq = pd.Timedelta(milliseconds=self.timeframe_ms)
+        if end is not None:
+            index = pd.date_range(end=end, periods=bars, freq=freq, name='timestamp')
+        else:
+            index = pd.date_range(start or DEFAULT_START, periods=bars, freq=freq, name='timestamp')
+
+        return pd.DataFrame({name: values[0] for name, values in columns.items()}, index=index)
+
+    def _simulate(self, bars: int, paths: int, model: str, params: dict) -> Tuple[np.ndarray, np.ndarray]:
+        if model not in MODELS:
+            raise ValueError(f"Unknown price model: {model}")
+        if bars < 1 or paths < 1:
+            raise ValueError("bars and paths must be positive")
+
+        dt = self.timeframe_ms / YEAR_MS
+        return MODELS[model](self.rng, (paths, bars), self.base_price, dt, **params)
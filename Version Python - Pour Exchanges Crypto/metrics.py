@@ -0,0 +1,358 @@
+"""
+Metrics for BTCUSD SmartBot
+Stage timers, API call counters and a Prometheus text endpoint
+"""
+
+import inspect
+import logging
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Quantiles reported for each summary
+QUANTILES = (0.5, 0.9, 0.99)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _label_text(labels: tuple) -> str:
+    """Prometheus label set, e.g. {stage="ticker"}"""
+    if not labels:
+        return ''
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{key}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class _Summary:
+    """Count, sum, max and the most recent observations of a series"""
+
+    __slots__ = ('count', 'total', 'max', 'window')
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.window = deque(maxlen=window)
+
+
+class _Timer:
+    """Context manager observing the seconds spent in its block"""
+
+    __slots__ = ('registry', 'key', 'start')
+
+    def __init__(self, registry: 'MetricsRegistry', key: tuple):
+        self.registry = registry
+        self.key = key
+
+    def __enter__(self):
+        self.start = self.registry.clock()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry._observe(self.key, self.registry.clock() - self.start)
+        return False
+
+
+class MetricsRegistry:
+    """
+    In-process counters and latency summaries
+
+    Summaries keep the count, sum and max of all observations plus the last
+    `window` ones, from which quantiles (p50, p90, p99) are computed when
+    metrics are read; recording an observation is a deque append under a
+    lock. Gauges are read from collector callbacks at the same time.
+
+    Metrics are rendered in the Prometheus text format, served over HTTP
+    (serve) and/or written to a file (dump), e.g. for the node_exporter
+    textfile collector.
+    """
+
+    def __init__(self, prefix: str = 'smartbot', window: int = 1024, clock: Callable[[], float] = time.perf_counter):
+        """
+        Args:
+            prefix: Prefix of every metric name
+            window: Observations per summary used for quantiles
+            clock: Time source of timers in seconds
+        """
+        self.prefix = prefix
+        self.window = window
+        self.clock = clock
+
+        self._counters: Dict[tuple, float] = {}
+        self._summaries: Dict[tuple, _Summary] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: List[Callable[[], Dict[str, float]]] = []
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def describe(self, name: str, text: str):
+        """Set the help text of a metric"""
+        self._help[name] = text
+
+    def inc(self, name: str, amount: float = 1.0, **labels):
+        """
+        Increase a counter
+
+        Args:
+            name: Counter name (without prefix), e.g. 'api_calls_total'
+            amount: Increment
+            **labels: Series labels
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        """
+        Record an observation in a summary
+
+        Args:
+            name: Summary name (without prefix), e.g. 'stage_seconds'
+            value: Observed value
+            **labels: Series labels
+        """
+        self._observe((name, tuple(sorted(labels.items()))), value)
+
+    def _observe(self, key: tuple, value: float):
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                summary = self._summaries[key] = _Summary(self.window)
+            summary.count += 1
+            summary.total += value
+            if value > summary.max:
+                summary.max = value
+            summary.window.append(value)
+
+    def timer(self, name: str, **labels) -> _Timer:
+        """
+        Context manager recording the duration of its block in a summary
+
+        Usable around awaits; concurrent blocks are timed separately.
+
+        Args:
+            name: Summary name (without prefix)
+            **labels: Series labels
+        """
+        return _Timer(self, (name, tuple(sorted(labels.items()))))
+
+    def add_collector(self, collector: Callable[[], Dict[str, float]]):
+        """
+        Add gauges read when metrics are rendered
+
+        Args:
+            collector: Returns {gauge name (without prefix): value}
+        """
+        self._collectors.append(collector)
+
+    def snapshot(self) -> dict:
+        """
+        Current values
+
+        Returns:
+            Dict with counters ((name, labels) -> value), summaries
+            ((name, labels) -> dict with count, sum, max and p50/p90/p99)
+            and gauges (name -> value)
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            summaries = {
+                key: (summary.count, summary.total, summary.max, np.array(summary.window))
+                for key, summary in self._summaries.items()
+            }
+
+        result = {'counters': counters, 'summaries': {}, 'gauges': {}}
+        for key, (count, total, maximum, window) in summaries.items():
+            values = np.quantile(window, QUANTILES) if len(window) else np.full(len(QUANTILES), np.nan)
+            entry = {'count': count, 'sum': total, 'max': maximum}
+            for quantile, value in zip(QUANTILES, values):
+                entry[f'p{round(quantile * 100)}'] = float(value)
+            result['summaries'][key] = entry
+
+        for collector in self._collectors:
+            try:
+                result['gauges'].update(collector())
+            except Exception as e:
+                logger.error("Metrics collector error: %s", e)
+
+        return result
+
+    def render(self) -> str:
+        """
+        Metrics in the Prometheus text exposition format
+
+        Returns:
+            Text with one line per sample
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def header(name: str, kind: str):
+            full_name = self.prefix + '_' + name
+            if name in self._help:
+                lines.append(f'# HELP {full_name} {self._help[name]}')
+            lines.append(f'# TYPE {full_name} {kind}')
+            return full_name
+
+        counters: Dict[str, list] = {}
+        for (name, labels), value in snapshot['counters'].items():
+            counters.setdefault(name, []).append((labels, value))
+        for name in sorted(counters):
+            full_name = header(name, 'counter')
+            for labels, value in sorted(counters[name]):
+                lines.append(f'{full_name}{_label_text(labels)} {value:g}')
+
+        summaries: Dict[str, list] = {}
+        for (name, labels), entry in snapshot['summaries'].items():
+            summaries.setdefault(name, []).append((labels, entry))
+        for name in sorted(summaries):
+            full_name = header(name, 'summary')
+            for labels, entry in sorted(summaries[name], key=lambda item: item[0]):
+                for quantile in QUANTILES:
+                    value = entry[f'p{round(quantile * 100)}']
+                    lines.append(f'{full_name}{_label_text(labels + (("quantile", quantile),))} {value:.9g}')
+                lines.append(f'{full_name}_sum{_label_text(labels)} {entry["sum"]:.9g}')
+                lines.append(f'{full_name}_count{_label_text(labels)} {entry["count"]}')
+
+            # Largest observation ever, as a gauge family of its own
+            full_name = header(name + '_max', 'gauge')
+            for labels, entry in sorted(summaries[name], key=lambda item: item[0]):
+                lines.append(f'{full_name}{_label_text(labels)} {entry["max"]:.9g}')
+
+        for name in sorted(snapshot['gauges']):
+            full_name = header(name, 'gauge')
+            lines.append(f'{full_name} {float(snapshot["gauges"][name]):.9g}')
+
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path: str):
+        """
+        Write the metrics to a file (replaced atomically)
+
+        Args:
+            path: Output file
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """
+        Serve the metrics over HTTP (GET /metrics) in a background thread
+
+        Args:
+            port: TCP port (0: any free port, see server.server_address)
+            host: Interface to listen on (local only by default)
+
+        Returns:
+            HTTP server
+        """
+        if self._server is not None:
+            return self._server
+
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug("Metrics request: " + format, *args)
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+
+        logger.info("Metrics served on http://%s:%d/metrics", *self._server.server_address[:2])
+        return self._server
+
+    def close(self):
+        """Stop the HTTP server"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# Exchange method prefixes counted as API calls
+API_PREFIXES = ('fetch_', 'create_', 'edit_', 'cancel_', 'watch_')
+
+
+class InstrumentedExchange:
+    """
+    ccxt exchange proxy counting and timing API calls
+
+    Each fetch_/create_/edit_/cancel_/watch_ method call increments
+    api_calls_total and is timed in api_seconds (labelled by method);
+    exceptions also increment api_errors_total (labelled by method and
+    exception class) and are raised again. Coroutine methods are wrapped
+    with coroutines. Wrappers are made once per method and kept on the
+    proxy. Everything else is passed through unchanged.
+    """
+
+    def __init__(self, exchange, metrics: MetricsRegistry):
+        """
+        Args:
+            exchange: ccxt exchange instance (or proxy, e.g. ScheduledExchange)
+            metrics: Registry receiving the measurements
+        """
+        self.exchange = exchange
+        self.metrics = metrics
+
+        metrics.describe('api_calls_total', 'Exchange API calls')
+        metrics.describe('api_errors_total', 'Exchange API calls that raised')
+        metrics.describe('api_seconds', 'Exchange API call duration')
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.exchange, name)
+        if not name.startswith(API_PREFIXES) or not callable(attribute):
+            return attribute
+
+        metrics = self.metrics
+
+        if inspect.iscoroutinefunction(attribute):
+            async def instrumented_coroutine(*args, **kwargs):
+                metrics.inc('api_calls_total', method=name)
+                try:
+                    with metrics.timer('api_seconds', method=name):
+                        return await attribute(*args, **kwargs)
+                except Exception as e:
+                    metrics.inc('api_errors_total', method=name, error=type(e).__name__)
+                    raise
+            setattr(self, name, instrumented_coroutine)
+            return instrumented_coroutine
+
+        def instrumented(*args, **kwargs):
+            metrics.inc('api_calls_total', method=name)
+            try:
+                with metrics.timer('api_seconds', method=name):
+                    return attribute(*args, **kwargs)
+            except Exception as e:
+                metrics.inc('api_errors_total', method=name, error=type(e).__name__)
+                raise
+        setattr(self, name, instrumented)
+        return instrumented
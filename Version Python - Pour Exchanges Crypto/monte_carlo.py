@@ -0,0 +1,494 @@
+"""
+Monte Carlo for BTCUSD SmartBot
+Strategy robustness over thousands of synthetic or resampled price paths
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import TradingConfig
+from market_generator import MarketGenerator
+
+logger = logging.getLogger(__name__)
+
+# Percentiles reported for each distribution
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Worker process state, set once by _init_worker
+_worker_data = None
+
+
+def _config_values(config) -> dict:
+    """Collect the uppercase settings of a config class or instance"""
+    return {name: getattr(config, name) for name in dir(config) if name.isupper()}
+
+
+def _ema_paths(close: np.ndarray, period: int) -> np.ndarray:
+    """EMA of each path (row), same values as TechnicalIndicators.calculate_ema"""
+    return pd.DataFrame(close.T).ewm(span=period, adjust=False).mean().to_numpy().T
+
+
+def _atr_paths(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int) -> np.ndarray:
+    """ATR of each path (row), same values as TechnicalIndicators.calculate_atr"""
+    tr = high - low
+    previous_close = close[:, :-1]
+    tr[:, 1:] = np.maximum(tr[:, 1:], np.abs(high[:, 1:] - previous_close))
+    tr[:, 1:] = np.maximum(tr[:, 1:], np.abs(low[:, 1:] - previous_close))
+    return pd.DataFrame(tr.T).rolling(window=period).mean().to_numpy().T
+
+
+def backtest_paths(
+    ohlcv: Dict[str, np.ndarray],
+    config: TradingConfig = TradingConfig,
+    initial_balance: float = 10000.0,
+    use_volatility_filter: bool = True,
+    ruin_fraction: float = 0.5
+) -> Dict[str, np.ndarray]:
+    """
+    Backtest the EMA crossover strategy on many paths at once
+
+    Same rules and results as BacktestEngine.run on each path (entries on
+    crossovers, exits on the opposite crossover, RiskManager sizing).
+    Indicators and signals are computed for all paths with array
+    operations; the position walk visits the k-th crossover of every path
+    at step k, so it loops over crossovers, not over paths.
+
+    Args:
+        ohlcv: Dict high, low, close of arrays of shape (paths, bars)
+        config: Trading configuration
+        initial_balance: Starting capital in USD
+        use_volatility_filter: Ignore signals with ATR below MIN_ATR_USD
+        ruin_fraction: Share of the initial balance at or below which a
+            path counts as ruined
+
+    Returns:
+        Dict of arrays (one value per path): final_balance, return_pct,
+        max_drawdown (% of peak realized balance), trades, win_rate, ruined
+    """
+    close = np.asarray(ohlcv['close'], dtype=np.float64)
+    paths = close.shape[0]
+
+    ema_fast = _ema_paths(close, config.FAST_EMA)
+    ema_slow = _ema_paths(close, config.SLOW_EMA)
+    atr = _atr_paths(ohlcv['high'], ohlcv['low'], close, config.ATR_PERIOD)
+
+    # Leading bars without ATR are dropped, like DataFrame.dropna() in BacktestEngine.run
+    first = min(config.ATR_PERIOD - 1, close.shape[1])
+    close, ema_fast, ema_slow, atr = close[:, first:], ema_fast[:, first:], ema_slow[:, first:], atr[:, first:]
+
+    bullish = np.zeros(close.shape, dtype=bool)
+    bearish = np.zeros(close.shape, dtype=bool)
+    bullish[:, 1:] = (ema_fast[:, :-1] <= ema_slow[:, :-1]) & (ema_fast[:, 1:] > ema_slow[:, 1:])
+    bearish[:, 1:] = (ema_fast[:, :-1] >= ema_slow[:, :-1]) & (ema_fast[:, 1:] < ema_slow[:, 1:])
+
+    # BacktestEngine starts evaluating at the third bar
+    bullish[:, :2] = False
+    bearish[:, :2] = False
+
+    # Crossovers of each path as rows padded to the largest count
+    event_path, event_bar = np.nonzero(bullish | bearish)
+    counts = np.bincount(event_path, minlength=paths)
+    rank = np.arange(len(event_path)) - np.repeat(np.cumsum(counts) - counts, counts)
+    steps = int(counts.max()) if len(event_path) else 0
+
+    def padded(values: np.ndarray, fill) -> np.ndarray:
+        table = np.full((paths, steps), fill, dtype=values.dtype)
+        table[event_path, rank] = values
+        return table
+
+    present = padded(np.ones(len(event_path), dtype=bool), False)
+    event_bullish = padded(bullish[event_path, event_bar], False)
+    event_price = padded(close[event_path, event_bar], 0.0)
+    event_distance = padded(atr[event_path, event_bar] * config.ATR_MULTIPLIER_SL, 0.0)
+    allowed = None
+    if use_volatility_filter:
+        allowed = padded(atr[event_path, event_bar] >= config.MIN_ATR_USD, False)
+
+    risk_fraction = config.RISK_PERCENT / 100.0
+    min_size = config.MIN_ORDER_SIZE
+
+    balance = np.full(paths, float(initial_balance))
+    peak = balance.copy()
+    lowest = balance.copy()
+    max_drawdown = np.zeros(paths)
+    trades = np.zeros(paths, dtype=np.int64)
+    wins = np.zeros(paths, dtype=np.int64)
+
+    in_position = np.zeros(paths, dtype=bool)
+    is_buy = np.zeros(paths, dtype=bool)
+    entry = np.zeros(paths)
+    size = np.zeros(paths)
+
+    for k in range(steps):
+        price = event_price[:, k]
+        signal_bullish = event_bullish[:, k]
+
+        # Close positions whose signal reversed
+        closing = present[:, k] & in_position & (is_buy != signal_bullish)
+        if closing.any():
+            pnl = np.where(closing, np.where(is_buy, price - entry, entry - price) * size, 0.0)
+            balance += pnl
+            trades += closing
+            wins += closing & (pnl > 0)
+            in_position &= ~closing
+
+            np.maximum(peak, balance, out=peak)
+            np.minimum(lowest, balance, out=lowest)
+            drawdown = np.where(peak > 0, (peak - balance) / np.where(peak > 0, peak, 1.0) * 100, 0.0)
+            np.maximum(max_drawdown, drawdown, out=max_drawdown)
+
+        # Open new positions (same sizing rule as RiskManager.calculate_position_size)
+        opening = present[:, k] & ~in_position & (balance > 0)
+        if allowed is not None:
+            opening &= allowed[:, k]
+        if opening.any():
+            distance = event_distance[:, k]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                sized = np.maximum(np.round(balance * risk_fraction / distance, 6), min_size)
+            sized = np.where(distance == 0, min_size, sized)
+
+            size = np.where(opening, sized, size)
+            entry = np.where(opening, price, entry)
+            is_buy = np.where(opening, signal_bullish, is_buy)
+            in_position |= opening
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        win_rate = np.where(trades > 0, wins / trades * 100, 0.0)
+
+    return {
+        'final_balance': balance,
+        'return_pct': (balance - initial_balance) / initial_balance * 100,
+        'max_drawdown': max_drawdown,
+        'trades': trades,
+        'win_rate': win_rate,
+        'ruined': lowest <= initial_balance * ruin_fraction
+    }
+
+
+def bootstrap_paths(
+    data: pd.DataFrame,
+    paths: int,
+    bars: Optional[int] = None,
+    block_size: int = 24,
+    seed=None
+) -> Dict[str, np.ndarray]:
+    """
+    Resample historical candles into new paths (moving block bootstrap)
+
+    Each path is a sequence of blocks of consecutive historical candles
+    taken at random starts, so volatility clusters and short-term
+    dependence within a block are kept. Candles are resampled as their
+    close-to-close log return and their wicks relative to their body, then
+    chained from the last historical close.
+
+    Args:
+        data: Historical DataFrame with OHLCV data
+        paths: Number of paths
+        bars: Bars per path (default: as many as the history)
+        block_size: Candles per block
+        seed: Seed (int, SeedSequence or Generator)
+
+    Returns:
+        Dict open, high, low, close, volume of arrays of shape (paths, bars)
+    """
+    open_ = data['open'].to_numpy(dtype=np.float64)
+    high = data['high'].to_numpy(dtype=np.float64)
+    low = data['low'].to_numpy(dtype=np.float64)
+    close = data['close'].to_numpy(dtype=np.float64)
+
+    returns = np.diff(np.log(close))
+    upper_wick = high[1:] / np.maximum(open_[1:], close[1:])
+    lower_wick = low[1:] / np.minimum(open_[1:], close[1:])
+    volume = data['volume'].to_numpy(dtype=np.float64)[1:]
+
+    source = len(returns)
+    if source < 1:
+        raise ValueError("Bootstrap needs at least two candles")
+    bars = bars or source
+    block_size = max(1, min(block_size, source))
+
+    rng = np.random.default_rng(seed)
+    blocks = -(-bars // block_size)
+    starts = rng.integers(0, source - block_size + 1, (paths, blocks))
+    index = (starts[:, :, None] + np.arange(block_size)).reshape(paths, -1)[:, :bars]
+
+    path_close = close[-1] * np.exp(np.cumsum(returns[index], axis=1))
+    path_open = np.empty_like(path_close)
+    path_open[:, 0] = close[-1]
+    path_open[:, 1:] = path_close[:, :-1]
+
+    return {
+        'open': path_open,
+        'high': np.maximum(path_open, path_close) * upper_wick[index],
+        'low': np.minimum(path_open, path_close) * lower_wick[index],
+        'close': path_close,
+        'volume': volume[index]
+    }
+
+
+def _init_worker(settings: dict):
+    """Keep the run settings (and bootstrap history) in a worker process"""
+    global _worker_data
+    _worker_data = settings
+
+
+def _run_batch(task: tuple) -> Dict[str, np.ndarray]:
+    """Generate and backtest one batch of paths in a worker process"""
+    seed, paths = task
+    settings = _worker_data
+
+    if settings['history'] is not None:
+        ohlcv = bootstrap_paths(
+            settings['history'], paths, settings['bars'], settings['block_size'], seed
+        )
+    else:
+        generator = MarketGenerator(seed, settings['timeframe'], settings['base_price'])
+        ohlcv = generator.ohlcv(settings['bars'], paths, settings['model'], **settings['params'])
+
+    config = type('MonteCarloConfig', (TradingConfig,), settings['config_values'])
+    return backtest_paths(
+        ohlcv,
+        config,
+        settings['initial_balance'],
+        settings['use_volatility_filter'],
+        settings['ruin_fraction']
+    )
+
+
+class MonteCarloEngine:
+    """
+    Runs the strategy over many price paths and summarizes the outcomes
+
+    Paths are generated (market_generator models) or resampled from
+    history (bootstrap_paths) in batches; each batch is backtested at once
+    with backtest_paths, and batches are spread over worker processes.
+    Batch b always uses the b-th child of SeedSequence(seed), so results
+    only depend on the seed and batch size, not on the number of workers.
+    """
+
+    def __init__(
+        self,
+        config: TradingConfig = TradingConfig,
+        initial_balance: float = 10000.0,
+        workers: Optional[int] = None,
+        batch_size: int = 500,
+        use_volatility_filter: bool = True,
+        ruin_fraction: float = 0.5
+    ):
+        """
+        Args:
+            config: Trading configuration
+            initial_balance: Starting capital in USD
+            workers: Number of worker processes (default: all CPU cores)
+            batch_size: Paths generated and backtested together
+            use_volatility_filter: Apply MIN_ATR_USD to entries
+            ruin_fraction: Share of the initial balance at or below which a
+                path counts as ruined
+        """
+        self.config = config
+        self.initial_balance = initial_balance
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.use_volatility_filter = use_volatility_filter
+        self.ruin_fraction = ruin_fraction
+
+    def run_synthetic(
+        self,
+        paths: int,
+        bars: int,
+        model: str = 'gbm',
+        seed: Optional[int] = None,
+        timeframe: str = '1h',
+        base_price: float = 45000.0,
+        **params
+    ) -> pd.DataFrame:
+        """
+        Backtest generated paths
+
+        Args:
+            paths: Number of paths
+            bars: Bars per path
+            model: Price model (see market_generator.MODELS)
+            seed: Random seed
+            timeframe: Candle timeframe
+            base_price: Price the paths start from
+            **params: Model parameters
+
+        Returns:
+            DataFrame with one row per path (see backtest_paths)
+        """
+        return self._run(paths, {
+            'history': None,
+            'bars': bars,
+            'model': model,
+            'timeframe': timeframe,
+            'base_price': base_price,
+            'params': params
+        }, seed)
+
+    def run_bootstrap(
+        self,
+        data: pd.DataFrame,
+        paths: int,
+        bars: Optional[int] = None,
+        block_size: int = 24,
+        seed: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Backtest paths resampled from historical candles
+
+        Args:
+            data: Historical DataFrame with OHLCV data
+            paths: Number of paths
+            bars: Bars per path (default: as many as the history)
+            block_size: Candles per resampled block
+            seed: Random seed
+
+        Returns:
+            DataFrame with one row per path (see backtest_paths)
+        """
+        history = data[['open', 'high', 'low', 'close', 'volume']]
+        return self._run(paths, {
+            'history': history,
+            'bars': bars,
+            'block_size': block_size
+        }, seed)
+
+    def _run(self, paths: int, source: dict, seed: Optional[int]) -> pd.DataFrame:
+        settings = {
+            **source,
+            'config_values': _config_values(self.config),
+            'initial_balance': self.initial_balance,
+            'use_volatility_filter': self.use_volatility_filter,
+            'ruin_fraction': self.ruin_fraction
+        }
+
+        sizes = [self.batch_size] * (paths // self.batch_size)
+        if paths % self.batch_size:
+            sizes.append(paths % self.batch_size)
+        tasks = list(zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+
+        workers = min(self.workers, len(tasks))
+        logger.info(f"Monte Carlo: {paths} paths in {len(tasks)} batches on {workers} workers")
+
+        if workers <= 1:
+            _init_worker(settings)
+            batches = [_run_batch(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(settings,)
+            ) as executor:
+                batches = list(executor.map(_run_batch, tasks))
+
+        if not batches:
+            return pd.DataFrame(columns=['final_balance', 'return_pct', 'max_drawdown', 'trades', 'win_rate', 'ruined'])
+        return pd.DataFrame({name: np.concatenate([batch[name] for batch in batches]) for name in batches[0]})
+
+    @staticmethod
+    def summarize(results: pd.DataFrame) -> dict:
+        """
+        Distributions of a Monte Carlo run
+
+        Args:
+            results: run_synthetic or run_bootstrap output
+
+        Returns:
+            Dict with paths, return and max_drawdown (mean, std and
+            percentiles p5 to p95), probability_of_loss (%), risk_of_ruin
+            (%) and mean_trades
+        """
+        summary = {'paths': len(results)}
+        for name, column in (('return', 'return_pct'), ('max_drawdown', 'max_drawdown')):
+            values = results[column].to_numpy(dtype=np.float64)
+            distribution = {'mean': float(values.mean()), 'std': float(values.std())}
+            for percentile, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+                distribution[f'p{percentile}'] = float(value)
+            summary[name] = distribution
+
+        summary['probability_of_loss'] = float((results['return_pct'] < 0).mean() * 100)
+        summary['risk_of_ruin'] = float(results['ruined'].mean() * 100)
+        summary['mean_trades'] = float(results['trades'].mean())
+        return summary
+
+
+def print_summary(summary: dict):
+    """Print a summarize() dict"""
+    print(f"Paths: {summary['paths']}, mean trades: {summary['mean_trades']:.1f}")
+    print(f"{'%':<14} {'mean':>8} {'std':>8}" + ''.join(f" {f'p{p}':>8}" for p in PERCENTILES))
+    for name in ('return', 'max_drawdown'):
+        distribution = summary[name]
+        print(f"{name:<14} {distribution['mean']:>8.2f} {distribution['std']:>8.2f}" + ''.join(
+            f" {distribution[f'p{p}']:>8.2f}" for p in PERCENTILES
+        ))
+    print(f"Probability of loss: {summary['probability_of_loss']:.1f}%")
+    print(f"Risk of ruin: {summary['risk_of_ruin']:.2f}%")
+
+
+def main():
+    """Command line entry point"""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Run the strategy over many price paths")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    synthetic_parser = subparsers.add_parser('synthetic', help="Generated paths (market_generator.py)")
+    synthetic_parser.add_argument('--model', default='gbm')
+    synthetic_parser.add_argument('--bars', type=int, default=4380, help="Bars per path (default: 6 months of H1)")
+    synthetic_parser.add_argument('--timeframe', default=TradingConfig.PRIMARY_TIMEFRAME)
+
+    bootstrap_parser = subparsers.add_parser('bootstrap', help="Paths resampled from the candle store history")
+    bootstrap_parser.add_argument('--bars', type=int, help="Bars per path (default: length of the history)")
+    bootstrap_parser.add_argument('--block-size', type=int, default=24)
+
+    for subparser in (synthetic_parser, bootstrap_parser):
+        subparser.add_argument('--paths', type=int, default=10000)
+        subparser.add_argument('--seed', type=int)
+        subparser.add_argument('--workers', type=int)
+        subparser.add_argument('--balance', type=float, default=10000.0)
+        subparser.add_argument('--ruin', type=float, default=0.5, help="Ruin level (share of the initial balance)")
+        subparser.add_argument('--output', help="CSV file with one row per path")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    engine = MonteCarloEngine(
+        initial_balance=args.balance,
+        workers=args.workers,
+        ruin_fraction=args.ruin
+    )
+
+    start = time.perf_counter()
+    if args.command == 'synthetic':
+        results = engine.run_synthetic(args.paths, args.bars, args.model, args.seed, args.timeframe)
+    else:
+        from candle_store import CandleStore
+        from config import ExchangeConfig
+
+        history = CandleStore(TradingConfig.CANDLE_STORE_DIR).load(
+            ExchangeConfig.EXCHANGE_NAME,
+            TradingConfig.SYMBOL,
+            TradingConfig.PRIMARY_TIMEFRAME
+        )
+        if history.empty:
+            parser.error("No stored candles to resample (see downloader.py)")
+        results = engine.run_bootstrap(history, args.paths, args.bars, args.block_size, args.seed)
+    elapsed = time.perf_counter() - start
+
+    print_summary(MonteCarloEngine.summarize(results))
+    print(f"Elapsed: {elapsed:.1f} s")
+
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"Per-path results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Parameter Sweep for BTCUSD SmartBot
+Evaluates a grid of strategy parameters in parallel with the backtest engine
+"""
+
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import METRICS, BacktestEngine
+from config import TradingConfig
+from indicators import TechnicalIndicators
+
+logger = logging.getLogger(__name__)
+
+# Worker process state, set once by _init_worker
+_worker_data = None
+
+
+def _config_values(config) -> dict:
+    """Collect the uppercase settings of a config class or instance"""
+    return {name: getattr(config, name) for name in dir(config) if name.isupper()}
+
+
+def _init_worker(
+    shm_name: str,
+    shape: tuple,
+    ema_rows: Dict[int, int],
+    atr_rows: Dict[int, int],
+    base_values: dict,
+    initial_balance: float,
+    use_volatility_filter: bool
+):
+    """Attach the shared indicator block in a worker process"""
+    global _worker_data
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+
+    _worker_data = {
+        'shm': shm,
+        'block': np.ndarray(shape, dtype=np.float64, buffer=shm.buf),
+        'ema_rows': ema_rows,
+        'atr_rows': atr_rows,
+        'base_values': base_values,
+        'initial_balance': initial_balance,
+        'use_volatility_filter': use_volatility_filter
+    }
+
+
+def _evaluate(params: dict) -> dict:
+    """Backtest one parameter combination in a worker process"""
+    data = _worker_data
+    config = type('SweepConfig', (TradingConfig,), {**data['base_values'], **params})
+    block = data['block']
+
+    # Row 0 is close, indicator rows are looked up by period
+    engine = BacktestEngine(config, data['initial_balance'], data['use_volatility_filter'])
+    result = engine.run_arrays(
+        block[0],
+        block[data['ema_rows'][config.FAST_EMA]],
+        block[data['ema_rows'][config.SLOW_EMA]],
+        block[data['atr_rows'][config.ATR_PERIOD]]
+    )
+
+    return {**params, **BacktestEngine.calculate_metrics(result)}
+
+
+class ParameterSweep:
+    """Runs the backtest for every combination of a parameter grid"""
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        config: TradingConfig = TradingConfig,
+        initial_balance: float = 10000.0,
+        workers: Optional[int] = None,
+        use_volatility_filter: bool = True
+    ):
+        """
+        Args:
+            data: DataFrame with OHLCV data (high, low, close are used)
+            config: Base configuration, grid values override it
+            initial_balance: Starting capital in USD
+            workers: Number of worker processes (default: all CPU cores)
+            use_volatility_filter: Apply MIN_ATR_USD to entries
+        """
+        self.data = data
+        self.config = config
+        self.initial_balance = initial_balance
+        self.workers = workers or os.cpu_count() or 1
+        self.use_volatility_filter = use_volatility_filter
+
+    @staticmethod
+    def expand_grid(grid: Dict[str, List]) -> List[dict]:
+        """
+        Expand a parameter grid into combinations
+
+        Args:
+            grid: Mapping of TradingConfig attribute to candidate values,
+                e.g. {'FAST_EMA': [5, 9], 'SLOW_EMA': [21, 34]}
+
+        Returns:
+            List of parameter dicts
+        """
+        for name in grid:
+            if not hasattr(TradingConfig, name):
+                raise ValueError(f"Unknown parameter: {name}")
+
+        names = list(grid)
+        return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+    def run(
+        self,
+        grid: Dict[str, List],
+        metric: str = 'roi',
+        ascending: bool = False,
+        output_path: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Evaluate every combination of the grid
+
+        Args:
+            grid: Mapping of TradingConfig attribute to candidate values
+            metric: Column to rank by (one of backtest_engine.METRICS)
+            ascending: Rank ascending (e.g. for max_drawdown)
+            output_path: Optional CSV file to write the ranked table to
+
+        Returns:
+            DataFrame with one row per combination, ranked by metric
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+
+        combinations = self.expand_grid(grid)
+        if not combinations:
+            return pd.DataFrame()
+
+        # Indicators for every period of the grid, computed once
+        base_values = _config_values(self.config)
+        ema_periods = sorted(
+            set(grid.get('FAST_EMA', [base_values['FAST_EMA']])) |
+            set(grid.get('SLOW_EMA', [base_values['SLOW_EMA']]))
+        )
+        atr_periods = sorted(set(grid.get('ATR_PERIOD', [base_values['ATR_PERIOD']])))
+
+        block = np.vstack((
+            self.data['close'].to_numpy(dtype=np.float64),
+            TechnicalIndicators.calculate_ema_matrix(self.data, ema_periods),
+            TechnicalIndicators.calculate_atr_matrix(self.data, atr_periods)
+        ))
+        ema_rows = {period: 1 + i for i, period in enumerate(ema_periods)}
+        atr_rows = {period: 1 + len(ema_periods) + i for i, period in enumerate(atr_periods)}
+
+        shm = shared_memory.SharedMemory(create=True, size=block.nbytes)
+        try:
+            shared = np.ndarray(block.shape, dtype=np.float64, buffer=shm.buf)
+            shared[:] = block
+            del block
+
+            workers = min(self.workers, len(combinations))
+            chunksize = max(1, len(combinations) // (workers * 4))
+
+            logger.info(
+                f"Sweeping {len(combinations)} combinations on {workers} workers "
+                f"({shared.shape[1]} bars)"
+            )
+
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(
+                    shm.name,
+                    shared.shape,
+                    ema_rows,
+                    atr_rows,
+                    base_values,
+                    self.initial_balance,
+                    self.use_volatility_filter
+                )
+            ) as executor:
+                rows = list(executor.map(_evaluate, combinations, chunksize=chunksize))
+
+            del shared
+        finally:
+            shm.close()
+            shm.unlink()
+
+        results = pd.DataFrame(rows)
+        results = results.sort_values(metric, ascending=ascending, ignore_index=True)
+
+        if output_path:
+            results.to_csv(output_path, index=False)
+            logger.info(f"Sweep results written to {output_path}")
+
+        return results
+
+
+if __name__ == "__main__":
+    from example_backtest import generate_sample_data
+
+    logging.basicConfig(level=logging.INFO)
+
+    sweep = ParameterSweep(generate_sample_data(days=365))
+    table = sweep.run({
+        'FAST_EMA': [5, 9, 12],
+        'SLOW_EMA': [21, 34, 55],
+        'ATR_MULTIPLIER_SL': [1.0, 1.5, 2.0],
+        'ATR_MULTIPLIER_TP': [2.0, 2.5, 3.0],
+        'MIN_ATR_USD': [0, 50, 100]
+    })
+    print(table.head(10).to_string())
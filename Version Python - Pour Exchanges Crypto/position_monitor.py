@@ -0,0 +1,287 @@
+"""
+Position Monitor for BTCUSD SmartBot
+Manages stops of open positions on every price update, apart from the bar loop
+"""
+
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+import numpy as np
+
+from risk_manager import PositionTracker
+from trailing_stop import BreakevenManager, TrailingStopManager, round_cents
+
+logger = logging.getLogger(__name__)
+
+
+class PositionMonitor:
+    """
+    Runs the breakeven and trailing stop logic on each price update
+
+    Only the latest price is kept: an update arriving while the previous
+    one is being evaluated replaces any price still waiting, so the monitor
+    never falls behind the market and the delay between a price and its
+    evaluation stays bounded by one evaluation. Runs in its own thread
+    (start) or as an asyncio task (run_async); with a price source it also
+    polls prices when no update is pushed through on_price. Nothing is
+    polled or evaluated while there is no open position. The latency of a
+    polled price is counted from its quote time, as reported by the source.
+
+    All tracker reads and writes are made under the tracker lock, which the
+    bar loop takes as well.
+    """
+
+    def __init__(
+        self,
+        tracker: PositionTracker,
+        trailing_manager: TrailingStopManager,
+        breakeven_manager: Optional[BreakevenManager] = None,
+        on_stop_update: Optional[Callable[[str, float], None]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            tracker: Tracker of the open positions
+            trailing_manager: Trailing stop logic
+            breakeven_manager: Breakeven logic (None disables it)
+            on_stop_update: Called with (position_id, new_stop) for each moved
+                stop, outside the lock (may return an awaitable in run_async)
+            clock: Monotonic time source in seconds
+        """
+        self.tracker = tracker
+        self.trailing_manager = trailing_manager
+        self.breakeven_manager = breakeven_manager
+        self.on_stop_update = on_stop_update
+        self.clock = clock
+
+        self.evaluations = 0
+        self.skipped = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+
+        self._latest: Optional[Tuple[float, float]] = None
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def evaluate(self, current_price: float) -> List[Tuple[str, float]]:
+        """
+        Apply breakeven and trailing stops of all positions at a price
+
+        Args:
+            current_price: Market price
+
+        Returns:
+            List of (position_id, new_stop) for the stops moved
+        """
+        tracker = self.tracker
+        updates = []
+
+        with tracker.lock:
+            if tracker.get_position_count() == 0:
+                return updates
+
+            ids = tracker.ids
+            entry_prices = tracker.entry_prices
+            directions = tracker.directions
+            stops = tracker.stop_losses.copy()
+            moved = np.zeros(len(ids), dtype=bool)
+
+            if self.breakeven_manager is not None:
+                triggered, breakeven_prices = self.breakeven_manager.check_batch(
+                    ids, entry_prices, current_price, directions
+                )
+                # The commission buffer is on the losing side of a short entry
+                breakeven_stops = round_cents(
+                    entry_prices + directions * (breakeven_prices - entry_prices)
+                )
+                tighter = np.where(
+                    directions == 1,
+                    breakeven_stops > stops,
+                    (breakeven_stops < stops) | (stops == 0)
+                )
+                moved = triggered & tighter & (directions != 0)
+                stops = np.where(moved, breakeven_stops, stops)
+
+            if self.trailing_manager.config.USE_TRAILING:
+                stops, trailed = self.trailing_manager.update_stops_batch(
+                    ids, entry_prices, current_price, stops, directions
+                )
+                moved |= trailed
+
+            for row in np.flatnonzero(moved).tolist():
+                tracker.update_position_stop(ids[row], float(stops[row]))
+                updates.append((ids[row], float(stops[row])))
+
+        return updates
+
+    def on_price(self, timestamp: Optional[int], price: float):
+        """
+        Push a price update (MarketFeed.on_price callback signature)
+
+        Args:
+            timestamp: Exchange time of the price in milliseconds (unused)
+            price: Market price
+        """
+        with self._condition:
+            if self._latest is not None:
+                self.skipped += 1
+            self._latest = (float(price), self.clock())
+            self._condition.notify()
+
+        if self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _take_latest(self) -> Optional[Tuple[float, float]]:
+        with self._condition:
+            latest, self._latest = self._latest, None
+            return latest
+
+    def _process(self, latest: Tuple[float, float]) -> List[Tuple[str, float]]:
+        """Evaluate a (price, received) update and record its latency"""
+        price, received = latest
+        if price <= 0 or self.tracker.get_position_count() == 0:
+            return []
+
+        updates = self.evaluate(price)
+
+        self.evaluations += 1
+        self.last_latency = self.clock() - received
+        self.max_latency = max(self.max_latency, self.last_latency)
+        return updates
+
+    def start(self, price_source: Optional[Callable[[], float]] = None, poll_interval: float = 1.0):
+        """
+        Run the monitor in a background thread
+
+        Args:
+            price_source: Function returning (market price, age of the price
+                in seconds), called when no update was pushed for poll_interval
+                seconds
+            poll_interval: Seconds between polls
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(price_source, poll_interval),
+            name='position-monitor',
+            daemon=True
+        )
+        self._thread.start()
+        logger.info("Position monitor started")
+
+    def _run(self, price_source: Optional[Callable[[], float]], poll_interval: float):
+        while self._running:
+            with self._condition:
+                if self._latest is None and self._running:
+                    self._condition.wait(poll_interval if price_source else None)
+
+            latest = self._take_latest()
+            try:
+                # Prices are only needed while positions are open
+                polling = price_source is not None and self._running
+                if latest is None and polling and self.tracker.get_position_count() > 0:
+                    price, age = price_source()
+                    latest = (price, self.clock() - age)
+                if latest is None:
+                    continue
+
+                for position_id, new_stop in self._process(latest):
+                    if self.on_stop_update is not None:
+                        self.on_stop_update(position_id, new_stop)
+            except Exception as e:
+                logger.error("Position monitor error: %s", e, exc_info=True)
+
+    async def run_async(
+        self,
+        price_source: Optional[Callable[[], Awaitable[float]]] = None,
+        poll_interval: float = 1.0
+    ):
+        """
+        Run the monitor as an asyncio task until stop() is called
+
+        Args:
+            price_source: Coroutine function returning (market price, age of
+                the price in seconds), awaited when no update was pushed for
+                poll_interval seconds
+            poll_interval: Seconds between polls
+        """
+        self._running = True
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        logger.info("Position monitor started (asyncio)")
+
+        try:
+            while self._running:
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(),
+                        poll_interval if price_source else None
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+                latest = self._take_latest()
+                try:
+                    polling = price_source is not None and self._running
+                    if latest is None and polling and self.tracker.get_position_count() > 0:
+                        price, age = await price_source()
+                        latest = (price, self.clock() - age)
+                    if latest is None:
+                        continue
+
+                    for position_id, new_stop in self._process(latest):
+                        if self.on_stop_update is not None:
+                            result = self.on_stop_update(position_id, new_stop)
+                            if inspect.isawaitable(result):
+                                await result
+                except Exception as e:
+                    logger.error("Position monitor error: %s", e, exc_info=True)
+        finally:
+            self._running = False
+            self._wakeup = None
+            self._loop = None
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """
+        Stop the thread or task
+
+        Args:
+            timeout: Seconds to wait for the thread to finish
+        """
+        self._running = False
+        with self._condition:
+            self._condition.notify_all()
+        if self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> dict:
+        """
+        Evaluation statistics
+
+        Returns:
+            Dict with evaluations, skipped (updates replaced by a newer one
+            before evaluation), last_latency and max_latency (seconds from
+            receiving a pushed price, or the quote time of a polled one, to
+            its stops being applied)
+        """
+        return {
+            'evaluations': self.evaluations,
+            'skipped': self.skipped,
+            'last_latency': self.last_latency,
+            'max_latency': self.max_latency
+        }
@@ -0,0 +1,405 @@
+"""
+Replay Benchmark for BTCUSD SmartBot
+End-to-end throughput and signal-to-order latency of the bot loop on recorded candles
+"""
+
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import (
+    RESULTS_DIR, REGRESSION_THRESHOLD, compare_results, environment,
+    load_results, print_comparison, save_results
+)
+from btc_smartbot import BTCSmartBot
+from candle_store import CandleStore, timeframe_to_ms
+from config import TradingConfig, ExchangeConfig
+from market_generator import MarketGenerator
+from metrics import QUANTILES
+from sim_exchange import SimulatedExchange
+
+logger = logging.getLogger(__name__)
+
+BASELINE_FILE = os.path.join(RESULTS_DIR, 'replay_baseline.json')
+
+# Settings replaced for replays: no disk state, no endpoint, no monitor
+# thread (it would advance the shared virtual clock), real orders
+REPLAY_OVERRIDES = {
+    'DRY_RUN': False,
+    'USE_STATE_JOURNAL': False,
+    'USE_CANDLE_STORE': False,
+    'USE_POSITION_MONITOR': False,
+    'METRICS_PORT': None,
+    'METRICS_FILE': None
+}
+
+# Default settings of the command line replay (--set overrides them). With
+# 1% risk and a 1.5 ATR stop, hourly BTC stops sit about 1% from the price,
+# so the position is worth about the whole balance and validate_trade
+# rejects every trade (50% of balance at most)
+REPLAY_SETTINGS = {
+    'RISK_PERCENT': 0.25
+}
+
+# Annual volatility of the --synthetic candles (GBM, about BTC's)
+SYNTHETIC_VOLATILITY = 0.6
+
+
+class ReplayBot(BTCSmartBot):
+    """
+    BTCSmartBot recording the latency of its market orders
+
+    The loop stops once the simulated exchange has replayed its last
+    candle. For each _place_market_order call, two delays are recorded:
+    the simulated time since the close of the candle that triggered the
+    analysis (polling interval and exchange latency, on the virtual clock)
+    and the wall time since the bot detected the new bar (processing).
+    """
+
+    def __init__(self, config, exchange: SimulatedExchange):
+        """
+        Args:
+            config: Trading configuration (see replay_config)
+            exchange: Simulated exchange replaying the candles
+        """
+        super().__init__(config, ExchangeConfig, exchange=exchange, clock=exchange.clock)
+        self.order_delays: List[float] = []
+        self.order_compute: List[float] = []
+
+    def is_new_bar(self, current_time: datetime) -> bool:
+        if self.exchange.finished:
+            self.stop()
+            return False
+        return super().is_new_bar(current_time)
+
+    def _place_market_order(self, side: str, amount: float) -> dict:
+        exchange = self.exchange
+        since_close_ms = (exchange.milliseconds() - exchange.start_ms) % exchange.timeframe_ms
+        self.order_delays.append(since_close_ms / 1000.0)
+        if self.bar_started is not None:
+            self.order_compute.append(self.metrics.clock() - self.bar_started)
+        return super()._place_market_order(side, amount)
+
+
+def replay_config(config=TradingConfig, timeframe: Optional[str] = None):
+    """
+    Configuration for a replay
+
+    Args:
+        config: Base trading configuration
+        timeframe: Primary timeframe of the replayed candles (default: config's)
+
+    Returns:
+        Subclass of config with REPLAY_OVERRIDES applied
+    """
+    values = dict(REPLAY_OVERRIDES)
+    if timeframe is not None:
+        values['PRIMARY_TIMEFRAME'] = timeframe
+    return type('ReplayConfig', (config,), values)
+
+
+def load_recorded_candles(
+    exchange_id: str,
+    symbol: str,
+    timeframe: str,
+    bars: Optional[int] = None,
+    store_dir: str = TradingConfig.CANDLE_STORE_DIR
+) -> pd.DataFrame:
+    """
+    Recorded candles of the candle store, without gaps
+
+    Args:
+        exchange_id: ccxt exchange id (e.g. 'binance')
+        symbol: Trading pair
+        timeframe: Candle timeframe
+        bars: Keep only the most recent candles
+        store_dir: Candle store directory
+
+    Returns:
+        The most recent gap-free run of stored candles (empty if none stored)
+    """
+    candles = CandleStore(store_dir).load(exchange_id, symbol, timeframe)
+    if candles.empty:
+        return candles
+
+    timestamps = candles.index.values.astype('datetime64[ms]').astype(np.int64)
+    gaps = np.flatnonzero(np.diff(timestamps) != timeframe_to_ms(timeframe))
+    if len(gaps):
+        candles = candles.iloc[gaps[-1] + 1:]
+
+    if bars is not None:
+        candles = candles.iloc[-bars:]
+    return candles
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    """
+    Distribution of latencies
+
+    Args:
+        values: Latencies in seconds
+
+    Returns:
+        Dict with count, mean, max and p50/p90/p99 (NaN without values)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        summary = {'count': 0, 'mean': float('nan'), 'max': float('nan')}
+        summary.update({f'p{round(quantile * 100)}': float('nan') for quantile in QUANTILES})
+        return summary
+
+    summary = {'count': len(values), 'mean': float(values.mean()), 'max': float(values.max())}
+    for quantile, value in zip(QUANTILES, np.quantile(values, QUANTILES)):
+        summary[f'p{round(quantile * 100)}'] = float(value)
+    return summary
+
+
+def replay(
+    candles: pd.DataFrame,
+    timeframe: str = '1h',
+    config=TradingConfig,
+    warmup_bars: int = 250,
+    latency_ms: float = 30.0,
+    initial_balance: float = 100000.0
+) -> dict:
+    """
+    Run the bot loop over candles on a simulated exchange
+
+    Args:
+        candles: OHLCV DataFrame indexed by timestamp (consecutive candles)
+        timeframe: Timeframe of the candles (the bot's primary timeframe)
+        config: Trading configuration (REPLAY_OVERRIDES are applied)
+        warmup_bars: Candles already closed when the bot starts
+        latency_ms: Simulated time taken by each exchange call
+        initial_balance: Starting quote currency balance
+
+    Returns:
+        Dict with bars (analyzed), orders, fills, wall_seconds,
+        bars_per_second, api_calls (per method), order_delay,
+        order_compute and order_latency (latency_summary() of the delay
+        since the candle close, of the processing time, and of their sum,
+        an estimate of the live latency) and stages (mean seconds per stage)
+    """
+    config = replay_config(config, timeframe)
+    exchange = SimulatedExchange(
+        candles,
+        timeframe,
+        config.SYMBOL,
+        warmup_bars=warmup_bars,
+        initial_balance={config.SYMBOL.split('/')[1]: initial_balance},
+        latency_ms=latency_ms
+    )
+    bot = ReplayBot(config, exchange)
+
+    start = time.perf_counter()
+    bot.run()
+    wall_seconds = time.perf_counter() - start
+
+    snapshot = bot.metrics.snapshot()
+    bars = int(snapshot['counters'].get(('bars_total', ()), 0))
+    stages = {
+        dict(labels)['stage']: entry['sum'] / entry['count']
+        for (name, labels), entry in snapshot['summaries'].items()
+        if name == 'stage_seconds'
+    }
+    count = min(len(bot.order_delays), len(bot.order_compute))
+
+    return {
+        'bars': bars,
+        'orders': len(bot.order_delays),
+        'fills': len(exchange.trades),
+        'wall_seconds': wall_seconds,
+        'bars_per_second': bars / wall_seconds if wall_seconds > 0 else float('inf'),
+        'api_calls': dict(exchange.calls),
+        'order_delay': latency_summary(bot.order_delays),
+        'order_compute': latency_summary(bot.order_compute),
+        'order_latency': latency_summary(
+            np.add(bot.order_delays[:count], bot.order_compute[:count])
+        ),
+        'stages': dict(sorted(stages.items()))
+    }
+
+
+def _spread(values: List[float]) -> dict:
+    """Statistics of one quantity over repeated replays (benchmarks.measure format)"""
+    values = np.asarray(values, dtype=np.float64)
+    return {
+        'number': 1,
+        'repeat': len(values),
+        'min': float(values.min()),
+        'median': float(np.median(values)),
+        'mean': float(values.mean()),
+        'stdev': float(values.std())
+    }
+
+
+def run_replay_benchmark(
+    candles: pd.DataFrame,
+    timeframe: str = '1h',
+    repeat: int = 3,
+    **kwargs
+) -> dict:
+    """
+    Replay the candles several times
+
+    Logging is disabled during the runs, as in benchmarks.run_benchmarks.
+    Each replay is deterministic, so all repeats place the same orders;
+    only the wall times vary.
+
+    Args:
+        candles: OHLCV DataFrame indexed by timestamp
+        timeframe: Timeframe of the candles
+        repeat: Number of replays
+        **kwargs: Other replay() arguments
+
+    Returns:
+        Dict with environment, runs (replay() outputs) and results in the
+        benchmarks.py format, comparable with benchmarks.compare_results:
+        replay/seconds_per_bar and the p50/p99 of replay/order_compute,
+        replay/order_delay and replay/order_latency
+
+    Raises:
+        ValueError: If the replays place no order (no latency to measure)
+    """
+    runs = []
+    previous_disable = logging.root.manager.disable
+    logging.disable(logging.CRITICAL)
+    try:
+        for _ in range(repeat):
+            run = replay(candles, timeframe, **kwargs)
+            runs.append(run)
+            print(f"replay: {run['bars']} bars in {run['wall_seconds']:.2f} s "
+                  f"({run['bars_per_second']:.0f} bars/s), {run['orders']} orders", file=sys.stderr)
+    finally:
+        logging.disable(previous_disable)
+
+    if runs[0]['orders'] == 0:
+        raise ValueError(
+            f"The replay of {runs[0]['bars']} bars placed no order, "
+            f"so no order latency was measured (check the trading settings)"
+        )
+
+    results = {
+        'replay/seconds_per_bar': _spread([run['wall_seconds'] / max(run['bars'], 1) for run in runs])
+    }
+    for name in ('order_compute', 'order_delay', 'order_latency'):
+        for quantile in ('p50', 'p99'):
+            results[f"replay/{name}_{quantile}"] = _spread([run[name][quantile] for run in runs])
+
+    for result in results.values():
+        result.update(benchmark='replay', size=len(candles))
+
+    return {'environment': environment(), 'runs': runs, 'results': results}
+
+
+def print_report(results: dict):
+    """Print the throughput and latency of a replay benchmark (run of median wall time)"""
+    runs = sorted(results['runs'], key=lambda run: run['wall_seconds'])
+    run = runs[len(runs) // 2]
+
+    print(f"Bars: {run['bars']}, orders: {run['orders']}, fills: {run['fills']}")
+    print(f"Throughput: {run['bars_per_second']:.1f} bars/s (median of {len(runs)})")
+    print(f"API calls: {', '.join(f'{method}={count}' for method, count in sorted(run['api_calls'].items()))}")
+
+    print(f"{'latency (ms)':<30} {'p50':>10} {'p90':>10} {'p99':>10} {'max':>10}")
+    for name, label in (
+        ('order_delay', 'candle close -> order (sim)'),
+        ('order_compute', 'bar detected -> order (wall)'),
+        ('order_latency', 'estimated live total')
+    ):
+        summary = run[name]
+        print(f"{label:<30} " + ' '.join(
+            f"{summary[key] * 1000:>10.3f}" for key in ('p50', 'p90', 'p99', 'max')
+        ))
+
+    print("Mean stage time (ms): " + ', '.join(
+        f"{stage}={seconds * 1000:.3f}" for stage, seconds in run['stages'].items()
+    ))
+
+
+def main() -> int:
+    """Command line entry point"""
+    import argparse
+    import ast
+
+    parser = argparse.ArgumentParser(
+        description="Replay recorded candles through the bot loop on a simulated exchange"
+    )
+    parser.add_argument('--exchange', default=ExchangeConfig.EXCHANGE_NAME, help="Exchange id of the recorded candles")
+    parser.add_argument('--symbol', default=TradingConfig.SYMBOL)
+    parser.add_argument('--timeframe', default=TradingConfig.PRIMARY_TIMEFRAME)
+    parser.add_argument('--bars', type=int, help="Replay only the most recent candles")
+    parser.add_argument('--synthetic', type=int, metavar='BARS',
+                        help="Replay generated hourly candles (GBM) instead of recorded ones")
+    parser.add_argument('--warmup', type=int, default=250, help="Candles closed before the bot starts")
+    parser.add_argument('--latency-ms', type=float, default=30.0, help="Simulated time per exchange call")
+    parser.add_argument('--set', nargs='+', default=[], metavar='NAME=VALUE',
+                        help="Trading settings to override, e.g. RISK_PERCENT=0.2 START_HOUR=0 "
+                             f"(defaults: {REPLAY_SETTINGS})")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="Results file (default: data/benchmarks/replay-<timestamp>.json)")
+    parser.add_argument('--save-baseline', action='store_true', help="Also store as the baseline")
+    parser.add_argument('--compare', nargs='?', const=BASELINE_FILE, help="Compare with a baseline")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    settings = dict(REPLAY_SETTINGS)
+    for item in args.set:
+        name, _, value = item.partition('=')
+        if not hasattr(TradingConfig, name):
+            parser.error(f"Unknown setting: {name}")
+        try:
+            settings[name] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            settings[name] = value
+    config = type('BenchmarkConfig', (TradingConfig,), settings)
+
+    if args.synthetic:
+        generator = MarketGenerator(seed=0, timeframe='1h')
+        candles, timeframe = generator.candles(args.synthetic, 'gbm', sigma=SYNTHETIC_VOLATILITY), '1h'
+    else:
+        candles, timeframe = load_recorded_candles(args.exchange, args.symbol, args.timeframe, args.bars), args.timeframe
+        if candles.empty:
+            print(f"No recorded {args.symbol} {args.timeframe} candles for {args.exchange} "
+                  f"(see downloader.py, or use --synthetic)", file=sys.stderr)
+            return 2
+
+    if len(candles) <= args.warmup:
+        print(f"Need more than {args.warmup} candles, got {len(candles)}", file=sys.stderr)
+        return 2
+
+    try:
+        current = run_replay_benchmark(
+            candles, timeframe, args.repeat, config=config, warmup_bars=args.warmup, latency_ms=args.latency_ms
+        )
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    current['settings'] = settings
+    print_report(current)
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        output = os.path.join(RESULTS_DIR, f"replay-{stamp}.json")
+    print(f"Results written to {save_results(current, output)}")
+    if args.save_baseline:
+        print(f"Baseline written to {save_results(current, BASELINE_FILE)}")
+    if not args.compare:
+        return 0
+
+    rows = compare_results(load_results(args.compare), current, args.threshold)
+    print_comparison(rows)
+
+    # Non-zero exit status for CI
+    return 1 if any(row['status'] == 'regression' for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,399 @@
+"""
+Request Scheduler for BTCUSD SmartBot
+Token bucket rate limiting with priority lanes for exchange calls
+"""
+
+import asyncio
+import contextvars
+import heapq
+import inspect
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Lane of the ScheduledExchange call running in this thread or task
+_current_lane: contextvars.ContextVar = contextvars.ContextVar('request_lane', default=None)
+
+# Lanes in priority order
+LANES = ('orders', 'tickers', 'data', 'bulk')
+
+# Lane of the ccxt methods the bot uses (other methods: see ScheduledExchange)
+METHOD_LANES = {
+    'create_order': 'orders',
+    'create_market_order': 'orders',
+    'create_limit_order': 'orders',
+    'create_stop_order': 'orders',
+    'edit_order': 'orders',
+    'cancel_order': 'orders',
+    'cancel_all_orders': 'orders',
+    'fetch_order': 'orders',
+    'fetch_open_orders': 'orders',
+    'fetch_ticker': 'tickers',
+    'fetch_tickers': 'tickers',
+    'fetch_order_book': 'tickers',
+    'fetch_ohlcv': 'data',
+    'fetch_balance': 'data',
+    'fetch_positions': 'data',
+    'fetch_my_trades': 'data',
+}
+
+
+class _Waiter:
+    """One call waiting for a token"""
+
+    __slots__ = ('lane', 'cost', 'granted', 'wake')
+
+    def __init__(self, lane: str, cost: float, wake: Callable[[], None]):
+        self.lane = lane
+        self.cost = cost
+        self.granted = False
+        self.wake = wake
+
+
+class RequestScheduler:
+    """
+    Shares the exchange request budget between call lanes
+
+    Tokens refill at a constant rate up to a burst size. Calls are granted
+    tokens strictly by lane priority, then in arrival order, so an order or
+    stop update never waits behind queued candle or history requests. The
+    bulk lane also leaves a reserve of tokens untouched, so a latency
+    critical call arriving during a download finds a token immediately.
+    A call costing more than the bucket size waits for a full bucket and
+    leaves it in debt, which delays the calls after it accordingly.
+
+    Works for threads (acquire) and asyncio tasks (acquire_async).
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float = 1.0,
+        bulk_reserve: float = 1.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            rate: Tokens added per second (unit cost calls per second)
+            burst: Bucket size (tokens)
+            bulk_reserve: Tokens the bulk lane must leave in the bucket
+            clock: Monotonic time source in seconds
+        """
+        self.rate = rate
+        self.burst = burst
+        self.bulk_reserve = min(bulk_reserve, max(burst - 1.0, 0.0))
+        self.clock = clock
+
+        self._tokens = burst
+        self._updated = clock()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+
+        self._stats = {
+            lane: {'requests': 0, 'waiting': 0, 'max_waiting': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+            for lane in LANES
+        }
+
+    @classmethod
+    def for_exchange(cls, exchange, burst: float = 1.0, **kwargs) -> 'RequestScheduler':
+        """
+        Scheduler matching the rate limit of a ccxt exchange
+
+        Args:
+            exchange: ccxt exchange instance (its rateLimit is the delay in ms per unit of cost)
+            burst: Bucket size
+            **kwargs: Other RequestScheduler arguments
+
+        Returns:
+            RequestScheduler
+        """
+        rate_limit_ms = getattr(exchange, 'rateLimit', 0) or 0
+        rate = 1000.0 / rate_limit_ms if rate_limit_ms > 0 else float('inf')
+        return cls(rate, burst, **kwargs)
+
+    def _refill(self):
+        now = self.clock()
+        if self.rate == float('inf'):
+            self._tokens = self.burst
+        else:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _grant(self):
+        """Give tokens to queued calls in priority order (lock held)"""
+        self._refill()
+
+        while self._queue:
+            _, _, waiter = self._queue[0]
+            needed = self._needed(waiter)
+            if self._tokens < needed and self.rate != float('inf'):
+                return
+
+            heapq.heappop(self._queue)
+            self._tokens -= waiter.cost
+            waiter.granted = True
+            waiter.wake()
+
+    def _next_token_delay(self) -> float:
+        """Seconds until the first queued call can be granted (lock held)"""
+        if not self._queue:
+            return 0.0
+
+        return max(self._needed(self._queue[0][2]) - self._tokens, 0.0) / self.rate
+
+    def _needed(self, waiter: _Waiter) -> float:
+        """Tokens that must be available to grant a call (at most a full bucket)"""
+        needed = min(waiter.cost, self.burst)
+        if waiter.lane == 'bulk':
+            needed = min(needed + self.bulk_reserve, self.burst)
+        return needed
+
+    def _enqueue(self, lane: str, cost: float, wake: Callable[[], None]) -> _Waiter:
+        if lane not in self._stats:
+            raise ValueError(f"Unknown lane: {lane}")
+
+        waiter = _Waiter(lane, cost, wake)
+        heapq.heappush(self._queue, (LANES.index(lane), next(self._sequence), waiter))
+
+        stats = self._stats[lane]
+        stats['waiting'] += 1
+        stats['max_waiting'] = max(stats['max_waiting'], stats['waiting'])
+        return waiter
+
+    def _record(self, lane: str, waited: float):
+        stats = self._stats[lane]
+        stats['waiting'] -= 1
+        stats['requests'] += 1
+        stats['total_wait'] += waited
+        stats['max_wait'] = max(stats['max_wait'], waited)
+
+        if waited > 1.0:
+            logger.debug(f"{lane} call waited {waited:.2f}s for the rate limit")
+
+    def acquire(self, lane: str = 'data', cost: float = 1.0):
+        """
+        Block until a call may be sent
+
+        Args:
+            lane: 'orders', 'tickers', 'data' or 'bulk'
+            cost: Tokens used by the call
+        """
+        start = self.clock()
+
+        with self._condition:
+            waiter = self._enqueue(lane, cost, self._condition.notify_all)
+            while True:
+                self._grant()
+                if waiter.granted:
+                    break
+                self._condition.wait(self._next_token_delay())
+
+            self._record(lane, self.clock() - start)
+
+    async def acquire_async(self, lane: str = 'data', cost: float = 1.0):
+        """
+        Wait until a call may be sent
+
+        Args:
+            lane: 'orders', 'tickers', 'data' or 'bulk'
+            cost: Tokens used by the call
+        """
+        start = self.clock()
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+
+        def wake():
+            loop.call_soon_threadsafe(event.set)
+
+        with self._lock:
+            waiter = self._enqueue(lane, cost, wake)
+
+        try:
+            while True:
+                with self._lock:
+                    self._grant()
+                    if waiter.granted:
+                        break
+                    delay = self._next_token_delay()
+
+                try:
+                    await asyncio.wait_for(event.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                event.clear()
+        except asyncio.CancelledError:
+            with self._lock:
+                if not waiter.granted:
+                    self._queue = [entry for entry in self._queue if entry[2] is not waiter]
+                    heapq.heapify(self._queue)
+                    self._stats[lane]['waiting'] -= 1
+            raise
+
+        with self._lock:
+            self._record(lane, self.clock() - start)
+
+    def metrics(self) -> Dict[str, dict]:
+        """
+        Queue and wait statistics per lane
+
+        Returns:
+            Dict lane -> requests, waiting (current queue depth), max_waiting,
+            avg_wait and max_wait (seconds)
+        """
+        with self._lock:
+            return {
+                lane: {
+                    'requests': stats['requests'],
+                    'waiting': stats['waiting'],
+                    'max_waiting': stats['max_waiting'],
+                    'avg_wait': stats['total_wait'] / stats['requests'] if stats['requests'] else 0.0,
+                    'max_wait': stats['max_wait']
+                }
+                for lane, stats in self._stats.items()
+            }
+
+
+def serialize_requests(exchange, lock: Optional[threading.Lock] = None) -> threading.Lock:
+    """
+    Send the HTTP requests of a sync ccxt exchange one at a time
+
+    A sync ccxt instance keeps one HTTP session, which is not thread safe,
+    and the bot loop, the position monitor and the stop dispatcher threads
+    share it. Only the request itself (the exchange's fetch) is made under
+    the lock: waiting for rate limit tokens does not hold it, so an order
+    call is never stuck behind a throttled download.
+
+    Args:
+        exchange: Sync ccxt exchange instance
+        lock: Lock to use (default: a new one)
+
+    Returns:
+        The lock
+    """
+    lock = lock or threading.Lock()
+    request = exchange.fetch
+
+    def fetch(*args, **kwargs):
+        with lock:
+            return request(*args, **kwargs)
+
+    exchange.fetch = fetch
+    return lock
+
+
+class ScheduledExchange:
+    """
+    ccxt exchange proxy sending every API call through a RequestScheduler
+
+    Methods are assigned a lane from METHOD_LANES, then by prefix (create_,
+    cancel_, edit_: orders; other fetch_: data). A proxy created with
+    with_lane() sends all its calls through one lane, e.g. 'bulk' for
+    history downloads. Coroutine methods (ccxt.async_support) are wrapped
+    with coroutines. Everything else is passed through unchanged.
+
+    On a ccxt exchange, the scheduler replaces ccxt's throttle: each HTTP
+    request is charged its ccxt cost (the endpoint weight, see
+    calculate_rate_limiter_cost) in the lane of the proxy call that made
+    it, so heavy endpoints use more of the budget and requests ccxt makes
+    on its own (load_markets) are throttled too, in the data lane. Other
+    exchange objects are charged one token per call.
+    """
+
+    def __init__(self, exchange, scheduler: Optional[RequestScheduler] = None, lane: Optional[str] = None):
+        """
+        Args:
+            exchange: ccxt exchange instance (rate limiting is enabled on it,
+                with the scheduler as its throttle)
+            scheduler: Shared scheduler (default: one matching the exchange rateLimit)
+            lane: Lane for all calls (default: per method)
+        """
+        self.exchange = exchange
+        self.scheduler = scheduler or RequestScheduler.for_exchange(exchange)
+        self.lane = lane
+        self._throttled = self._install_throttle()
+
+    def _install_throttle(self) -> bool:
+        """
+        Make the scheduler the throttle of a ccxt exchange
+
+        Returns:
+            True if the exchange requests are charged by cost through its throttle
+        """
+        exchange = self.exchange
+        if not callable(getattr(exchange, 'fetch2', None)) or not callable(getattr(exchange, 'throttle', None)):
+            return False
+        if getattr(exchange, '_request_scheduler', None) is self.scheduler:
+            return True
+
+        scheduler = self.scheduler
+
+        if inspect.iscoroutinefunction(exchange.throttle):
+            async def throttle(cost=None):
+                await scheduler.acquire_async(_current_lane.get() or 'data', 1.0 if cost is None else cost)
+        else:
+            def throttle(cost=None):
+                scheduler.acquire(_current_lane.get() or 'data', 1.0 if cost is None else cost)
+
+        exchange.throttle = throttle
+        exchange.enableRateLimit = True
+        exchange._request_scheduler = scheduler
+        return True
+
+    def with_lane(self, lane: str) -> 'ScheduledExchange':
+        """Proxy of the same exchange and scheduler using a single lane"""
+        return ScheduledExchange(self.exchange, self.scheduler, lane)
+
+    def _lane_of(self, name: str) -> Optional[str]:
+        if name in METHOD_LANES:
+            return METHOD_LANES[name]
+        if name.startswith(('create_', 'cancel_', 'edit_')):
+            return 'orders'
+        if name.startswith('fetch_'):
+            return 'data'
+        return None
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.exchange, name)
+
+        method_lane = self._lane_of(name)
+        if method_lane is None or not callable(attribute):
+            return attribute
+
+        lane = self.lane or method_lane
+        scheduler = self.scheduler
+
+        if self._throttled:
+            # Tokens are taken per HTTP request by the throttle, in this lane
+            if inspect.iscoroutinefunction(attribute):
+                async def laned_coroutine(*args, **kwargs):
+                    token = _current_lane.set(lane)
+                    try:
+                        return await attribute(*args, **kwargs)
+                    finally:
+                        _current_lane.reset(token)
+                return laned_coroutine
+
+            def laned(*args, **kwargs):
+                token = _current_lane.set(lane)
+                try:
+                    return attribute(*args, **kwargs)
+                finally:
+                    _current_lane.reset(token)
+            return laned
+
+        if inspect.iscoroutinefunction(attribute):
+            async def scheduled_coroutine(*args, **kwargs):
+                await scheduler.acquire_async(lane)
+                return await attribute(*args, **kwargs)
+            return scheduled_coroutine
+
+        def scheduled(*args, **kwargs):
+            scheduler.acquire(lane)
+            return attribute(*args, **kwargs)
+        return scheduled
@@ -4,11 +4,18 @@ Handles position sizing, risk calculation, and capital management
 """
 
 import logging
-from typing import Tuple, Optional
+import threading
+from typing import Dict, Tuple, Optional, Union
+
+import numpy as np
+
 from config import TradingConfig
 
 logger = logging.getLogger(__name__)
 
+# Sign of the P&L per unit of price move
+_DIRECTIONS = {'buy': 1, 'sell': -1}
+
 
 class RiskManager:
     """Manages trading risk and position sizing"""
@@ -58,14 +65,14 @@ class RiskManager:
         # Ensure minimum size
         if position_size < self.min_order_size:
             logger.warning(
-                f"Calculated position size {position_size} below minimum "
-                f"{self.min_order_size}, adjusting"
+                "Calculated position size %s below minimum %s, adjusting",
+                position_size, self.min_order_size
             )
             position_size = self.min_order_size
 
         logger.info(
-            f"Position size calculated: {position_size} BTC "
-            f"(Risk: ${risk_amount:.2f}, Distance: ${price_distance:.2f})"
+            "Position size calculated: %s BTC (Risk: $%.2f, Distance: $%.2f)",
+            position_size, risk_amount, price_distance
         )
 
         return position_size
@@ -197,10 +204,84 @@ class RiskManager:
 
 
 class PositionTracker:
-    """Tracks open positions and their performance"""
+    """
+    Tracks open positions and their performance
+
+    Positions are stored column-wise in NumPy arrays with an id -> row
+    index, so the P&L of every open position is computed in one vectorized
+    call per price update (calculate_all_pnl). The dict based methods are
+    kept for single positions.
+
+    The methods are thread safe. Callers reading the column views (ids,
+    entry_prices, ...) while another thread may modify positions should
+    hold the lock for as long as they use them.
+    """
+
+    _FLOAT_COLUMNS = (
+        'entry_price', 'size', 'stop_loss', 'take_profit', 'highest_profit', 'lowest_profit'
+    )
 
-    def __init__(self):
-        self.positions = {}
+    def __init__(self, capacity: int = 16):
+        """
+        Args:
+            capacity: Initial number of rows (grows as needed)
+        """
+        self._count = 0
+        self._columns = {name: np.zeros(capacity) for name in self._FLOAT_COLUMNS}
+        self._columns['direction'] = np.zeros(capacity, dtype=np.int8)
+        self._columns['symbol_code'] = np.zeros(capacity, dtype=np.int32)
+
+        self._ids = []
+        self._types = []
+        self._index = {}
+        self._symbol_codes = {}
+        self._symbols = []
+        self.lock = threading.RLock()
+
+        # StateJournal recording position changes (attached by the bot)
+        self.journal = None
+
+    def _grow(self):
+        """Double the row capacity"""
+        for name, column in self._columns.items():
+            grown = np.zeros(len(column) * 2, dtype=column.dtype)
+            grown[:self._count] = column[:self._count]
+            self._columns[name] = grown
+
+    def _column(self, name: str) -> np.ndarray:
+        """View of a column over the open positions"""
+        return self._columns[name][:self._count]
+
+    @property
+    def ids(self) -> list:
+        """Position ids in row order"""
+        return list(self._ids)
+
+    @property
+    def types(self) -> list:
+        """Position types ('buy', 'sell') in row order"""
+        return list(self._types)
+
+    @property
+    def entry_prices(self) -> np.ndarray:
+        return self._column('entry_price')
+
+    @property
+    def sizes(self) -> np.ndarray:
+        return self._column('size')
+
+    @property
+    def stop_losses(self) -> np.ndarray:
+        return self._column('stop_loss')
+
+    @property
+    def take_profits(self) -> np.ndarray:
+        return self._column('take_profit')
+
+    @property
+    def directions(self) -> np.ndarray:
+        """1 for buy, -1 for sell, 0 for an unknown position type"""
+        return self._column('direction')
 
     def add_position(
         self,
@@ -213,41 +294,103 @@ class PositionTracker:
         take_profit: float
     ):
         """Add a new position to tracker"""
-        self.positions[position_id] = {
-            'symbol': symbol,
-            'type': position_type,
-            'entry_price': entry_price,
-            'size': size,
-            'stop_loss': stop_loss,
-            'take_profit': take_profit,
-            'highest_profit': 0.0,
-            'lowest_profit': 0.0
-        }
-        logger.info(f"Position {position_id} added: {position_type} {size} @ {entry_price}")
+        with self.lock:
+            if position_id in self._index:
+                self.remove_position(position_id)
+
+            if self._count == len(self._columns['entry_price']):
+                self._grow()
+
+            if symbol not in self._symbol_codes:
+                self._symbol_codes[symbol] = len(self._symbols)
+                self._symbols.append(symbol)
+
+            row = self._count
+            columns = self._columns
+            columns['entry_price'][row] = entry_price
+            columns['size'][row] = size
+            columns['stop_loss'][row] = stop_loss
+            columns['take_profit'][row] = take_profit
+            columns['highest_profit'][row] = 0.0
+            columns['lowest_profit'][row] = 0.0
+            columns['direction'][row] = _DIRECTIONS.get(position_type.lower(), 0)
+            columns['symbol_code'][row] = self._symbol_codes[symbol]
+
+            self._ids.append(position_id)
+            self._types.append(position_type)
+            self._index[position_id] = row
+            self._count += 1
+
+            if self.journal is not None:
+                self.journal.record(
+                    'open', position_id,
+                    symbol=symbol, type=position_type, entry_price=entry_price, size=size,
+                    stop_loss=stop_loss, take_profit=take_profit
+                )
+
+            logger.info("Position %s added: %s %s @ %s", position_id, position_type, size, entry_price)
 
     def remove_position(self, position_id: str):
         """Remove position from tracker"""
-        if position_id in self.positions:
-            del self.positions[position_id]
-            logger.info(f"Position {position_id} removed")
+        with self.lock:
+            row = self._index.pop(position_id, None)
+            if row is None:
+                return
+
+            # Shift the following rows up to keep insertion order
+            last = self._count - 1
+            for column in self._columns.values():
+                column[row:last] = column[row + 1:self._count]
+            del self._ids[row]
+            del self._types[row]
+            for moved in self._ids[row:]:
+                self._index[moved] -= 1
+            self._count -= 1
+
+            if self.journal is not None:
+                self.journal.record('close', position_id)
+
+            logger.info("Position %s removed", position_id)
 
     def update_position_stop(self, position_id: str, new_stop: float):
         """Update stop loss for a position"""
-        if position_id in self.positions:
-            self.positions[position_id]['stop_loss'] = new_stop
-            logger.info(f"Position {position_id} stop updated to {new_stop}")
+        with self.lock:
+            row = self._index.get(position_id)
+            if row is not None:
+                self._columns['stop_loss'][row] = new_stop
+                if self.journal is not None:
+                    self.journal.record('stop', position_id, stop_loss=new_stop)
+                logger.info("Position %s stop updated to %s", position_id, new_stop)
+
+    def _position_dict(self, row: int) -> dict:
+        columns = self._columns
+        return {
+            'symbol': self._symbols[columns['symbol_code'][row]],
+            'type': self._types[row],
+            'entry_price': float(columns['entry_price'][row]),
+            'size': float(columns['size'][row]),
+            'stop_loss': float(columns['stop_loss'][row]),
+            'take_profit': float(columns['take_profit'][row]),
+            'highest_profit': float(columns['highest_profit'][row]),
+            'lowest_profit': float(columns['lowest_profit'][row])
+        }
 
     def get_position(self, position_id: str) -> Optional[dict]:
-        """Get position details"""
-        return self.positions.get(position_id)
+        """Get position details (a snapshot)"""
+        with self.lock:
+            row = self._index.get(position_id)
+            if row is None:
+                return None
+            return self._position_dict(row)
 
     def get_all_positions(self) -> dict:
-        """Get all tracked positions"""
-        return self.positions
+        """Get all tracked positions (snapshots keyed by id)"""
+        with self.lock:
+            return {position_id: self._position_dict(row) for row, position_id in enumerate(self._ids)}
 
     def get_position_count(self) -> int:
         """Get number of open positions"""
-        return len(self.positions)
+        return self._count
 
     def calculate_position_pnl(
         self,
@@ -264,28 +407,71 @@ class PositionTracker:
         Returns:
             P&L in USD or None if position not found
         """
-        position = self.get_position(position_id)
-        if not position:
-            return None
-
-        entry_price = position['entry_price']
-        size = position['size']
-        pos_type = position['type']
-
-        if pos_type.lower() == 'buy':
-            pnl = (current_price - entry_price) * size
-        elif pos_type.lower() == 'sell':
-            pnl = (entry_price - current_price) * size
-        else:
-            return None
-
-        # Track highest/lowest profit
-        if pnl > position['highest_profit']:
-            position['highest_profit'] = pnl
-        if pnl < position['lowest_profit']:
-            position['lowest_profit'] = pnl
-
-        return pnl
+        with self.lock:
+            row = self._index.get(position_id)
+            if row is None:
+                return None
+
+            columns = self._columns
+            direction = columns['direction'][row]
+            if direction == 0:
+                return None
+
+            pnl = float((current_price - columns['entry_price'][row]) * columns['size'][row] * direction)
+
+            # Track highest/lowest profit
+            if pnl > columns['highest_profit'][row]:
+                columns['highest_profit'][row] = pnl
+            if pnl < columns['lowest_profit'][row]:
+                columns['lowest_profit'][row] = pnl
+
+            return pnl
+
+    def calculate_all_pnl(self, current_price: Union[float, Dict[str, float]]) -> dict:
+        """
+        Calculate P&L of every open position in one pass
+
+        Also updates the highest/lowest profit of each position.
+
+        Args:
+            current_price: Market price, or dict symbol -> price when
+                positions span several symbols
+
+        Returns:
+            Dict with ids (list) and NumPy arrays pnl, pnl_pct,
+            highest_profit and lowest_profit, aligned with ids (NaN for
+            positions of unknown type or without a price)
+        """
+        with self.lock:
+            count = self._count
+            entry = self._column('entry_price')
+            size = self._column('size')
+            direction = self._column('direction')
+
+            if isinstance(current_price, dict):
+                prices = np.array([current_price.get(symbol, np.nan) for symbol in self._symbols])
+                price = prices[self._column('symbol_code')] if len(prices) else np.empty(0)
+            else:
+                price = current_price
+
+            pnl = (price - entry) * size * direction
+            pnl[direction == 0] = np.nan
+
+            highest = self._column('highest_profit')
+            lowest = self._column('lowest_profit')
+            np.fmax(highest, pnl, out=highest)
+            np.fmin(lowest, pnl, out=lowest)
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                pnl_pct = pnl / (entry * size) * 100
+
+            return {
+                'ids': list(self._ids[:count]),
+                'pnl': pnl,
+                'pnl_pct': pnl_pct,
+                'highest_profit': highest.copy(),
+                'lowest_profit': lowest.copy()
+            }
 
     def is_max_positions_reached(self, max_positions: int) -> bool:
         """Check if maximum number of positions is reached"""
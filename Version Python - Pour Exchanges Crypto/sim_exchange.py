@@ -0,0 +1,754 @@
+"""
+Simulated Exchanges for BTCUSD SmartBot
+Local stand-ins for ccxt exchanges, for tests, replays and offline tools
+"""
+
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import ccxt
+import numpy as np
+import pandas as pd
+
+from candle_store import ohlcv_to_frame, timeframe_to_ms
+from clock import VirtualClock
+from timeframe_aggregator import bucket_start
+
+# Path points inside a candle (fractions of its duration)
+_PATH_POINTS = np.array([0.0, 1 / 3, 2 / 3, 1.0])
+
+
+class SyntheticCandleExchange:
+    """
+    Serves deterministic synthetic candles through the ccxt fetch_ohlcv API
+
+    Any time range can be requested and always returns the same candles, so
+    paging, resuming and concurrent downloads can be checked against a
+    known series without network access.
+    """
+
+    id = 'synthetic'
+
+    def __init__(
+        self,
+        base_price: float = 45000.0,
+        max_limit: int = 1000,
+        rate_limit: int = 0,
+        now_ms: Optional[int] = None,
+        fail_after: Optional[int] = None
+    ):
+        """
+        Args:
+            base_price: Price level of the series
+            max_limit: Maximum candles returned per call (like an exchange page size)
+            rate_limit: Milliseconds between calls (ccxt rateLimit attribute)
+            now_ms: Frozen exchange time in milliseconds (default: wall clock)
+            fail_after: Raise an error after this many calls (interrupt simulation)
+        """
+        self.base_price = base_price
+        self.max_limit = max_limit
+        self.rateLimit = rate_limit
+        self.now_ms = now_ms
+        self.fail_after = fail_after
+
+        self.call_count = 0
+        self._lock = threading.Lock()
+
+    def milliseconds(self) -> int:
+        """Exchange time in milliseconds"""
+        if self.now_ms is not None:
+            return self.now_ms
+        return int(time.time() * 1000)
+
+    def candles(self, timestamps: np.ndarray, timeframe_ms: int) -> List[list]:
+        """
+        Synthetic candles for the given open times
+
+        Args:
+            timestamps: Candle open times in milliseconds
+            timeframe_ms: Candle duration in milliseconds
+
+        Returns:
+            OHLCV rows
+        """
+        index = timestamps // timeframe_ms
+        scale = timeframe_ms / 3600000.0
+
+        def price(i):
+            return self.base_price * (
+                1.0
+                + 0.05 * np.sin(2 * np.pi * i * scale / 500.0)
+                + 0.01 * np.sin(2 * np.pi * i * scale / 37.0)
+            )
+
+        close = price(index + 1)
+        open_ = price(index)
+        noise = np.abs(np.sin(index * 12.9898) * 43758.5453) % 1.0
+        high = np.maximum(open_, close) + noise * 0.002 * self.base_price
+        low = np.minimum(open_, close) - (1.0 - noise) * 0.002 * self.base_price
+        volume = 100.0 + noise * 900.0
+
+        return [
+            [int(t), float(o), float(h), float(lo), float(c), float(v)]
+            for t, o, h, lo, c, v in zip(timestamps, open_, high, low, close, volume)
+        ]
+
+    def fetch_ohlcv(
+        self,
+        symbol: str,
+        timeframe: str = '1m',
+        since: Optional[int] = None,
+        limit: Optional[int] = None,
+        params: Optional[dict] = None
+    ) -> List[list]:
+        """ccxt-compatible OHLCV fetch (the last candle may still be forming)"""
+        with self._lock:
+            self.call_count += 1
+            if self.fail_after is not None and self.call_count > self.fail_after:
+                raise ConnectionError("Synthetic exchange interrupted")
+
+        tf_ms = timeframe_to_ms(timeframe)
+        limit = min(limit or self.max_limit, self.max_limit)
+        current = (self.milliseconds() // tf_ms) * tf_ms
+
+        if since is None:
+            start = current - (limit - 1) * tf_ms
+        else:
+            start = -(-since // tf_ms) * tf_ms
+
+        end = min(start + (limit - 1) * tf_ms, current)
+        if end < start:
+            return []
+
+        return self.candles(np.arange(start, end + 1, tf_ms, dtype=np.int64), tf_ms)
+
+
+class SimulatedExchange:
+    """
+    In-process exchange replaying a candle series through the ccxt API
+
+    Implements the methods the bot uses: fetch_ohlcv, fetch_ticker,
+    fetch_balance, create_market_order and create_order (market, limit and
+    stop market orders), plus fetch_order, fetch_open_orders, edit_order,
+    edit_orders (batch) and cancel_order. Time comes from a clock, normally
+    a VirtualClock, so the replay runs faster than real time.
+
+    Inside a candle the price moves in straight lines from open to low to
+    high to close (open, high, low, close for a bearish candle), so the
+    current price, the forming candle and stop triggers all follow from the
+    series and the clock. Every call takes latency_ms of clock time, during
+    which the market moves. Market orders fill at the touch plus slippage,
+    with partial_fill_ratio of the amount filled at once and the rest at
+    the price of the next call. Selling more than held goes short (margin
+    account), buying needs enough quote currency.
+    """
+
+    id = 'simulated'
+    rateLimit = 0
+    has = {'editOrder': True, 'editOrders': True}
+
+    def __init__(
+        self,
+        candles: pd.DataFrame,
+        timeframe: str = '1h',
+        symbol: str = 'BTC/USD',
+        clock=None,
+        warmup_bars: int = 250,
+        initial_balance: Optional[Dict[str, float]] = None,
+        spread: float = 1.0,
+        slippage_percent: float = 0.0,
+        fee_percent: float = 0.1,
+        partial_fill_ratio: float = 1.0,
+        latency_ms: float = 0.0,
+        latency_jitter_ms: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            candles: OHLCV DataFrame indexed by timestamp (recorded or synthetic)
+            timeframe: Timeframe of the candles; fetch_ohlcv serves multiples of it
+            symbol: Traded pair, e.g. 'BTC/USD'
+            clock: Time source (default: VirtualClock at the end of the warmup bars)
+            warmup_bars: Candles already closed at the default start time
+            initial_balance: Free balance per currency (default: 10000 quote currency)
+            spread: Ask minus bid
+            slippage_percent: Adverse price move applied to market and stop fills
+            fee_percent: Fee on the cost of each fill, paid in quote currency
+            partial_fill_ratio: Share of a market order filled immediately
+            latency_ms: Clock time taken by each call
+            latency_jitter_ms: Random extra latency, uniform in [0, jitter]
+            seed: Random seed for the latency jitter
+        """
+        self.timeframe = timeframe
+        self.timeframe_ms = timeframe_to_ms(timeframe)
+        self.symbol = symbol
+        self.base, self.quote = symbol.split('/')
+
+        self.timestamps = candles.index.values.astype('datetime64[ms]').astype(np.int64)
+        self.opens = candles['open'].to_numpy(dtype=np.float64)
+        self.highs = candles['high'].to_numpy(dtype=np.float64)
+        self.lows = candles['low'].to_numpy(dtype=np.float64)
+        self.closes = candles['close'].to_numpy(dtype=np.float64)
+        self.volumes = candles['volume'].to_numpy(dtype=np.float64)
+
+        if len(self.timestamps) == 0:
+            raise ValueError("SimulatedExchange needs at least one candle")
+        if np.any(np.diff(self.timestamps) != self.timeframe_ms):
+            raise ValueError(f"Candles must be consecutive {timeframe} candles")
+
+        self.start_ms = int(self.timestamps[0])
+        self.end_ms = int(self.timestamps[-1]) + self.timeframe_ms
+
+        if clock is None:
+            warmup = min(warmup_bars, len(self.timestamps))
+            clock = VirtualClock(self.start_ms + warmup * self.timeframe_ms)
+        self.clock = clock
+
+        self.spread = spread
+        self.slippage = slippage_percent / 100.0
+        self.fee_rate = fee_percent / 100.0
+        self.partial_fill_ratio = partial_fill_ratio
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self._rng = np.random.default_rng(seed)
+
+        self.balances = {self.base: 0.0, self.quote: 0.0}
+        self.balances.update(initial_balance or {self.quote: 10000.0})
+
+        self.orders: Dict[str, dict] = {}
+        self.trades: List[dict] = []
+        self.calls: Dict[str, int] = {}
+        self._order_ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    @classmethod
+    def synthetic(
+        cls,
+        bars: int,
+        timeframe: str = '1h',
+        start_ms: int = 1_700_000_000_000,
+        base_price: float = 45000.0,
+        **kwargs
+    ) -> 'SimulatedExchange':
+        """
+        Exchange replaying the deterministic SyntheticCandleExchange series
+
+        Args:
+            bars: Number of candles
+            timeframe: Candle timeframe
+            start_ms: Open time of the first candle
+            base_price: Price level of the series
+            **kwargs: Other SimulatedExchange arguments
+
+        Returns:
+            SimulatedExchange
+        """
+        tf_ms = timeframe_to_ms(timeframe)
+        start_ms = start_ms // tf_ms * tf_ms
+        timestamps = start_ms + np.arange(bars, dtype=np.int64) * tf_ms
+        rows = SyntheticCandleExchange(base_price).candles(timestamps, tf_ms)
+        return cls(ohlcv_to_frame(rows), timeframe, **kwargs)
+
+    # Price path
+
+    @property
+    def finished(self) -> bool:
+        """True once the clock has passed the last candle"""
+        return self.clock.milliseconds() >= self.end_ms
+
+    def _vertices(self, index: int) -> np.ndarray:
+        """Path prices at 0, 1/3, 2/3 and 1 of a candle"""
+        if self.closes[index] >= self.opens[index]:
+            return np.array([self.opens[index], self.lows[index], self.highs[index], self.closes[index]])
+        return np.array([self.opens[index], self.highs[index], self.lows[index], self.closes[index]])
+
+    def _locate(self, timestamp_ms: float) -> Tuple[int, float]:
+        """(candle index, position inside the candle in [0, 1)) of a time"""
+        offset = timestamp_ms - self.start_ms
+        if offset < 0:
+            return 0, 0.0
+        if timestamp_ms >= self.end_ms:
+            return len(self.timestamps) - 1, 1.0
+
+        index = int(offset // self.timeframe_ms)
+        return index, (offset - index * self.timeframe_ms) / self.timeframe_ms
+
+    def price_at(self, timestamp_ms: float) -> float:
+        """
+        Traded price at a time
+
+        Args:
+            timestamp_ms: Time in milliseconds
+
+        Returns:
+            Price on the path of the candle containing the time
+        """
+        index, fraction = self._locate(timestamp_ms)
+        return float(np.interp(fraction, _PATH_POINTS, self._vertices(index)))
+
+    def _forming_candle(self, index: int, fraction: float) -> list:
+        """The candle at index as seen at a position inside it"""
+        vertices = self._vertices(index)
+        seen = np.append(vertices[_PATH_POINTS <= fraction], np.interp(fraction, _PATH_POINTS, vertices))
+        return [
+            int(self.timestamps[index]),
+            float(self.opens[index]),
+            float(seen.max()),
+            float(seen.min()),
+            float(seen[-1]),
+            float(self.volumes[index] * fraction)
+        ]
+
+    def _path_range(self, start_ms: float, end_ms: float) -> Tuple[float, float]:
+        """(lowest, highest) price on the path between two times"""
+        first, first_fraction = self._locate(start_ms)
+        last, last_fraction = self._locate(end_ms)
+
+        prices = [self.price_at(start_ms), self.price_at(end_ms)]
+
+        if first == last:
+            inside = (_PATH_POINTS > first_fraction) & (_PATH_POINTS < last_fraction)
+            prices.extend(self._vertices(first)[inside])
+        else:
+            prices.extend(self._vertices(first)[_PATH_POINTS > first_fraction])
+            prices.extend(self._vertices(last)[_PATH_POINTS < last_fraction])
+            if last > first + 1:
+                prices.append(self.lows[first + 1:last].min())
+                prices.append(self.highs[first + 1:last].max())
+
+        return float(min(prices)), float(max(prices))
+
+    # Order matching
+
+    def _delay(self) -> float:
+        """Latency of one call in seconds"""
+        latency = self.latency_ms
+        if self.latency_jitter_ms > 0:
+            latency += self._rng.uniform(0.0, self.latency_jitter_ms)
+        return latency / 1000.0
+
+    def _begin(self, method: str):
+        """Account for a call reaching the exchange (lock held)"""
+        self.calls[method] = self.calls.get(method, 0) + 1
+        self.process()
+
+    def process(self):
+        """Fill the orders the price path has reached since they were last checked"""
+        with self._lock:
+            now = self.clock.milliseconds()
+
+            for order in list(self.orders.values()):
+                if order['status'] != 'open':
+                    continue
+
+                if order['type'] == 'market':
+                    # Remainder of a partially filled market order
+                    self._fill(order, order['remaining'], self._market_price(order['side'], now), now)
+                    continue
+
+                checked = order['_checked']
+                order['_checked'] = now
+                if now <= checked:
+                    continue
+
+                low, high = self._path_range(checked, now)
+                start_price = self.price_at(checked)
+                trigger = order['stopPrice'] if order['stopPrice'] is not None else order['price']
+
+                if order['type'] == 'limit':
+                    if order['side'] == 'buy' and low <= trigger:
+                        self._fill(order, order['remaining'], min(trigger, start_price), now)
+                    elif order['side'] == 'sell' and high >= trigger:
+                        self._fill(order, order['remaining'], max(trigger, start_price), now)
+                    continue
+
+                # Stop market: fills at the stop, or at the first price past it on a gap
+                if order['side'] == 'sell' and low <= trigger:
+                    price = min(trigger, start_price) * (1.0 - self.slippage)
+                    self._fill(order, order['remaining'], price, now)
+                elif order['side'] == 'buy' and high >= trigger:
+                    price = max(trigger, start_price) * (1.0 + self.slippage)
+                    self._fill(order, order['remaining'], price, now)
+
+    def _market_price(self, side: str, timestamp_ms: float) -> float:
+        last = self.price_at(timestamp_ms)
+        if side == 'buy':
+            return (last + self.spread / 2) * (1.0 + self.slippage)
+        return (last - self.spread / 2) * (1.0 - self.slippage)
+
+    def _fill(self, order: dict, amount: float, price: float, timestamp_ms: float):
+        """Execute part of an order and update the balances"""
+        cost = amount * price
+        fee = cost * self.fee_rate
+
+        if order['side'] == 'buy':
+            self.balances[self.quote] -= cost + fee
+            self.balances[self.base] += amount
+        else:
+            self.balances[self.quote] += cost - fee
+            self.balances[self.base] -= amount
+
+        order['cost'] += cost
+        order['filled'] += amount
+        order['remaining'] = max(order['amount'] - order['filled'], 0.0)
+        order['average'] = order['cost'] / order['filled']
+        order['fee']['cost'] += fee
+        order['lastTradeTimestamp'] = int(timestamp_ms)
+        if order['remaining'] <= 1e-12:
+            order['remaining'] = 0.0
+            order['status'] = 'closed'
+
+        self.trades.append({
+            'order': order['id'],
+            'timestamp': int(timestamp_ms),
+            'side': order['side'],
+            'amount': amount,
+            'price': price,
+            'fee': fee
+        })
+
+    def _public_order(self, order: dict) -> dict:
+        return {key: value for key, value in order.items() if not key.startswith('_')}
+
+    def _check_symbol(self, symbol: str):
+        if symbol != self.symbol:
+            raise ccxt.BadSymbol(f"{self.id} does not have market symbol {symbol}")
+
+    def _request(self, method: str, handler, *args):
+        """Run a call after the latency, with the market state at arrival"""
+        self.clock.sleep(self._delay())
+        with self._lock:
+            self._begin(method)
+            return handler(*args)
+
+    # ccxt API (synchronous; see AsyncSimulatedExchange)
+
+    def milliseconds(self) -> int:
+        """Exchange time in milliseconds"""
+        return self.clock.milliseconds()
+
+    def fetch_ohlcv(
+        self,
+        symbol: str,
+        timeframe: str = '1m',
+        since: Optional[int] = None,
+        limit: Optional[int] = None,
+        params: Optional[dict] = None
+    ) -> List[list]:
+        """ccxt-compatible OHLCV fetch (the last candle is the forming one)"""
+        return self._request('fetch_ohlcv', self._fetch_ohlcv, symbol, timeframe, since, limit)
+
+    def fetch_ticker(self, symbol: str, params: Optional[dict] = None) -> dict:
+        """ccxt-compatible ticker"""
+        return self._request('fetch_ticker', self._fetch_ticker, symbol)
+
+    def fetch_balance(self, params: Optional[dict] = None) -> dict:
+        """ccxt-compatible balance (no funds are reserved by open orders)"""
+        return self._request('fetch_balance', self._fetch_balance)
+
+    def create_order(
+        self,
+        symbol: str,
+        type: str,
+        side: str,
+        amount: float,
+        price: Optional[float] = None,
+        params: Optional[dict] = None
+    ) -> dict:
+        """
+        ccxt-compatible order creation
+
+        Types: 'market', 'limit' (price), 'stop_market' or 'stop' (params
+        stopPrice or triggerPrice).
+        """
+        return self._request('create_order', self._create_order, symbol, type, side, amount, price, params or {})
+
+    def create_market_order(
+        self,
+        symbol: str,
+        side: str,
+        amount: float,
+        price: Optional[float] = None,
+        params: Optional[dict] = None
+    ) -> dict:
+        """ccxt-compatible market order"""
+        return self.create_order(symbol, 'market', side, amount, price, params)
+
+    def edit_order(
+        self,
+        id: str,
+        symbol: str,
+        type: str,
+        side: str,
+        amount: Optional[float] = None,
+        price: Optional[float] = None,
+        params: Optional[dict] = None
+    ) -> dict:
+        """ccxt-compatible edit of an open limit or stop order (keeps its id)"""
+        return self._request('edit_order', self._edit_order, id, amount, price, params or {})
+
+    def edit_orders(self, orders: List[dict], params: Optional[dict] = None) -> List[dict]:
+        """ccxt-compatible batch edit (one call), orders as edit_order argument dicts"""
+        return self._request('edit_orders', self._edit_orders, orders)
+
+    def cancel_order(self, id: str, symbol: Optional[str] = None, params: Optional[dict] = None) -> dict:
+        """ccxt-compatible order cancellation"""
+        return self._request('cancel_order', self._cancel_order, id)
+
+    def fetch_order(self, id: str, symbol: Optional[str] = None, params: Optional[dict] = None) -> dict:
+        """ccxt-compatible order status"""
+        return self._request('fetch_order', self._fetch_order, id)
+
+    def fetch_open_orders(
+        self,
+        symbol: Optional[str] = None,
+        since: Optional[int] = None,
+        limit: Optional[int] = None,
+        params: Optional[dict] = None
+    ) -> List[dict]:
+        """ccxt-compatible list of open orders"""
+        return self._request('fetch_open_orders', self._fetch_open_orders)
+
+    # Call handlers (lock held)
+
+    def _fetch_ohlcv(self, symbol: str, timeframe: str, since: Optional[int], limit: Optional[int]) -> List[list]:
+        self._check_symbol(symbol)
+        target_ms = timeframe_to_ms(timeframe)
+        if target_ms < self.timeframe_ms or target_ms % self.timeframe_ms != 0:
+            raise ccxt.BadRequest(f"Timeframe {timeframe} is not available")
+
+        now = self.clock.milliseconds()
+        if now < self.start_ms:
+            return []
+
+        limit = limit or 500
+        ratio = target_ms // self.timeframe_ms
+        current, fraction = self._locate(now)
+
+        # Source candles covering the requested target candles
+        if since is None:
+            stop = current + 1
+            first = max(stop - (limit + 1) * ratio, 0)
+        else:
+            first = max(int((since - self.start_ms) // self.timeframe_ms), 0)
+            stop = min(first + (limit + 1) * ratio, current + 1)
+        if first >= stop:
+            return []
+
+        timestamps = self.timestamps[first:stop]
+        open_ = self.opens[first:stop].copy()
+        high = self.highs[first:stop].copy()
+        low = self.lows[first:stop].copy()
+        close = self.closes[first:stop].copy()
+        volume = self.volumes[first:stop].copy()
+
+        if stop == current + 1 and fraction < 1.0:
+            _, open_[-1], high[-1], low[-1], close[-1], volume[-1] = self._forming_candle(current, fraction)
+
+        if ratio > 1:
+            buckets = bucket_start(timestamps, target_ms)
+            starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+            ends = np.r_[starts[1:], len(timestamps)] - 1
+
+            # A first bucket missing its first candles would be wrong
+            keep = slice(1, None) if timestamps[0] != buckets[0] else slice(None)
+            timestamps = buckets[starts][keep]
+            open_ = open_[starts][keep]
+            high = np.maximum.reduceat(high, starts)[keep]
+            low = np.minimum.reduceat(low, starts)[keep]
+            close = close[ends][keep]
+            volume = np.add.reduceat(volume, starts)[keep]
+
+        if since is not None:
+            selected = timestamps >= since
+            timestamps, open_, high, low, close, volume = (
+                column[selected] for column in (timestamps, open_, high, low, close, volume)
+            )
+            rows = slice(0, limit)
+        else:
+            rows = slice(-limit, None)
+
+        return [
+            [int(t), float(o), float(h), float(lo), float(c), float(v)]
+            for t, o, h, lo, c, v in zip(
+                timestamps[rows], open_[rows], high[rows], low[rows], close[rows], volume[rows]
+            )
+        ]
+
+    def _fetch_ticker(self, symbol: str) -> dict:
+        self._check_symbol(symbol)
+
+        now = self.clock.milliseconds()
+        last = self.price_at(now)
+        return {
+            'symbol': symbol,
+            'timestamp': now,
+            'datetime': self.clock.now().isoformat(),
+            'bid': last - self.spread / 2,
+            'ask': last + self.spread / 2,
+            'last': last,
+            'close': last
+        }
+
+    def _fetch_balance(self) -> dict:
+        balance = {'free': {}, 'used': {}, 'total': {}}
+        for currency, amount in self.balances.items():
+            balance[currency] = {'free': amount, 'used': 0.0, 'total': amount}
+            balance['free'][currency] = amount
+            balance['used'][currency] = 0.0
+            balance['total'][currency] = amount
+        return balance
+
+    def _create_order(
+        self,
+        symbol: str,
+        type: str,
+        side: str,
+        amount: float,
+        price: Optional[float],
+        params: dict
+    ) -> dict:
+        self._check_symbol(symbol)
+        if side not in ('buy', 'sell'):
+            raise ccxt.InvalidOrder(f"Invalid order side: {side}")
+        if amount <= 0:
+            raise ccxt.InvalidOrder(f"Invalid order amount: {amount}")
+
+        stop_price = params.get('stopPrice', params.get('triggerPrice'))
+        if type == 'stop':
+            type = 'stop_market'
+        if type == 'stop_market' and stop_price is None:
+            raise ccxt.InvalidOrder("Stop orders need a stopPrice")
+        if type == 'limit' and price is None:
+            raise ccxt.InvalidOrder("Limit orders need a price")
+        if type not in ('market', 'limit', 'stop_market'):
+            raise ccxt.InvalidOrder(f"Unsupported order type: {type}")
+
+        now = self.clock.milliseconds()
+
+        if type == 'market' and side == 'buy':
+            cost = amount * self._market_price(side, now) * (1.0 + self.fee_rate)
+            if cost > self.balances[self.quote]:
+                raise ccxt.InsufficientFunds(
+                    f"Order cost {cost:.2f} exceeds free {self.quote} {self.balances[self.quote]:.2f}"
+                )
+
+        order = {
+            'id': str(next(self._order_ids)),
+            'clientOrderId': params.get('clientOrderId'),
+            'timestamp': now,
+            'datetime': self.clock.now().isoformat(),
+            'lastTradeTimestamp': None,
+            'symbol': symbol,
+            'type': type,
+            'side': side,
+            'price': price,
+            'stopPrice': stop_price,
+            'amount': amount,
+            'filled': 0.0,
+            'remaining': amount,
+            'cost': 0.0,
+            'average': None,
+            'status': 'open',
+            'fee': {'cost': 0.0, 'currency': self.quote},
+            '_checked': now
+        }
+        self.orders[order['id']] = order
+
+        if type == 'market':
+            self._fill(order, amount * self.partial_fill_ratio, self._market_price(side, now), now)
+
+        return self._public_order(order)
+
+    def _edit_order(self, id: str, amount: Optional[float], price: Optional[float], params: dict) -> dict:
+        order = self._open_order(id)
+
+        if amount is not None:
+            order['amount'] = amount
+            order['remaining'] = amount - order['filled']
+        if price is not None:
+            order['price'] = price
+        stop_price = params.get('stopPrice', params.get('triggerPrice'))
+        if stop_price is not None:
+            order['stopPrice'] = stop_price
+
+        return self._public_order(order)
+
+    def _edit_orders(self, orders: List[dict]) -> List[dict]:
+        return [
+            self._edit_order(order['id'], order.get('amount'), order.get('price'), order.get('params') or {})
+            for order in orders
+        ]
+
+    def _cancel_order(self, id: str) -> dict:
+        order = self._open_order(id)
+        order['status'] = 'canceled'
+        return self._public_order(order)
+
+    def _open_order(self, id: str) -> dict:
+        order = self.orders.get(str(id))
+        if order is None:
+            raise ccxt.OrderNotFound(f"Order {id} not found")
+        if order['status'] != 'open':
+            raise ccxt.InvalidOrder(f"Order {id} is {order['status']}")
+        return order
+
+    def _fetch_order(self, id: str) -> dict:
+        order = self.orders.get(str(id))
+        if order is None:
+            raise ccxt.OrderNotFound(f"Order {id} not found")
+        return self._public_order(order)
+
+    def _fetch_open_orders(self) -> List[dict]:
+        return [
+            self._public_order(order)
+            for order in self.orders.values()
+            if order['status'] == 'open'
+        ]
+
+
+class AsyncSimulatedExchange(SimulatedExchange):
+    """SimulatedExchange with the coroutine API of ccxt.async_support"""
+
+    async def _request_async(self, method: str, handler, *args):
+        await self.clock.sleep_async(self._delay())
+        with self._lock:
+            self._begin(method)
+            return handler(*args)
+
+    async def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        return await self._request_async('fetch_ohlcv', self._fetch_ohlcv, symbol, timeframe, since, limit)
+
+    async def fetch_ticker(self, symbol, params=None):
+        return await self._request_async('fetch_ticker', self._fetch_ticker, symbol)
+
+    async def fetch_balance(self, params=None):
+        return await self._request_async('fetch_balance', self._fetch_balance)
+
+    async def create_order(self, symbol, type, side, amount, price=None, params=None):
+        return await self._request_async(
+            'create_order', self._create_order, symbol, type, side, amount, price, params or {}
+        )
+
+    async def create_market_order(self, symbol, side, amount, price=None, params=None):
+        return await self.create_order(symbol, 'market', side, amount, price, params)
+
+    async def edit_order(self, id, symbol, type, side, amount=None, price=None, params=None):
+        return await self._request_async('edit_order', self._edit_order, id, amount, price, params or {})
+
+    async def edit_orders(self, orders, params=None):
+        return await self._request_async('edit_orders', self._edit_orders, orders)
+
+    async def cancel_order(self, id, symbol=None, params=None):
+        return await self._request_async('cancel_order', self._cancel_order, id)
+
+    async def fetch_order(self, id, symbol=None, params=None):
+        return await self._request_async('fetch_order', self._fetch_order, id)
+
+    async def fetch_open_orders(self, symbol=None, since=None, limit=None, params=None):
+        return await self._request_async('fetch_open_orders', self._fetch_open_orders)
+
+    async def close(self):
+        """Nothing to release (ccxt.async_support compatibility)"""
@@ -0,0 +1,306 @@
+"""
+State Journal for BTCUSD SmartBot
+Append-only journal of position and stop changes with periodic snapshots
+"""
+
+import itertools
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_FILE = 'journal.log'
+SNAPSHOT_FILE = 'snapshot.json'
+
+# Record types and their fields
+#   open:       position_id, symbol, type, entry_price, size, stop_loss, take_profit
+#   close:      position_id
+#   stop:       position_id, stop_loss
+#   trailing:   position_id            (trailing stop activated)
+#   breakeven:  position_id            (breakeven applied)
+#   stop_order: position_id, order_id  (exchange stop order, None when gone)
+
+
+def journal_directory(base_dir: str, exchange_id: str, symbol: str, dry_run: bool) -> str:
+    """
+    Journal directory of one exchange, symbol and trading mode
+
+    Paper and live runs never share a journal, so positions of one mode are
+    never restored into the other.
+
+    Args:
+        base_dir: Base journal directory (e.g. 'data/journal')
+        exchange_id: ccxt exchange id (e.g. 'binance')
+        symbol: Trading pair
+        dry_run: Paper trading mode
+
+    Returns:
+        e.g. data/journal/binance/BTC-USD/paper
+    """
+    safe_symbol = re.sub(r'[^A-Za-z0-9]+', '-', symbol).strip('-')
+    return os.path.join(base_dir, exchange_id, safe_symbol, 'paper' if dry_run else 'live')
+
+
+def empty_state() -> dict:
+    """State with no position"""
+    return {'positions': {}, 'trailing': set(), 'breakeven': set(), 'stop_orders': {}}
+
+
+def apply_record(state: dict, record: dict):
+    """
+    Apply one journal record to a state
+
+    Args:
+        state: State dict (see empty_state), modified in place
+        record: Journal record
+    """
+    op = record['op']
+    position_id = record['position_id']
+
+    if op == 'open':
+        state['positions'][position_id] = {
+            name: record[name]
+            for name in ('symbol', 'type', 'entry_price', 'size', 'stop_loss', 'take_profit')
+        }
+    elif op == 'close':
+        state['positions'].pop(position_id, None)
+        state['trailing'].discard(position_id)
+        state['breakeven'].discard(position_id)
+        state['stop_orders'].pop(position_id, None)
+    elif op == 'stop':
+        position = state['positions'].get(position_id)
+        if position is not None:
+            position['stop_loss'] = record['stop_loss']
+    elif op == 'trailing':
+        state['trailing'].add(position_id)
+    elif op == 'breakeven':
+        state['breakeven'].add(position_id)
+    elif op == 'stop_order':
+        if record['order_id'] is None:
+            state['stop_orders'].pop(position_id, None)
+        else:
+            state['stop_orders'][position_id] = record['order_id']
+    else:
+        raise ValueError(f"Unknown journal record: {op}")
+
+
+class StateJournal:
+    """
+    Write-ahead journal of the bot state (positions, stops, trailing state)
+
+    Changes are recorded as line-delimited JSON in journal.log. Every
+    snapshot_every records the full state is written to snapshot.json
+    (atomically) and the journal starts over, so loading reads one small
+    snapshot plus at most snapshot_every lines. A line cut short by a crash
+    is ignored.
+
+    record() only puts the change on a queue; encoding, writing and fsync
+    happen in a background writer thread, in batches.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        snapshot_every: int = 1000,
+        fsync: bool = True,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Args:
+            directory: Journal directory
+            snapshot_every: Records between two snapshots
+            fsync: Force each written batch to disk
+            clock: Time source in seconds since the epoch (record timestamps)
+        """
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.clock = clock
+
+        self.journal_path = os.path.join(directory, JOURNAL_FILE)
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._sequence = None
+        self._state = None
+        self._since_snapshot = 0
+        self._file = None
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self) -> dict:
+        """
+        Rebuild the state from the snapshot and the journal
+
+        Called by start() if needed; recording continues after the last
+        record found.
+
+        Returns:
+            State dict with positions (id -> dict), trailing and breakeven
+            (sets of ids) and stop_orders (id -> exchange order id)
+        """
+        state = empty_state()
+        last_seq = 0
+
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+            last_seq = snapshot['seq']
+            state['positions'] = snapshot['positions']
+            state['trailing'] = set(snapshot['trailing'])
+            state['breakeven'] = set(snapshot['breakeven'])
+            state['stop_orders'] = snapshot['stop_orders']
+
+        replayed = 0
+        if os.path.exists(self.journal_path):
+            valid_end = 0
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        record = None
+                    if record is None or not line.endswith(b'\n'):
+                        logger.warning("Ignoring incomplete journal record")
+                        break
+
+                    valid_end += len(line)
+                    if record['seq'] <= last_seq:
+                        continue
+                    apply_record(state, record)
+                    last_seq = record['seq']
+                    replayed += 1
+
+            # New records must not be appended to a line cut short by a crash
+            if os.path.getsize(self.journal_path) > valid_end:
+                os.truncate(self.journal_path, valid_end)
+
+        self._sequence = itertools.count(last_seq + 1)
+        self._state = state
+        self._since_snapshot = replayed
+
+        logger.info(
+            f"State journal loaded: {len(state['positions'])} positions "
+            f"({replayed} records after snapshot)"
+        )
+        return {
+            'positions': {key: dict(value) for key, value in state['positions'].items()},
+            'trailing': set(state['trailing']),
+            'breakeven': set(state['breakeven']),
+            'stop_orders': dict(state['stop_orders'])
+        }
+
+    def start(self):
+        """Start the writer thread (loads the journal first if needed)"""
+        if self._state is None:
+            self.load()
+        if self._thread is not None:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._file = open(self.journal_path, 'a')
+        self._thread = threading.Thread(target=self._run, name='state-journal', daemon=True)
+        self._thread.start()
+
+    def record(self, op: str, position_id: str, **fields):
+        """
+        Record a state change (returns at once, written in the background)
+
+        Args:
+            op: Record type ('open', 'close', 'stop', 'trailing', 'breakeven', 'stop_order')
+            position_id: Position identifier
+            **fields: Record fields
+        """
+        fields['op'] = op
+        fields['position_id'] = position_id
+        fields['ts'] = self.clock()
+        self._queue.put(fields)
+
+    def _run(self):
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            try:
+                while True:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            if None in batch:
+                # Closed: records queued after close() are dropped
+                running = False
+                batch = batch[:batch.index(None)]
+
+            try:
+                self._write(batch)
+            except Exception as e:
+                logger.error(f"State journal write error: {e}", exc_info=True)
+
+        self._file.close()
+
+    def _write(self, batch: list):
+        """Append a batch of records and snapshot when due (writer thread)"""
+        if not batch:
+            return
+
+        # Numbered in write order
+        for record in batch:
+            record['seq'] = next(self._sequence)
+
+        self._file.write(''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in batch))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+        for record in batch:
+            apply_record(self._state, record)
+        self._since_snapshot += len(batch)
+
+        if self._since_snapshot >= self.snapshot_every:
+            self._snapshot(batch[-1]['seq'])
+
+    def _snapshot(self, seq: int):
+        """Write the full state and start a new journal (writer thread)"""
+        state = self._state
+        snapshot = {
+            'seq': seq,
+            'ts': self.clock(),
+            'positions': state['positions'],
+            'trailing': sorted(state['trailing']),
+            'breakeven': sorted(state['breakeven']),
+            'stop_orders': state['stop_orders']
+        }
+
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+        # Records up to seq are in the snapshot (skipped on load if this
+        # truncation is interrupted)
+        self._file.close()
+        self._file = open(self.journal_path, 'w')
+        self._since_snapshot = 0
+
+        logger.debug(f"State snapshot written at record {seq}")
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """
+        Write the queued records and stop the writer thread
+
+        Args:
+            timeout: Seconds to wait for the writer
+        """
+        if self._thread is None:
+            return
+
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
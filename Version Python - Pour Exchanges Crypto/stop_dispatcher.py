@@ -0,0 +1,312 @@
+"""
+Stop Update Dispatcher for BTCUSD SmartBot
+Coalesces and debounces stop loss modifications sent to the exchange
+"""
+
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds before a target whose call failed is sent again (at least)
+RETRY_DELAY = 1.0
+
+
+class StopUpdateDispatcher:
+    """
+    Sends only meaningful stop moves to the exchange
+
+    Each position keeps only its most recent target stop. A target is sent
+    once it differs from the stop last sent by at least min_delta_percent
+    and min_interval seconds have passed since the previous call for that
+    position; until then newer targets simply replace it. Targets due at
+    the same time go out in one call when a batch sender is given (e.g.
+    ccxt edit_orders), which reports success per position. A failed target
+    is put back, unless a newer one arrived meanwhile.
+
+    Runs in its own thread (start) or as an asyncio task (run_async) and
+    wakes up on each submitted target and when a deferred one becomes due.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, float], bool],
+        send_batch: Optional[Callable[[List[Tuple[str, float]]], Dict[str, bool]]] = None,
+        min_delta_percent: float = 0.0,
+        min_interval: float = 0.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            send: Sends one stop (position_id, stop), returns True on success
+                (a coroutine function with run_async)
+            send_batch: Sends several [(position_id, stop), ...] in one call,
+                returns {position_id: True on success} (None: one send per stop)
+            min_delta_percent: Smallest stop move worth sending, in % of the
+                stop last sent
+            min_interval: Smallest delay in seconds between two calls for
+                the same position
+            clock: Monotonic time source in seconds
+        """
+        self.send = send
+        self.send_batch = send_batch
+        self.min_delta_percent = min_delta_percent
+        self.min_interval = min_interval
+        self.clock = clock
+
+        self.submitted = 0
+        self.superseded = 0
+        self.calls = 0
+        self.stops_sent = 0
+        self.failed = 0
+
+        self._pending: Dict[str, float] = {}
+        self._sent: Dict[str, float] = {}
+        self._not_before: Dict[str, float] = {}
+        self._in_flight = set()
+        self._dirty = False
+
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def track(self, position_id: str, stop: float):
+        """
+        Record a stop already in place (e.g. set with the entry order)
+
+        Args:
+            position_id: Position identifier
+            stop: Stop loss price
+        """
+        with self._condition:
+            self._sent[position_id] = stop
+
+    def submit(self, position_id: str, stop: float):
+        """
+        Set the target stop of a position (replaces any target not sent yet)
+
+        Args:
+            position_id: Position identifier
+            stop: Target stop loss price
+        """
+        with self._condition:
+            self.submitted += 1
+            if position_id in self._pending:
+                self.superseded += 1
+            self._pending[position_id] = stop
+            self._dirty = True
+            self._condition.notify()
+
+        self._wake()
+
+    def forget(self, position_id: str):
+        """Drop the state of a closed position"""
+        with self._condition:
+            self._pending.pop(position_id, None)
+            self._sent.pop(position_id, None)
+            self._not_before.pop(position_id, None)
+            self._in_flight.discard(position_id)
+
+    def _wake(self):
+        if self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _take_due(self) -> Tuple[List[Tuple[str, float]], Optional[float]]:
+        """
+        Remove the targets that may be sent now
+
+        Returns:
+            Tuple (due [(position_id, stop), ...], seconds until the next
+            deferred target is due or None)
+        """
+        now = self.clock()
+        due = []
+        next_due = None
+
+        with self._condition:
+            self._dirty = False
+            for position_id, stop in list(self._pending.items()):
+                if position_id in self._in_flight:
+                    continue
+
+                sent = self._sent.get(position_id)
+                if sent and abs(stop - sent) < abs(sent) * self.min_delta_percent / 100.0:
+                    # Too small a move: wait for the target to move further
+                    continue
+
+                not_before = self._not_before.get(position_id, now)
+                if now < not_before:
+                    wait = not_before - now
+                    next_due = wait if next_due is None else min(next_due, wait)
+                    continue
+
+                del self._pending[position_id]
+                self._in_flight.add(position_id)
+                self._not_before[position_id] = now + self.min_interval
+                due.append((position_id, stop))
+
+        return due, next_due
+
+    def _settle(self, updates: List[Tuple[str, float]], results: Dict[str, bool]):
+        retry_at = self.clock() + max(self.min_interval, RETRY_DELAY)
+        with self._condition:
+            self.calls += 1
+            for position_id, stop in updates:
+                if position_id not in self._in_flight:
+                    # Forgotten during the call (position closed)
+                    continue
+
+                self._in_flight.discard(position_id)
+                if results.get(position_id):
+                    self._sent[position_id] = stop
+                    self.stops_sent += 1
+                else:
+                    self.failed += 1
+                    self._pending.setdefault(position_id, stop)
+                    self._not_before[position_id] = retry_at
+
+            # Targets that arrived during the call (or failed) need another pass
+            waiting = any(position_id in self._pending for position_id, _ in updates)
+            if waiting:
+                self._dirty = True
+
+        if waiting:
+            self._wake()
+
+    def _calls_for(self, due: List[Tuple[str, float]]) -> List[List[Tuple[str, float]]]:
+        """Group due targets into exchange calls"""
+        if self.send_batch is not None and len(due) > 1:
+            return [due]
+        return [[update] for update in due]
+
+    def _call(self, updates: List[Tuple[str, float]]):
+        """Send a group of targets (the sender's result, maybe awaitable)"""
+        if len(updates) > 1:
+            return self.send_batch(updates)
+        return self.send(*updates[0])
+
+    @staticmethod
+    def _results(updates: List[Tuple[str, float]], result) -> Dict[str, bool]:
+        """Success per position of a call (a single send returns one bool)"""
+        if len(updates) > 1:
+            return {position_id: bool(result.get(position_id)) for position_id, _ in updates}
+        return {updates[0][0]: bool(result)}
+
+    def flush(self) -> Optional[float]:
+        """
+        Send the targets due now (sync senders)
+
+        Returns:
+            Seconds until the next deferred target is due, or None
+        """
+        due, next_due = self._take_due()
+
+        for updates in self._calls_for(due):
+            try:
+                results = self._results(updates, self._call(updates))
+            except Exception as e:
+                logger.error("Error updating stop on exchange: %s", e)
+                results = {}
+            self._settle(updates, results)
+
+        return next_due
+
+    async def flush_async(self) -> Optional[float]:
+        """
+        Send the targets due now (sync or coroutine senders)
+
+        Returns:
+            Seconds until the next deferred target is due, or None
+        """
+        due, next_due = self._take_due()
+
+        for updates in self._calls_for(due):
+            try:
+                result = self._call(updates)
+                if inspect.isawaitable(result):
+                    result = await result
+                results = self._results(updates, result)
+            except Exception as e:
+                logger.error("Error updating stop on exchange: %s", e)
+                results = {}
+            self._settle(updates, results)
+
+        return next_due
+
+    def start(self):
+        """Run the dispatcher in a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='stop-dispatcher', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        next_due = None
+        while self._running:
+            with self._condition:
+                if self._running and not self._dirty:
+                    self._condition.wait(next_due)
+            next_due = self.flush()
+
+    async def run_async(self):
+        """Run the dispatcher as an asyncio task until stop() is called"""
+        self._running = True
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        next_due = None
+
+        try:
+            while self._running:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), next_due)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                next_due = await self.flush_async()
+        finally:
+            self._running = False
+            self._wakeup = None
+            self._loop = None
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """
+        Stop the thread or task (targets not sent yet are kept)
+
+        Args:
+            timeout: Seconds to wait for the thread to finish
+        """
+        self._running = False
+        with self._condition:
+            self._condition.notify_all()
+        self._wake()
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Dispatch counters
+
+        Returns:
+            Dict with submitted (targets received), superseded (targets
+            replaced before being sent), calls (exchange calls), stops_sent,
+            failed and pending
+        """
+        with self._condition:
+            return {
+                'submitted': self.submitted,
+                'superseded': self.superseded,
+                'calls': self.calls,
+                'stops_sent': self.stops_sent,
+                'failed': self.failed,
+                'pending': len(self._pending)
+            }
@@ -0,0 +1,198 @@
+"""
+Equivalence Tests for BTCUSD SmartBot
+The fast paths must give the same results as the code they replace
+
+Run with: python -m pytest -q test_equivalence.py
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest_engine import BacktestEngine
+from config import TradingConfig
+from indicators import StreamingIndicators, TechnicalIndicators
+from market_generator import MarketGenerator
+from monte_carlo import backtest_paths
+from replay_benchmark import ReplayBot, replay_config
+from risk_manager import RiskManager
+from sim_exchange import SimulatedExchange
+from trailing_stop import TrailingStopManager, batch_trailing_stops
+
+
+@pytest.fixture(autouse=True)
+def quiet_logs():
+    """The bot and the managers log every step"""
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+def reference_backtest(data: pd.DataFrame, config=TradingConfig, initial_balance: float = 10000.0):
+    """
+    Bar by bar loop of the original example_backtest.simple_backtest
+
+    Returns:
+        Tuple (trades [(type, entry, exit, pnl, balance), ...], final balance)
+    """
+    df = TechnicalIndicators.add_all_indicators(data, config.FAST_EMA, config.SLOW_EMA, config.ATR_PERIOD)
+    df = df.dropna()
+
+    balance = initial_balance
+    position = None
+    trades = []
+    risk_manager = RiskManager(config)
+
+    for i in range(2, len(df)):
+        current_bar = df.iloc[:i + 1]
+        bullish, bearish = TechnicalIndicators.detect_ema_crossover(
+            current_bar['ema_fast'], current_bar['ema_slow']
+        )
+        current_price = current_bar['close'].iloc[-1]
+        current_atr = current_bar['atr'].iloc[-1]
+
+        if position:
+            if (position['type'] == 'buy' and bearish) or (position['type'] == 'sell' and bullish):
+                if position['type'] == 'buy':
+                    pnl = (current_price - position['entry']) * position['size']
+                else:
+                    pnl = (position['entry'] - current_price) * position['size']
+                balance += pnl
+                trades.append((position['type'], position['entry'], current_price, pnl, balance))
+                position = None
+
+        if position is None and balance > 0 and (bullish or bearish):
+            signal = 'buy' if bullish else 'sell'
+            stop_loss, _ = TechnicalIndicators.calculate_dynamic_stops(
+                current_atr, config.ATR_MULTIPLIER_SL, config.ATR_MULTIPLIER_TP, current_price, signal
+            )
+            size = risk_manager.calculate_position_size(balance, current_price, stop_loss)
+            position = {'type': signal, 'entry': current_price, 'size': size}
+
+    return trades, balance
+
+
+@pytest.mark.parametrize('model', ['random_walk', 'clustered'])
+def test_streaming_indicators_match_batch(model):
+    candles = MarketGenerator(seed=1, timeframe='1h').candles(500, model)
+    ema_fast = TechnicalIndicators.calculate_ema(candles, 9).to_numpy()
+    ema_slow = TechnicalIndicators.calculate_ema(candles, 21).to_numpy()
+    atr = TechnicalIndicators.calculate_atr(candles, 14).to_numpy()
+
+    indicators = StreamingIndicators(9, 21, 14)
+    for row, (timestamp, candle) in enumerate(candles.iterrows()):
+        # A forming version of the candle first, revised by the closed one
+        indicators.update(timestamp, candle['open'], candle['open'], candle['open'])
+        indicators.update(timestamp, candle['high'], candle['low'], candle['close'])
+
+        assert indicators.ema_fast == ema_fast[row]
+        assert indicators.ema_slow == ema_slow[row]
+        assert np.array_equal(indicators.atr, atr[row], equal_nan=True)
+
+
+def test_streaming_indicators_sync_matches_seed():
+    candles = MarketGenerator(seed=2, timeframe='1h').candles(300, 'gbm')
+
+    synced = StreamingIndicators()
+    synced.sync(candles.iloc[:200])
+    synced.sync(candles.iloc[150:])
+
+    seeded = StreamingIndicators()
+    seeded.seed(candles)
+
+    assert (synced.ema_fast, synced.ema_slow, synced.atr) == (seeded.ema_fast, seeded.ema_slow, seeded.atr)
+
+
+@pytest.mark.parametrize('seed', [3, 4, 5])
+def test_backtest_engine_matches_reference_loop(seed):
+    candles = MarketGenerator(seed=seed, timeframe='1h').candles(720, 'random_walk', step=200, floor=20000)
+
+    expected_trades, expected_balance = reference_backtest(candles)
+    result = BacktestEngine(TradingConfig, 10000.0).run(candles)
+    trades = result['trades'][['type', 'entry', 'exit', 'pnl', 'balance']]
+
+    assert len(expected_trades) > 0
+    assert list(trades.itertuples(index=False, name=None)) == expected_trades
+    assert result['final_balance'] == expected_balance
+
+
+def test_batch_trailing_stops_match_single_position():
+    rng = np.random.default_rng(6)
+    cases = 20000
+
+    entry = rng.uniform(20000.0, 60000.0, cases)
+    price = entry * (1.0 + rng.normal(0.0, 0.03, cases))
+    stops = np.where(rng.random(cases) < 0.2, 0.0, np.round(price * (1.0 + rng.uniform(-0.03, 0.03, cases)), 2))
+    directions = np.where(rng.random(cases) < 0.5, 1, -1)
+    active = rng.random(cases) < 0.3
+
+    new_stops, updated, now_active = batch_trailing_stops(
+        entry, price, stops, directions, active,
+        TradingConfig.TRAIL_START_PERCENT, TradingConfig.TRAIL_STEP_PERCENT
+    )
+
+    manager = TrailingStopManager(TradingConfig)
+    for i in range(cases):
+        position_type = 'buy' if directions[i] == 1 else 'sell'
+        manager.trailing_active = {'p': True} if active[i] else {}
+
+        new_stop = manager.calculate_new_stop('p', entry[i], price[i], stops[i], position_type)
+        moved = new_stop is not None and manager._validate_stop_update(new_stop, stops[i], position_type)
+
+        assert updated[i] == moved, i
+        assert new_stops[i] == (new_stop if moved else stops[i]), i
+        assert now_active[i] == manager.trailing_active.get('p', False), i
+
+
+def test_monte_carlo_paths_match_engine():
+    ohlcv = MarketGenerator(seed=7, timeframe='1h').ohlcv(600, paths=6, model='gbm', sigma=0.8)
+    summary = backtest_paths(ohlcv, TradingConfig, 10000.0, use_volatility_filter=True)
+
+    engine = BacktestEngine(TradingConfig, 10000.0, use_volatility_filter=True)
+    for path in range(6):
+        candles = pd.DataFrame(
+            {name: values[path] for name, values in ohlcv.items()},
+            index=pd.date_range('2020-01-01', periods=600, freq='1h', name='timestamp')
+        )
+        metrics = BacktestEngine.calculate_metrics(engine.run(candles))
+
+        assert summary['trades'][path] == metrics['trades']
+        assert summary['final_balance'][path] == metrics['final_balance']
+
+
+def run_replay(candles: pd.DataFrame) -> tuple:
+    """Bot loop over candles on a simulated exchange (virtual clock)"""
+    config = replay_config(type('TestConfig', (TradingConfig,), {'RISK_PERCENT': 0.25}), '1h')
+    exchange = SimulatedExchange(
+        candles, '1h', config.SYMBOL, warmup_bars=250,
+        initial_balance={'USD': 100000.0}, latency_ms=30.0
+    )
+    bot = ReplayBot(config, exchange)
+    bot.run()
+    return exchange, bot
+
+
+def test_replay_is_deterministic_and_trades():
+    candles = MarketGenerator(seed=0, timeframe='1h').candles(500, 'gbm', sigma=0.6)
+
+    first_exchange, first_bot = run_replay(candles)
+    second_exchange, second_bot = run_replay(candles)
+
+    assert len(first_bot.order_delays) > 0
+    assert first_exchange.trades == second_exchange.trades
+    assert first_exchange.balances == second_exchange.balances
+    assert first_bot.order_delays == second_bot.order_delays
+
+
+def test_simulated_exchange_serves_the_candles():
+    candles = MarketGenerator(seed=8, timeframe='1h').candles(400, 'gbm')
+    exchange = SimulatedExchange(candles, '1h', 'BTC/USD', warmup_bars=300)
+
+    rows = exchange.fetch_ohlcv('BTC/USD', '1h', limit=51)
+    closed = np.array(rows[:-1], dtype=np.float64)
+    expected = candles.iloc[250:300]
+
+    assert closed[0, 0] == expected.index[0].value // 1_000_000
+    np.testing.assert_array_equal(closed[:, 1:5], expected[['open', 'high', 'low', 'close']].to_numpy())
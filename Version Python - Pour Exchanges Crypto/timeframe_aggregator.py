@@ -0,0 +1,233 @@
+"""
+Multi-Timeframe Aggregator for BTCUSD SmartBot
+Builds higher timeframe candles incrementally from lower timeframe candles
+"""
+
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from candle_store import ohlcv_to_frame, timeframe_to_ms
+
+# Epoch day 0 is a Thursday; exchanges start weekly candles on Monday
+_WEEK_MS = timeframe_to_ms('1w')
+_WEEK_OFFSET_MS = 4 * timeframe_to_ms('1d')
+
+
+def bucket_start(timestamp, timeframe_ms: int):
+    """
+    Open time of the higher timeframe candle containing a timestamp
+
+    Args:
+        timestamp: Time in milliseconds (int or NumPy integer array)
+        timeframe_ms: Higher timeframe duration in milliseconds
+
+    Returns:
+        Bucket open time(s) in milliseconds
+    """
+    offset = _WEEK_OFFSET_MS if timeframe_ms % _WEEK_MS == 0 else 0
+    return (timestamp - offset) // timeframe_ms * timeframe_ms + offset
+
+
+class _BucketState:
+    """Higher timeframe candles of one target timeframe"""
+
+    def __init__(self, timeframe: str, max_bars: int):
+        self.timeframe_ms = timeframe_to_ms(timeframe)
+        self.completed = deque(maxlen=max_bars)
+
+        # Current bucket: aggregate of its settled source candles + the last
+        # source candle, which may still be revised
+        self.bucket: Optional[int] = None
+        self.partial = False
+        self.prefix: Optional[list] = None
+        self.last: Optional[list] = None
+
+    def current(self) -> Optional[list]:
+        """Candle of the current bucket built from the source candles so far"""
+        if self.last is None:
+            return None
+        if self.prefix is None:
+            return [self.bucket] + self.last[1:]
+
+        prefix, last = self.prefix, self.last
+        return [
+            self.bucket,
+            prefix[1],
+            max(prefix[2], last[2]),
+            min(prefix[3], last[3]),
+            last[4],
+            prefix[5] + last[5]
+        ]
+
+
+class TimeframeAggregator:
+    """
+    Builds higher timeframe candles (e.g. 4h, 1d) from a lower timeframe series
+
+    Source candles are fed in time order; a candle with the same timestamp
+    as the previous one revises it (the exchange's still-forming candle).
+    Like an exchange fetch, the output ends with the candle of the current
+    bucket, which keeps changing until a source candle of the next bucket
+    arrives. A bucket whose first source candles were never seen (the series
+    started inside it) would have a wrong open/high/low, so it is dropped.
+    """
+
+    def __init__(self, source_timeframe: str, target_timeframes: List[str], max_bars: int = 500):
+        """
+        Args:
+            source_timeframe: Timeframe of the fed candles (e.g. '1h' or '1m')
+            target_timeframes: Timeframes to build, multiples of the source
+            max_bars: Completed candles kept per target timeframe
+        """
+        self.source_timeframe = source_timeframe
+        self.source_ms = timeframe_to_ms(source_timeframe)
+        self.max_bars = max_bars
+
+        for timeframe in target_timeframes:
+            target_ms = timeframe_to_ms(timeframe)
+            if target_ms <= self.source_ms or target_ms % self.source_ms != 0:
+                raise ValueError(
+                    f"Cannot build {timeframe} candles from {source_timeframe} candles"
+                )
+
+        self.target_timeframes = list(target_timeframes)
+        self.reset()
+
+    def reset(self):
+        """Forget all candles"""
+        self.states: Dict[str, _BucketState] = {
+            timeframe: _BucketState(timeframe, self.max_bars)
+            for timeframe in self.target_timeframes
+        }
+        self.last_timestamp: Optional[int] = None
+
+    def update(
+        self,
+        timestamp: int,
+        open: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float = 0.0
+    ):
+        """
+        Apply one source candle
+
+        Args:
+            timestamp: Candle open time in milliseconds (a repeated timestamp
+                revises the last candle)
+            open: Candle open
+            high: Candle high
+            low: Candle low
+            close: Candle close
+            volume: Candle volume
+        """
+        timestamp = int(timestamp)
+        revision = timestamp == self.last_timestamp
+        if not revision and self.last_timestamp is not None and timestamp < self.last_timestamp:
+            raise ValueError(f"Out of order candle: {timestamp} < {self.last_timestamp}")
+
+        row = [timestamp, open, high, low, close, volume]
+        self.last_timestamp = timestamp
+
+        for state in self.states.values():
+            if revision:
+                state.last = row
+                continue
+
+            bucket = bucket_start(timestamp, state.timeframe_ms)
+
+            if bucket != state.bucket:
+                # Close the previous bucket
+                if state.bucket is not None and not state.partial:
+                    state.completed.append(state.current())
+
+                state.bucket = bucket
+                state.partial = state.last is None and timestamp != bucket
+                state.prefix = None
+                state.last = row
+                continue
+
+            # Same bucket: the previous source candle is settled
+            state.prefix = state.current()
+            state.last = row
+
+    def sync(self, data: pd.DataFrame):
+        """
+        Feed only the candles not seen yet (plus a revision of the last one)
+
+        Starts over when the data does not overlap the state.
+
+        Args:
+            data: DataFrame with OHLCV data indexed by timestamp
+        """
+        if data.empty:
+            return
+
+        timestamps = data.index.values.astype('datetime64[ms]').astype(np.int64)
+
+        if self.last_timestamp is None or timestamps[0] > self.last_timestamp:
+            self.reset()
+            start = 0
+        else:
+            start = int(np.searchsorted(timestamps, self.last_timestamp))
+
+        for row in zip(
+            timestamps[start:].tolist(),
+            data['open'].to_numpy()[start:].tolist(),
+            data['high'].to_numpy()[start:].tolist(),
+            data['low'].to_numpy()[start:].tolist(),
+            data['close'].to_numpy()[start:].tolist(),
+            data['volume'].to_numpy()[start:].tolist()
+        ):
+            self.update(*row)
+
+    def bars(self, timeframe: str, limit: Optional[int] = None) -> List[list]:
+        """
+        Candles of a target timeframe
+
+        Args:
+            timeframe: Target timeframe
+            limit: Number of most recent candles to return
+
+        Returns:
+            OHLCV rows, the last one being the current (forming) bucket
+        """
+        state = self.states[timeframe]
+        rows = list(state.completed)
+        if state.last is not None and not state.partial:
+            rows.append(state.current())
+
+        if limit is not None:
+            rows = rows[-limit:]
+        return rows
+
+    def frame(self, timeframe: str, limit: Optional[int] = None) -> pd.DataFrame:
+        """
+        Candles of a target timeframe in the bot DataFrame format
+
+        Args:
+            timeframe: Target timeframe
+            limit: Number of most recent candles to return
+
+        Returns:
+            DataFrame indexed by timestamp
+        """
+        return ohlcv_to_frame(self.bars(timeframe, limit))
+
+    def source_candles_needed(self, timeframe: str, count: int) -> int:
+        """
+        Source candles to request to build a number of target candles
+
+        Args:
+            timeframe: Target timeframe
+            count: Target candles wanted
+
+        Returns:
+            Source candle count (one extra bucket covers a partial first one)
+        """
+        ratio = timeframe_to_ms(timeframe) // self.source_ms
+        return (count + 1) * ratio
@@ -0,0 +1,422 @@
+"""
+Tracing for BTCUSD SmartBot
+Nested timing spans per iteration, exported as Chrome trace events
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar('current_span', default=None)
+
+# Trace tids of a thread: thread number * TRACKS_PER_THREAD + task lane
+TRACKS_PER_THREAD = 1000
+
+
+class _Span:
+    """Context manager recording one span (see Tracer.span)"""
+
+    __slots__ = ('tracer', 'name', 'args', 'timer', 'opens_root', 'recorded', 'parent', 'root',
+                 'stack', 'events', 'lanes', 'track', 'start', 'cpu_start', 'memory_start', 'token')
+
+    def __init__(self, tracer: 'Tracer', name: str, args: dict, timer=None, opens_root: bool = False):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.timer = timer
+        self.opens_root = opens_root
+
+    def __enter__(self):
+        tracer = self.tracer
+        parent = _current_span.get()
+        self.parent = parent
+
+        # Outside an iteration, only the timer runs
+        self.recorded = parent is not None or self.opens_root
+        if not self.recorded:
+            if self.timer is not None:
+                self.timer.__enter__()
+            return self
+
+        if parent is None:
+            self.root = self
+            self.stack = self.name
+            self.events = []
+            self.lanes = {}
+        else:
+            self.root = parent.root
+            self.stack = parent.stack + ';' + self.name
+            self.events = parent.root.events
+
+        self.track = tracer._track(self.root.lanes)
+        self.token = _current_span.set(self)
+        if self.timer is not None:
+            self.timer.__enter__()
+        self.memory_start = tracemalloc.get_traced_memory()[0] if tracer.memory else 0
+        self.cpu_start = time.thread_time_ns()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.recorded:
+            if self.timer is not None:
+                self.timer.__exit__(exc_type, exc, tb)
+            return False
+
+        end = time.perf_counter_ns()
+        cpu = time.thread_time_ns() - self.cpu_start
+        tracer = self.tracer
+
+        if self.timer is not None:
+            self.timer.__exit__(exc_type, exc, tb)
+        _current_span.reset(self.token)
+
+        args = self.args
+        args['cpu_ms'] = cpu / 1e6
+        if tracer.memory:
+            args['alloc_kb'] = (tracemalloc.get_traced_memory()[0] - self.memory_start) / 1024
+        if exc_type is not None:
+            args['error'] = exc_type.__name__
+        args['stack'] = self.stack
+        self.events.append((self.name, self.start, end - self.start, self.track, args))
+
+        if self.root is self:
+            tracer._finish(self.events, end - self.start)
+        return False
+
+
+class Tracer:
+    """
+    Nested spans per bot iteration, written as Chrome trace events
+
+    iteration() opens the root span of an iteration; spans opened inside it
+    (in the same thread, or in asyncio tasks created inside it) are its
+    children. Spans opened outside any iteration, e.g. by the position
+    monitor thread, are not recorded (their timer still runs). Each span records its wall time, the CPU
+    time of its thread and, in full mode, the change of traced memory
+    (tracemalloc). Each thread has its own tracks (tid); within an
+    iteration, spans of concurrent asyncio tasks go to one track per task,
+    and their CPU time includes whatever ran on the thread meanwhile.
+
+    Modes:
+        full: every iteration is written, with allocation deltas
+            (tracemalloc slows the process down noticeably)
+        sample: iterations are recorded in memory and written only when
+            they took at least slow_seconds, or at random with probability
+            sample_rate; cheap enough to leave on
+
+    Events are written by a background thread, appended to a Chrome trace
+    file in the JSON array format without the closing bracket (which the
+    format allows), so restarts keep appending to the same file. Open it
+    in chrome://tracing or ui.perfetto.dev, or fold it for a flamegraph
+    (python tracing.py fold trace.json).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = 'sample',
+        slow_seconds: float = 1.0,
+        sample_rate: float = 0.0,
+        memory: Optional[bool] = None,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            path: Trace file (appended to)
+            mode: 'full' or 'sample'
+            slow_seconds: Iterations at least this long are always kept ('sample')
+            sample_rate: Probability of keeping any other iteration ('sample')
+            memory: Record allocation deltas (default: in full mode only)
+            seed: Seed of the sampling random generator
+        """
+        if mode not in ('full', 'sample'):
+            raise ValueError(f"Unknown trace mode: {mode}")
+
+        self.path = path
+        self.mode = mode
+        self.slow_ns = int(slow_seconds * 1e9)
+        self.sample_rate = sample_rate
+        self.memory = mode == 'full' if memory is None else memory
+
+        self.iterations = 0
+        self.kept = 0
+
+        self._random = random.Random(seed)
+        self._pid = os.getpid()
+        self._threads: Dict[int, int] = {}
+        self._track_names: Dict[int, str] = {}
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._started_memory = False
+
+    def iteration(self, name: str = 'iteration', **args) -> _Span:
+        """
+        Context manager recording the root span of an iteration
+
+        Args:
+            name: Span name
+            **args: Values shown with the span
+        """
+        return _Span(self, name, args, opens_root=True)
+
+    def span(self, name: str, timer=None, **args) -> _Span:
+        """
+        Context manager recording a span (inside an iteration only)
+
+        Args:
+            name: Span name
+            timer: Context manager entered and exited with the span (e.g. a
+                MetricsRegistry timer)
+            **args: Values shown with the span
+        """
+        return _Span(self, name, args, timer)
+
+    def instrument(self, target, *names: str):
+        """
+        Record a span around each call of methods of an object
+
+        The methods are replaced on the object itself (not its class);
+        coroutine methods are wrapped with coroutines.
+
+        Args:
+            target: Object whose methods are traced
+            *names: Method names
+        """
+        for name in names:
+            method = getattr(target, name)
+            span_name = f"{type(target).__name__}.{name}"
+
+            if inspect.iscoroutinefunction(method):
+                async def traced_coroutine(*args, _method=method, _name=span_name, **kwargs):
+                    with _Span(self, _name, {}):
+                        return await _method(*args, **kwargs)
+                wrapper = functools.wraps(method)(traced_coroutine)
+            else:
+                def traced(*args, _method=method, _name=span_name, **kwargs):
+                    with _Span(self, _name, {}):
+                        return _method(*args, **kwargs)
+                wrapper = functools.wraps(method)(traced)
+
+            setattr(target, name, wrapper)
+
+    def _track(self, lanes: dict) -> int:
+        """
+        Trace tid of the running thread and asyncio task
+
+        Args:
+            lanes: Lane of each task of the iteration (id(task) -> number),
+                updated for a new task
+        """
+        thread = self._threads.get(threading.get_ident())
+        if thread is None:
+            thread = self._threads[threading.get_ident()] = len(self._threads) + 1
+
+        # Outside an event loop (threads) there is no task to look for
+        loop = asyncio._get_running_loop()
+        task = asyncio.current_task(loop) if loop is not None else None
+
+        lane = 0
+        if task is not None:
+            lane = lanes.get(id(task))
+            if lane is None:
+                lane = lanes[id(task)] = len(lanes)
+
+        track = thread * TRACKS_PER_THREAD + lane
+        if track not in self._track_names:
+            name = threading.current_thread().name
+            self._track_names[track] = f"{name} task {lane}" if lane else name
+        return track
+
+    def _finish(self, events: list, duration_ns: int):
+        """Keep or drop a finished iteration"""
+        self.iterations += 1
+        if self.mode == 'sample' and duration_ns < self.slow_ns:
+            if not self.sample_rate or self._random.random() >= self.sample_rate:
+                return
+
+        self.kept += 1
+        if self._thread is not None:
+            self._queue.put(events)
+
+    def start(self):
+        """Start the writer thread (and allocation tracing if enabled)"""
+        if self._thread is not None:
+            return
+
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_memory = True
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._thread = threading.Thread(target=self._run, name='tracer', daemon=True)
+        self._thread.start()
+        logger.info("Tracing (%s) to %s", self.mode, self.path)
+
+    def _run(self):
+        written_tracks = set()
+        with open(self.path, 'a') as f:
+            if f.tell() == 0:
+                f.write('[\n')
+
+            running = True
+            while running:
+                batch = [self._queue.get()]
+                try:
+                    while True:
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    pass
+
+                if None in batch:
+                    running = False
+                    batch = batch[:batch.index(None)]
+
+                try:
+                    lines = []
+                    for events in batch:
+                        for name, start, duration, track, args in list(events):
+                            if track not in written_tracks:
+                                written_tracks.add(track)
+                                lines.append(self._event({
+                                    'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': track,
+                                    'args': {'name': self._track_names.get(track, str(track))}
+                                }))
+                            lines.append(self._event({
+                                'name': name, 'ph': 'X', 'pid': self._pid, 'tid': track,
+                                'ts': start / 1000, 'dur': duration / 1000, 'args': args
+                            }))
+                    f.write(''.join(lines))
+                    f.flush()
+                except Exception as e:
+                    logger.error("Trace write error: %s", e, exc_info=True)
+
+    @staticmethod
+    def _event(event: dict) -> str:
+        return json.dumps(event, default=str, separators=(',', ':')) + ',\n'
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """
+        Write the kept iterations and stop the writer thread
+
+        Args:
+            timeout: Seconds to wait for the writer
+        """
+        if self._thread is None:
+            return
+
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+        if self._started_memory:
+            tracemalloc.stop()
+            self._started_memory = False
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dict with iterations (root spans finished) and kept (written)
+        """
+        return {'iterations': self.iterations, 'kept': self.kept}
+
+
+def load_trace(path: str) -> List[dict]:
+    """
+    Read a Chrome trace file (complete or not closed)
+
+    Args:
+        path: Trace file
+
+    Returns:
+        List of trace events
+    """
+    with open(path) as f:
+        text = f.read().strip()
+
+    if text.startswith('{'):
+        return json.loads(text)['traceEvents']
+    if not text.endswith(']'):
+        text = text.rstrip(',') + ']'
+    return json.loads(text)
+
+
+def fold_stacks(events: List[dict]) -> Dict[str, float]:
+    """
+    Self time per span stack, for flamegraph tools
+
+    Args:
+        events: Trace events written by a Tracer
+
+    Returns:
+        Dict 'root;child;...' -> self wall time in microseconds
+    """
+    folded: Dict[str, float] = {}
+    for event in events:
+        stack = event.get('args', {}).get('stack')
+        if event.get('ph') != 'X' or stack is None:
+            continue
+        folded[stack] = folded.get(stack, 0.0) + event['dur']
+        parent = stack.rpartition(';')[0]
+        if parent:
+            folded[parent] = folded.get(parent, 0.0) - event['dur']
+
+    # Children of concurrent tasks can add up to more than their parent
+    return {stack: max(value, 0.0) for stack, value in folded.items()}
+
+
+def main():
+    """Command line entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarize a trace written by the bot")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    fold_parser = subparsers.add_parser('fold', help="Folded stacks (flamegraph.pl, speedscope)")
+    fold_parser.add_argument('trace')
+
+    slowest_parser = subparsers.add_parser('slowest', help="Slowest iterations and their spans")
+    slowest_parser.add_argument('trace')
+    slowest_parser.add_argument('--count', type=int, default=5)
+
+    args = parser.parse_args()
+    events = [event for event in load_trace(args.trace) if event.get('ph') == 'X']
+
+    if args.command == 'fold':
+        for stack, micros in sorted(fold_stacks(events).items()):
+            if micros >= 1:
+                print(f"{stack} {int(micros)}")
+        return
+
+    events.sort(key=lambda event: event['ts'])
+    roots = [event for event in events if ';' not in event['args'].get('stack', ';')]
+    for root in sorted(roots, key=lambda event: event['dur'], reverse=True)[:args.count]:
+        end = root['ts'] + root['dur']
+        print(f"{root['name']}: {root['dur'] / 1000:.1f} ms")
+        for event in events:
+            if event is root or not root['ts'] <= event['ts'] <= end:
+                continue
+            if event['args'].get('stack', '').split(';')[0] != root['name']:
+                continue
+            depth = event['args']['stack'].count(';')
+            print(f"{'  ' * depth}{event['name']}: {event['dur'] / 1000:.1f} ms "
+                  f"(cpu {event['args'].get('cpu_ms', 0):.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,11 @@ Implements intelligent trailing stop logic
 """
 
 import logging
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple, Union
 from datetime import datetime
+
+import numpy as np
+
 from indicators import MarketAnalyzer
 from risk_manager import RiskManager
 from config import TradingConfig
@@ -13,6 +16,107 @@ from config import TradingConfig
 logger = logging.getLogger(__name__)
 
 
+def round_cents(values: np.ndarray) -> np.ndarray:
+    """
+    Round prices to 2 decimals exactly like Python's round(x, 2)
+
+    np.round scales by 100 first, which can land on the other side of a
+    half cent; those rare near-tie values are rounded with round() instead.
+
+    Args:
+        values: Prices
+
+    Returns:
+        Rounded prices
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rounded = np.round(values, 2)
+
+    scaled = values * 100.0
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_tie):
+        rounded.flat[i] = round(float(values.flat[i]), 2)
+
+    return rounded
+
+
+def position_profit_pct(
+    entry_prices: np.ndarray,
+    current_price: Union[float, np.ndarray],
+    directions: np.ndarray
+) -> np.ndarray:
+    """
+    Profit percentage of many positions (MarketAnalyzer.calculate_position_profit)
+
+    Args:
+        entry_prices: Entry prices
+        current_price: Market price (or one per position)
+        directions: 1 for buy, -1 for sell, 0 for an unknown type (profit 0)
+
+    Returns:
+        Profit percentages
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        long_pct = ((current_price - entry_prices) / entry_prices) * 100
+        short_pct = ((entry_prices - current_price) / entry_prices) * 100
+
+    return np.where(directions == 1, long_pct, np.where(directions == -1, short_pct, 0.0))
+
+
+def batch_trailing_stops(
+    entry_prices: np.ndarray,
+    current_price: Union[float, np.ndarray],
+    current_stops: np.ndarray,
+    directions: np.ndarray,
+    active: np.ndarray,
+    trail_start_percent: float,
+    trail_step_percent: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Trailing stop update of many positions in one pass
+
+    Same results as TrailingStopManager.update_position_stop called for each
+    position (activation, RiskManager.calculate_trailing_stop rounding and
+    the never-loosen validation).
+
+    Args:
+        entry_prices: Entry prices
+        current_price: Market price (or one per position)
+        current_stops: Current stop losses (0 for none)
+        directions: 1 for buy, -1 for sell, 0 for an unknown type
+        active: Trailing already active per position
+        trail_start_percent: Profit % activating trailing
+        trail_step_percent: Trailing distance in % of the price
+
+    Returns:
+        Tuple (new stops, updated mask, active mask); new stops equal the
+        current ones where not updated
+    """
+    current_stops = np.asarray(current_stops, dtype=np.float64)
+
+    profit_pct = position_profit_pct(entry_prices, current_price, directions)
+    active = np.asarray(active, dtype=bool) | (profit_pct >= trail_start_percent)
+
+    trail_distance = current_price * (trail_step_percent / 100.0)
+    long_stop = current_price - trail_distance
+    short_stop = current_price + trail_distance
+
+    is_long = directions == 1
+    is_short = directions == -1
+    candidate = np.where(is_long, long_stop, short_stop)
+    rounded = round_cents(candidate)
+
+    has_stop = current_stops > 0
+    moves = (
+        (is_long & (long_stop > current_stops) & ~(has_stop & (rounded <= current_stops)))
+        | (is_short & ((short_stop < current_stops) | (current_stops == 0))
+           & ~(has_stop & (rounded >= current_stops)))
+    )
+    updated = active & moves
+
+    return np.where(updated, rounded, current_stops), updated, active
+
+
 class TrailingStopManager:
     """Manages trailing stops for open positions"""
 
@@ -24,6 +128,13 @@ class TrailingStopManager:
         self.config = config
         self.risk_manager = risk_manager or RiskManager(config)
         self.trailing_active = {}  # Track which positions have trailing active
+        self.journal = None  # StateJournal recording activations (attached by the bot)
+
+    def _activate(self, position_id: str):
+        """Mark trailing active for a position"""
+        self.trailing_active[position_id] = True
+        if self.journal is not None:
+            self.journal.record('trailing', position_id)
 
     def should_activate_trailing(
         self,
@@ -58,11 +169,8 @@ class TrailingStopManager:
 
         # Activate if profit threshold reached
         if profit_pct >= self.config.TRAIL_START_PERCENT:
-            self.trailing_active[position_id] = True
-            logger.info(
-                f"Trailing stop activated for {position_id} "
-                f"at {profit_pct:.2f}% profit"
-            )
+            self._activate(position_id)
+            logger.info("Trailing stop activated for %s at %.2f%% profit", position_id, profit_pct)
             return True
 
         return False
@@ -101,8 +209,8 @@ class TrailingStopManager:
 
         if new_stop:
             logger.info(
-                f"New trailing stop calculated for {position_id}: "
-                f"{current_stop:.2f} -> {new_stop:.2f}"
+                "New trailing stop calculated for %s: %.2f -> %.2f",
+                position_id, current_stop, new_stop
             )
 
         return new_stop
@@ -146,13 +254,13 @@ class TrailingStopManager:
             try:
                 success = exchange_update_callback(position_id, new_stop)
                 if success:
-                    logger.info(f"Stop loss updated on exchange: {new_stop:.2f}")
+                    logger.info("Stop loss updated on exchange: %.2f", new_stop)
                     return True
                 else:
                     logger.error("Failed to update stop loss on exchange")
                     return False
             except Exception as e:
-                logger.error(f"Error updating stop on exchange: {e}")
+                logger.error("Error updating stop on exchange: %s", e)
                 return False
 
         return True
@@ -185,11 +293,73 @@ class TrailingStopManager:
 
         return True
 
+    def update_stops_batch(
+        self,
+        position_ids: List[str],
+        entry_prices: np.ndarray,
+        current_price: Union[float, np.ndarray],
+        current_stops: np.ndarray,
+        directions: np.ndarray,
+        active: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Trailing stop update of many positions (see batch_trailing_stops)
+
+        Args:
+            position_ids: Position identifiers
+            entry_prices: Entry prices
+            current_price: Market price (or one per position)
+            current_stops: Current stop losses
+            directions: 1 for buy, -1 for sell, 0 for an unknown type
+            active: Trailing activation flags, updated in place (default:
+                built from this manager's state)
+
+        Returns:
+            Tuple (new stops, updated mask)
+        """
+        count = len(position_ids)
+        if not self.config.USE_TRAILING or count == 0:
+            return np.asarray(current_stops, dtype=np.float64).copy(), np.zeros(count, dtype=bool)
+
+        if active is None:
+            flags = np.fromiter(
+                (self.trailing_active.get(position_id, False) for position_id in position_ids),
+                dtype=bool,
+                count=count
+            )
+        else:
+            flags = active
+
+        new_stops, updated, now_active = batch_trailing_stops(
+            entry_prices,
+            current_price,
+            current_stops,
+            directions,
+            flags,
+            self.config.TRAIL_START_PERCENT,
+            self.config.TRAIL_STEP_PERCENT
+        )
+
+        for row in np.flatnonzero(now_active & ~flags):
+            self._activate(position_ids[row])
+            logger.info("Trailing stop activated for %s", position_ids[row])
+
+        for row in np.flatnonzero(updated):
+            logger.info(
+                "New trailing stop calculated for %s: %.2f -> %.2f",
+                position_ids[row], current_stops[row], new_stops[row]
+            )
+
+        if active is not None:
+            active[:] = now_active
+
+        return new_stops, updated
+
     def reset_trailing(self, position_id: str):
         """Reset trailing stop activation for a position"""
         if position_id in self.trailing_active:
             del self.trailing_active[position_id]
-            logger.info(f"Trailing stop reset for {position_id}")
+            logger.info("Trailing stop reset for %s", position_id)
 
     def get_trailing_status(self, position_id: str) -> bool:
         """Check if trailing is active for a position"""
@@ -210,6 +380,13 @@ class BreakevenManager:
         """
         self.breakeven_trigger_pct = breakeven_trigger_pct
         self.breakeven_set = {}
+        self.journal = None  # StateJournal recording breakeven moves (attached by the bot)
+
+    def _mark(self, position_id: str):
+        """Mark breakeven applied for a position"""
+        self.breakeven_set[position_id] = True
+        if self.journal is not None:
+            self.journal.record('breakeven', position_id)
 
     def should_move_to_breakeven(
         self,
@@ -241,11 +418,8 @@ class BreakevenManager:
 
         # Trigger breakeven
         if profit_pct >= self.breakeven_trigger_pct:
-            self.breakeven_set[position_id] = True
-            logger.info(
-                f"Breakeven triggered for {position_id} "
-                f"at {profit_pct:.2f}% profit"
-            )
+            self._mark(position_id)
+            logger.info("Breakeven triggered for %s at %.2f%% profit", position_id, profit_pct)
             return True
 
         return False
@@ -269,6 +443,55 @@ class BreakevenManager:
         buffer = entry_price * (commission_pct / 100.0)
         return entry_price + buffer
 
+    def check_batch(
+        self,
+        position_ids: List[str],
+        entry_prices: np.ndarray,
+        current_price: Union[float, np.ndarray],
+        directions: np.ndarray,
+        triggered: Optional[np.ndarray] = None,
+        commission_pct: float = 0.1
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Breakeven check of many positions in one pass
+
+        Same results as should_move_to_breakeven and get_breakeven_price
+        called for each position.
+
+        Args:
+            position_ids: Position identifiers
+            entry_prices: Entry prices
+            current_price: Market price (or one per position)
+            directions: 1 for buy, -1 for sell, 0 for an unknown type
+            triggered: Breakeven flags, updated in place (default: built
+                from this manager's state)
+            commission_pct: Total commission percentage (buy + sell)
+
+        Returns:
+            Tuple (newly triggered mask, breakeven prices)
+        """
+        count = len(position_ids)
+        if triggered is None:
+            triggered = np.fromiter(
+                (self.breakeven_set.get(position_id, False) for position_id in position_ids),
+                dtype=bool,
+                count=count
+            )
+
+        profit_pct = position_profit_pct(entry_prices, current_price, directions)
+        trigger = ~triggered & (profit_pct >= self.breakeven_trigger_pct)
+        triggered |= trigger
+
+        for row in np.flatnonzero(trigger):
+            self._mark(position_ids[row])
+            logger.info(
+                "Breakeven triggered for %s at %.2f%% profit",
+                position_ids[row], profit_pct[row]
+            )
+
+        breakeven_prices = entry_prices + entry_prices * (commission_pct / 100.0)
+        return trigger, breakeven_prices
+
     def reset_breakeven(self, position_id: str):
         """Reset breakeven status for a position"""
         if position_id in self.breakeven_set: